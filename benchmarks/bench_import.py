@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark
+=====================
+This script measures how long it takes to import each part of the robot
+package, and which heavy or hardware libraries each import pulls in.
+
+Every measurement runs in a NEW Python process, because Python imports a
+module only once per process - a second import in the same process would
+measure nothing. Each module is measured several times and the median is
+reported, so one slow run (disk cache, busy CPU) does not spoil the result.
+
+What to look for:
+- robot.mecanum should take a few milliseconds and load no hardware library
+- Only robot.kinematics (and makeMotorMatrix) should load NumPy
+
+Usage:
+    python3 benchmarks/bench_import.py          # Table
+    python3 benchmarks/bench_import.py --json   # Same numbers as JSON, to keep per release
+
+No hardware, evdev or RPi.GPIO is needed.
+"""
+
+import sys
+import os
+
+import json
+import statistics
+import subprocess
+
+# Project root, so the child processes import this copy of the robot package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    'robot',
+    'robot.mecanum',
+    'robot.motor',
+    'robot.controller',
+    'robot.drive',
+    'robot.kinematics',
+]
+
+# Libraries that should only be loaded when they are really needed
+HEAVY_LIBRARIES = ['evdev', 'RPi', 'numpy', 'asyncio']
+
+# Fresh processes per module
+RUNS = 15
+
+# Code run in each child process: time one import, report it as JSON
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000,
+                  'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measureImport(module):
+    """
+    Import a module in a fresh Python process and time it.
+
+    Parameters:
+    -----------
+    module : str
+        Module name, e.g. 'robot.mecanum'
+
+    Returns:
+    --------
+    dict : {'ms': import time in milliseconds, 'loaded': heavy libraries it loaded}
+    """
+    code = CHILD.format(root=ROOT, module=module, heavy=HEAVY_LIBRARIES)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    results = {}
+    for module in MODULES:
+        try:
+            runs = [measureImport(module) for _ in range(RUNS)]
+        except subprocess.CalledProcessError as error:
+            # e.g. robot.kinematics without NumPy installed
+            results[module] = {'error': error.stderr.strip().splitlines()[-1]}
+            continue
+        times = [run['ms'] for run in runs]
+        results[module] = {
+            'medianMs': statistics.median(times),
+            'minMs': min(times),
+            'loaded': runs[0]['loaded'],
+        }
+
+    if '--json' in sys.argv:
+        print(json.dumps({'python': sys.version.split()[0], 'runs': RUNS,
+                          'modules': results}, indent=2))
+        sys.exit(0)
+
+    print("=" * 60)
+    print(f"Import Time Benchmark (median of {RUNS} fresh processes)")
+    print("=" * 60)
+    print(f"{'Module':<20}{'median':>10}{'min':>10}   Heavy libraries loaded")
+    for module, result in results.items():
+        if 'error' in result:
+            print(f"{module:<20}   failed: {result['error']}")
+            continue
+        loaded = ', '.join(result['loaded']) or '-'
+        print(f"{module:<20}{result['medianMs']:>8.2f}ms{result['minMs']:>8.2f}ms   {loaded}")
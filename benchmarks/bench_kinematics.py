@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Kinematics Throughput Benchmark
+===============================
+This script measures how many (forward, left, turn) commands per second
+the mecanum math can turn into motor power vectors.
+
+It compares:
+- makeMotorVector(): one command per call (what the robot uses while driving)
+- makeMotorMatrix(): a whole NumPy array of commands per call (offline tools)
+
+for batch sizes N = 1, 10, 100, ... 1,000,000.
+
+Requires: NumPy (no motor hardware is driven)
+
+Usage: python3 benchmarks/bench_kinematics.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+from robot.mecanum import makeMotorVector, makeMotorMatrix
+
+# Keep repeating each measurement until it has run at least this long
+MIN_SECONDS = 0.2
+
+# The scalar loop gets slow for huge N - stop timing it above this size
+MAX_SCALAR_N = 100_000
+
+
+def timeIt(function):
+    """
+    Run a function repeatedly and return the best time for one run.
+
+    Parameters:
+    -----------
+    function : function
+        Function to time, called with no arguments
+
+    Returns:
+    --------
+    float : Seconds for one run (best of several)
+    """
+    best = float('inf')
+    spent = 0.0
+    while spent < MIN_SECONDS:
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+        spent += elapsed
+    return best
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("Kinematics Throughput Benchmark")
+    print("=" * 60)
+    print()
+    print(f"{'N':>10}{'makeMotorVector':>20}{'makeMotorMatrix':>20}")
+    print(f"{'':>10}{'(commands/s)':>20}{'(commands/s)':>20}")
+    print("-" * 50)
+
+    random = np.random.default_rng(0)
+
+    for power in range(7):
+        n = 10 ** power
+        # Include values outside -1..1 so normalization is exercised too
+        commands = random.uniform(-1.5, 1.5, size=(n, 3))
+        rows = commands.tolist()
+
+        matrixSeconds = timeIt(lambda: makeMotorMatrix(commands))
+
+        if n <= MAX_SCALAR_N:
+            scalarSeconds = timeIt(lambda: [makeMotorVector(f, l, t) for f, l, t in rows])
+            scalarRate = f"{n / scalarSeconds:>20,.0f}"
+        else:
+            scalarRate = f"{'(skipped)':>20}"
+
+        print(f"{n:>10,}{scalarRate}{n / matrixSeconds:>20,.0f}")
+
+    print()
+    print("=" * 60)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Drive Pipeline Benchmark Suite
+==============================
+This script times every stage between the controller and the motors, so
+any performance change can be judged with numbers - and checked against
+an earlier run for slowdowns ("regressions").
+
+Stages measured (nanoseconds per call or per event):
+- dispatch.*   Controller event loops with do-nothing callbacks:
+               callbackLoop() (one call per event), frameLoop() (per frame),
+               subscriptionLoop() (one subscribed axis out of two)
+- kinematics.* makeMotorVector(), makeMotorVectorInto(), combinePower()
+- motors.*     driveMotors() with changing powers (duty writes are made),
+               driveMotors() with the same powers (writes skipped by the
+               cache), moveMotor1()
+- pipeline.*   Whole path from event to duty write, through the real drive
+               callbacks: onStick() per event, onFrame() per frame, and
+               the subscriptions of drive.subscribeControls() per event
+
+The motors are simulated (robot.simgpio, history off), so this runs on
+any Linux computer; the numbers include the simulator's own small cost.
+
+Each benchmark runs REPEATS times. The table shows the median and the
+minimum; --compare uses the minimum (the best run), because other programs
+on the computer can only ever make a run slower, never faster. Results can
+be saved as JSON and compared later:
+
+Usage:
+    python3 benchmarks/bench_pipeline.py                         # Table
+    python3 benchmarks/bench_pipeline.py --json base.json        # Also save
+    python3 benchmarks/bench_pipeline.py --compare base.json     # Check
+    python3 benchmarks/bench_pipeline.py --compare base.json --threshold 0.05
+
+--compare marks every benchmark more than --threshold (default 10%)
+slower than the baseline as a REGRESSION and exits with status 1, so it
+can be used in scripts. Compare runs made on the same computer only.
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import time
+from array import array
+
+# Runs per benchmark
+REPEATS = 7
+
+# Calls or events per run
+BATCH = 20000
+
+# Slowdown that counts as a regression in --compare (0.10 = 10%)
+DEFAULT_THRESHOLD = 0.10
+
+# Times a suspected regression is measured again before it is reported
+CONFIRM_RUNS = 2
+
+
+def measure(run, count, repeats=REPEATS):
+    """
+    Time a benchmark.
+
+    Parameters:
+    -----------
+    run : function
+        Does 'count' operations per call (called with no arguments)
+    count : int
+        Operations per call of run(), to get the time per operation
+
+    Returns:
+    --------
+    dict : {'medianNs': ..., 'minNs': ..., 'repeats': ...} per operation
+    """
+    run()  # Warm up: caches, lookup tables, first-use imports
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) / count * 1e9)
+    return {'medianNs': statistics.median(times), 'minNs': min(times), 'repeats': repeats}
+
+
+def makeEvents(steps):
+    """
+    Stick events like a controller sends them: two axes, then SYN_REPORT.
+    """
+    from robot import controller
+    from robot.recording import RecordedEvent
+
+    events = []
+    for step in range(steps):
+        raw = (step * 1031) % 65535 - 32767   # Sweep the stick back and forth
+        events.append(RecordedEvent(0, step, controller.EV_ABS, 1, raw))        # stick1-Y
+        events.append(RecordedEvent(0, step, controller.EV_ABS, 0, -raw // 2))  # stick1-X
+        events.append(RecordedEvent(0, step, controller.EV_SYN, controller.SYN_REPORT, 0))
+    return events
+
+
+def ignore(*args):
+    pass
+
+
+def benchmarks():
+    """
+    Set up the simulated robot and describe every benchmark.
+
+    Returns:
+    --------
+    list of (name, run function, operations per run, unit)
+    """
+    from robot import controller, drive, gpio, mecanum, motor, simgpio
+
+    gpio.setBackend('sim')
+    simgpio.keepHistory = False
+    motor.initMotors()
+    drive.motorsFollowInput = True
+
+    events = makeEvents(BATCH // 3)
+    frames = BATCH // 3
+    buffer = array('d', [0.0] * 4)
+    vectors = itertools.cycle([[0.5, -0.25, 0.75, 0.0], [0.25, 0.5, -0.75, 1.0]])
+    steady = [0.5, -0.25, 0.75, 0.0]
+    calls = range(BATCH)
+
+    def kinematicsVector():
+        for _ in calls:
+            mecanum.makeMotorVector(0.5, -0.25, 0.75)
+
+    def kinematicsInto():
+        for _ in calls:
+            mecanum.makeMotorVectorInto(buffer, 0.5, -0.25, 0.75)
+
+    def kinematicsCombine():
+        for _ in calls:
+            mecanum.combinePower(2, 0.5, -0.25, 0.75)
+
+    def motorsChanging():
+        for powers in itertools.islice(vectors, BATCH):
+            mecanum.driveMotors(powers)
+
+    def motorsSteady():
+        for _ in calls:
+            mecanum.driveMotors(steady)
+
+    def motorsMove1():
+        for index in calls:
+            motor.moveMotor1(0.5 if index & 1 else -0.5)
+
+    def pipelineStick():
+        controller.callbackLoop(drive.onButton, drive.onStick, events)
+        drive.resetAxes()
+
+    def pipelineFrame():
+        controller.frameLoop(drive.onFrame, events)
+        drive.resetAxes()
+
+    subscribed = {controller.inputKey('stick1-Y'): ignore}
+
+    def pipelineSubscribed():
+        drive.subscribeControls()
+        controller.subscriptionLoop(events)
+        controller.clearSubscriptions()
+        drive.resetAxes()
+
+    return [
+        ('dispatch.callbackLoop', lambda: controller.callbackLoop(ignore, ignore, events),
+         len(events), 'event'),
+        ('dispatch.frameLoop', lambda: controller.frameLoop(ignore, events), len(events), 'event'),
+        ('dispatch.subscriptionLoop', lambda: controller.subscriptionLoop(events, subscribed),
+         len(events), 'event'),
+        ('kinematics.makeMotorVector', kinematicsVector, BATCH, 'call'),
+        ('kinematics.makeMotorVectorInto', kinematicsInto, BATCH, 'call'),
+        ('kinematics.combinePower', kinematicsCombine, BATCH, 'call'),
+        ('motors.driveMotors', motorsChanging, BATCH, 'call'),
+        ('motors.driveMotors.cached', motorsSteady, BATCH, 'call'),
+        ('motors.moveMotor1', motorsMove1, BATCH, 'call'),
+        ('pipeline.onStick', pipelineStick, len(events), 'event'),
+        ('pipeline.onFrame', pipelineFrame, frames, 'frame'),
+        ('pipeline.subscribed', pipelineSubscribed, len(events), 'event'),
+    ]
+
+
+def gitCommit():
+    """
+    The current git commit of the project, or None (not a git checkout).
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def runBenchmarks(cases, names=None):
+    """
+    Run the benchmarks.
+
+    Parameters:
+    -----------
+    cases : list
+        The benchmarks, as made by benchmarks()
+    names : collection of str, optional
+        Only run these benchmarks (default: all of them)
+
+    Returns:
+    --------
+    dict : Results by benchmark name
+    """
+    results = {}
+    for name, run, count, unit in cases:
+        if names is None or name in names:
+            result = measure(run, count)
+            result['unit'] = unit
+            results[name] = result
+    return results
+
+
+def runSuite(cases):
+    """
+    Run every benchmark.
+
+    Returns:
+    --------
+    dict : Machine-readable results (what --json saves)
+    """
+    results = runBenchmarks(cases)
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': gitCommit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeats': REPEATS,
+        'benchmarks': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two result sets by their best (minimum) times.
+
+    Returns:
+    --------
+    tuple : (printable lines, names of the regressed benchmarks)
+    """
+    lines = [f"{'Benchmark':<32}{'baseline':>12}{'now':>12}{'change':>9}"]
+    regressions = []
+    for name, result in current['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            lines.append(f"{name:<32}{'-':>12}{result['minNs']:>10.1f}ns      new")
+            continue
+        change = result['minNs'] / before['minNs'] - 1
+        if change > threshold:
+            verdict = '  REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            verdict = '  faster'
+        else:
+            verdict = ''
+        lines.append(f"{name:<32}{before['minNs']:>10.1f}ns{result['minNs']:>10.1f}ns"
+                     f"{change:>+8.1%}{verdict}")
+    for name in baseline['benchmarks']:
+        if name not in current['benchmarks']:
+            lines.append(f"{name:<32}  (no longer measured)")
+    return lines, regressions
+
+
+def save(results, path):
+    """
+    Write a result set as JSON (nothing happens when path is None).
+
+    Parameters:
+    -----------
+    results : dict
+        Result set from runSuite(), after any confirmation runs
+    path : str or None
+        File to write, from the --json option
+    """
+    if path:
+        with open(path, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time the input -> kinematics -> motor pipeline.')
+    parser.add_argument('--json', metavar='FILE', help='save the results to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='compare with results saved earlier')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown counted as a regression (default 0.10 = 10%%)')
+    options = parser.parse_args()
+
+    # Load the baseline first, so a wrong path fails before the long run
+    baseline = None
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+
+    cases = benchmarks()
+    current = runSuite(cases)
+
+    print("=" * 66)
+    print(f"Drive Pipeline Benchmarks (Python {current['python']}, "
+          f"{REPEATS} runs each, simulated GPIO)")
+    print("=" * 66)
+
+    if baseline is None:
+        print(f"{'Benchmark':<32}{'median':>12}{'min':>12}{'per second':>14}")
+        for name, result in current['benchmarks'].items():
+            perSecond = 1e9 / result['medianNs']
+            print(f"{name:<32}{result['medianNs']:>10.1f}ns{result['minNs']:>10.1f}ns"
+                  f"{perSecond:>11,.0f}/{result['unit'][0]}")
+        save(current, options.json)
+        sys.exit(0)
+
+    lines, regressions = compare(baseline, current, options.threshold)
+
+    # A busy computer makes single runs slow: measure suspects again and
+    # keep their best time, so only slowdowns that persist are reported
+    for _ in range(CONFIRM_RUNS):
+        if not regressions:
+            break
+        for name, result in runBenchmarks(cases, regressions).items():
+            best = current['benchmarks'][name]
+            best['minNs'] = min(best['minNs'], result['minNs'])
+        lines, regressions = compare(baseline, current, options.threshold)
+
+    # Saved only now, so the file holds the times that were compared
+    save(current, options.json)
+
+    print(f"Baseline: commit {baseline.get('commit')}, {baseline.get('created')}")
+    print('\n'.join(lines))
+    print()
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {options.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regressions over {options.threshold:.0%}")
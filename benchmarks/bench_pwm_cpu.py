@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+PWM CPU Usage Benchmark
+=======================
+This script measures how much CPU time the motor PWM output costs, so the
+software PWM of RPi.GPIO can be compared with hardware PWM through sysfs.
+
+It runs two phases with all 8 motor channels started (like initMotors):
+1. Idle: the motors hold a steady speed and the program only sleeps.
+   Any CPU used here is the PWM itself (RPi.GPIO runs a busy thread per
+   channel; hardware PWM should use nothing).
+2. Updates: new motor commands at 100 Hz, like driving with a controller.
+
+CPU time is measured with time.process_time(), which includes every
+thread of this program - also the software PWM threads inside RPi.GPIO.
+
+Usage (on the robot, as the motors would normally be run):
+    sudo python3 benchmarks/bench_pwm_cpu.py                       # RPi.GPIO
+    sudo ROBOT_GPIO=sysfs ROBOT_PWM_CHANNELS=... python3 benchmarks/bench_pwm_cpu.py
+    python3 benchmarks/bench_pwm_cpu.py 5                          # 5 s per phase
+
+The motors WILL turn (at low speed) - lift the robot off the ground.
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from robot import gpio
+from robot.motor import initMotors
+
+# Seconds per phase (can be given on the command line)
+PHASE_SECONDS = 10.0
+
+# Motor command updates per second in the "updates" phase
+UPDATE_RATE = 100
+
+
+def measure(function, seconds):
+    """
+    Run a function for a number of seconds and measure the CPU it used.
+
+    Parameters:
+    -----------
+    function : function
+        Called with the deadline (time.monotonic() value) to run until
+    seconds : float
+        How long to run
+
+    Returns:
+    --------
+    float : CPU usage in percent of one core
+    """
+    wallStart = time.monotonic()
+    cpuStart = time.process_time()
+    function(wallStart + seconds)
+    cpuUsed = time.process_time() - cpuStart
+    wallUsed = time.monotonic() - wallStart
+    return cpuUsed / wallUsed * 100
+
+
+def idle(deadline):
+    """Hold the current motor speeds and just sleep."""
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+
+
+def makeUpdater(bank):
+    """
+    Create the "updates" phase: slowly changing commands at UPDATE_RATE.
+    """
+    def updates(deadline):
+        period = 1.0 / UPDATE_RATE
+        nextTime = time.monotonic()
+        step = 0
+        while nextTime < deadline:
+            # A slow triangle wave between 20% and 40% power
+            amount = 0.2 + 0.2 * abs((step % 200) - 100) / 100
+            bank.apply([amount, -amount, amount, -amount])
+            step += 1
+            nextTime += period
+            delay = nextTime - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    return updates
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else PHASE_SECONDS
+
+    print("=" * 60)
+    print(f"PWM CPU Usage Benchmark (backend: {gpio.backendName})")
+    print("=" * 60)
+
+    bank = initMotors()
+    bank.apply([0.3, -0.3, 0.3, -0.3])
+
+    try:
+        idleCpu = measure(idle, seconds)
+        print(f"Idle, 8 channels running:   {idleCpu:6.2f}% CPU")
+
+        updateCpu = measure(makeUpdater(bank), seconds)
+        print(f"Updates at {UPDATE_RATE} Hz:          {updateCpu:6.2f}% CPU")
+
+        # Cost of one duty cycle write, without any sleeping
+        pwm = bank.pwms[0]
+        count = 20000
+        started = time.perf_counter()
+        for i in range(count):
+            pwm.ChangeDutyCycle(20 + (i & 15))
+        perWrite = (time.perf_counter() - started) / count
+        print(f"One ChangeDutyCycle() call: {perWrite * 1e6:6.2f} us")
+    finally:
+        bank.stop()
+        gpio.getGPIO().cleanup()
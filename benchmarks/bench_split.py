@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Split Process Latency Benchmark
+===============================
+This script compares the input-to-motor latency of the normal single
+process drive code with the separate motor process (robot.motorprocess).
+
+Both versions get the same synthetic controller: stick events at a fixed
+rate, each stamped with its due time like a real evdev event. They run
+through the normal drive callbacks, and the latency is measured from the
+event's timestamp until the motor duty cycles were written:
+- Single process: in the same process, by robot.latency
+- Split: in the motor process, after the command crossed the shared memory
+
+Each version runs twice: once alone, and once with a "load" thread in the
+input process that keeps the interpreter busy with pure Python work - like
+telemetry or logging code would. In the single process version that
+thread competes with the motor writes; in the split version the motor
+writes happen in the other process.
+
+Every run happens in a fresh Python process. The motors are simulated
+(robot.simgpio), so no hardware is needed.
+
+Usage:
+    python3 benchmarks/bench_split.py          # 5 s per run
+    python3 benchmarks/bench_split.py 10       # 10 s per run
+
+Note: the split version needs a second CPU core to run side by side. On a
+single core machine both processes share it, and the numbers show the cost
+of the hand-over (a process switch) rather than the gain.
+"""
+
+import sys
+import os
+
+import json
+import subprocess
+
+# Project root, so the child processes import this copy of the robot package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Seconds per run (can be given on the command line)
+RUN_SECONDS = 5.0
+
+# Synthetic stick events per second
+EVENT_RATE = 500
+
+RUNS = [
+    ('single', False),
+    ('single', True),
+    ('split', False),
+    ('split', True),
+]
+
+
+def syntheticEvents(seconds, rate):
+    """
+    Generate stick events at a fixed rate, stamped with their due time.
+
+    Each step moves stick1-Y and ends the frame with a SYN_REPORT, like a
+    controller does. The timestamp is the moment the event was due, like
+    the kernel's timestamp of a real event - so waiting for the interpreter
+    lock after waking up counts as latency too.
+
+    Parameters:
+    -----------
+    seconds : float
+        How long to generate events
+    rate : float
+        Stick events per second
+    """
+    import time
+    from robot import controller
+    from robot.recording import RecordedEvent
+
+    period = 1.0 / rate
+    due = time.monotonic()
+    toWallClock = time.time() - due   # monotonic() -> time.time()
+    end = due + seconds
+    step = 0
+
+    while due < end:
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        stamp = due + toWallClock
+        sec = int(stamp)
+        usec = int((stamp - sec) * 1000000)
+        raw = (step * 1031) % 65535 - 32767   # Sweep the stick back and forth
+        yield RecordedEvent(sec, usec, controller.EV_ABS, 1, raw)
+        yield RecordedEvent(sec, usec, controller.EV_SYN, controller.SYN_REPORT, 0)
+        step += 1
+        due += period
+
+
+def keepBusy(stopEvent):
+    """
+    Pure Python work that holds the interpreter lock most of the time.
+    """
+    while not stopEvent.is_set():
+        total = 0
+        for number in range(20000):
+            total += number * number
+
+
+def runChild(mode, load, seconds):
+    """
+    One benchmark run (inside the fresh child process).
+
+    Returns:
+    --------
+    dict : latency summary (see robot.latency.LatencyHistogram.summary)
+    """
+    import threading
+    from robot import controller, drive, gpio, latency, motor, simgpio
+
+    gpio.setBackend('sim')
+    simgpio.keepHistory = False   # Only count calls, do not keep them all
+    drive.motorsFollowInput = True
+
+    if mode == 'split':
+        from robot import motorprocess
+        # Fork first - before the load thread exists
+        process, channel, results = motorprocess.startMotorProcess(measureLatency=True)
+    else:
+        motor.initMotors()
+
+    stopEvent = threading.Event()
+    loadThread = None
+    if load:
+        loadThread = threading.Thread(target=keepBusy, args=(stopEvent,), daemon=True)
+        loadThread.start()
+
+    latency.enable()
+    controller.callbackLoop(drive.onButton, drive.onStick, syntheticEvents(seconds, EVENT_RATE))
+    latency.disable()
+
+    stopEvent.set()
+    if loadThread is not None:
+        loadThread.join()
+
+    if mode == 'split':
+        stats = motorprocess.stopMotorProcess(process, channel, results)
+        return stats['latency']
+    return latency.histogram.summary()
+
+
+def measure(mode, load, seconds):
+    """
+    Run one benchmark in a fresh Python process.
+    """
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child',
+                             mode, str(int(load)), str(seconds)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        print(json.dumps(runChild(sys.argv[2], sys.argv[3] == '1', float(sys.argv[4]))))
+        sys.exit(0)
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else RUN_SECONDS
+
+    print("=" * 70)
+    print(f"Split Process Latency Benchmark ({EVENT_RATE} events/s, {seconds:.0f} s per run, "
+          f"{os.cpu_count()} CPU cores)")
+    print("=" * 70)
+    print(f"{'Version':<10}{'load':<7}{'updates':>9}{'p50':>11}{'p99':>11}{'p99.9':>11}{'max':>11}")
+
+    for mode, load in RUNS:
+        result = measure(mode, load, seconds)
+        print(f"{mode:<10}{'yes' if load else 'no':<7}{result['count']:>9,}"
+              f"{result['p50Ms']:>9.3f}ms{result['p99Ms']:>9.3f}ms"
+              f"{result['p999Ms']:>9.3f}ms{result['maxMs']:>9.3f}ms")
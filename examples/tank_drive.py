@@ -23,7 +23,9 @@ Controls:
 - Right stick Y-axis: Controls Motor 2 (right side)
 
 Note: This does NOT use mecanum wheel math. For full mecanum control,
-use run_robot.py instead.
+use run_robot.py instead. For "arcade" style differential drive (one stick
+for speed, one for turning), robot.kinematics.differential() converts
+forward and turn speeds into left/right wheel speeds.
 """
 
 import sys
@@ -33,6 +35,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from robot import controller
 from robot import motor
+from robot import log
 from robot.controller import eventLoop
 from robot.motor import motorForward, motorBackward, moveMotor1, moveMotor2, initMotors
 
@@ -58,14 +61,14 @@ print()
 def onButton(button, value):
     """
     Handle button presses.
-    Currently just prints to console - you could add functionality here!
+    Currently just logs it - you could add functionality here!
     
     Ideas:
     - Emergency stop button
     - Speed mode selector
     - Motor enable/disable
     """
-    print('button', button, value)
+    log.info('button', 'button %s %s', button, value)
 
 
 def onStick(stick, value):
@@ -78,8 +81,12 @@ def onStick(stick, value):
     
     This creates "tank drive" style control where each side
     is controlled independently, like a tank or bulldozer.
+    
+    Sticks send many events per second, so they are logged through
+    robot.log (see below) instead of print(): printing every event would
+    make the motors wait for the console.
     """
-    print('stick', stick, value)
+    log.info('stick', 'stick %s %s', stick, value)
     
     if stick == 'stick1-Y':
         # Left stick controls Motor 1
@@ -93,6 +100,15 @@ def onStick(stick, value):
         moveMotor2(-value)
 
 
+# Show at most 10 stick messages per second - the rest are counted, not printed
+log.setRateLimit('stick', perSecond=10)
+
+# Write log messages from a background thread from now on
+log.start()
+
 # Start the event loop
 # This will continuously read controller input and call our functions
-eventLoop(onButton, onStick)
+try:
+    eventLoop(onButton, onStick)
+finally:
+    log.stop()
@@ -8,6 +8,26 @@ This package provides:
 - motor: DC motor control with PWM
 - mecanum: Mecanum wheel kinematics
 - drive: Main robot control logic
+- scheduler: Fixed-rate control loop
+- deadline: Stops the motors if the control loop stalls
+- realtime: Real-time priority, memory locking and GC freezing for driving
+- kinematics: General forward/inverse wheel kinematics (needs NumPy)
+- gpio: Chooses the GPIO backend (RPi.GPIO, simgpio or sysfspwm)
+- simgpio: Simulated GPIO for computers without motors
+- sysfspwm: Hardware PWM through sysfs
+- recording: Records controller input and replays it
+- latency: Input-to-motor latency measurement
+- motorprocess: Runs the motor output in its own process
+- metrics: Runtime counters served over HTTP
+- log: Logging that never blocks the control loop
+- motion: Scripted maneuvers
+- simulation: Simulates how a fleet of robots moves
+
+Submodules are loaded the first time they are used, so 'import robot'
+is almost free, and the math modules (mecanum, kinematics) work on
+computers without evdev or GPIO libraries. Those hardware libraries are
+only imported when the controller is connected (evdev) or the motors
+are initialized (RPi.GPIO, see robot.gpio).
 
 Example usage:
 --------------
@@ -20,8 +40,31 @@ Example usage:
     start()
 """
 
-# Make key components easily accessible
-from . import controller, motor, mecanum, drive
+import importlib
 
 __version__ = "1.0.0"
 __all__ = ['controller', 'motor', 'mecanum', 'drive']
+
+# Every submodule that 'robot.<name>' can load on first use
+submodules = frozenset(__all__ + [
+    'gpio', 'simgpio', 'sysfspwm', 'scheduler', 'deadline', 'realtime', 'kinematics',
+    'recording', 'latency', 'motorprocess', 'metrics',
+    'log', 'motion', 'simulation',
+])
+
+
+def __getattr__(name):
+    """
+    Load a submodule the first time it is used as robot.<name>.
+
+    Python calls this only for names the package does not have yet; after
+    the import the submodule is a normal attribute, so later uses cost
+    nothing extra.
+    """
+    if name in submodules:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | submodules)
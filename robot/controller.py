@@ -11,9 +11,26 @@ Key Concepts:
 - Callback functions: Functions you provide that get called when inputs happen
 """
 
-import evdev
-from evdev import InputDevice, categorize, ecodes
 import time
+from array import array
+from functools import partial
+from . import recording
+from . import latency
+from . import metrics
+from . import log
+
+# The evdev library is imported by connectToController(), so this module
+# (and everything that imports it) also loads on computers without evdev.
+# The event numbers below are the Linux kernel's, the same as evdev.ecodes.
+EV_SYN = 0          # Synchronization event (end of a frame, or events lost)
+EV_KEY = 1          # Button press/release
+EV_ABS = 3          # Joystick/trigger movement
+SYN_REPORT = 0      # EV_SYN code: all changes of this frame have been sent
+SYN_DROPPED = 3     # EV_SYN code: the kernel's buffer overflowed, events were lost
+
+# Event types the loops pass on. A constant set is checked without
+# building a new list or tuple for every event.
+INPUT_TYPES = frozenset((EV_KEY, EV_ABS))
 
 # Path to the controller device in Linux
 # /dev/input/event2 is typically where USB game controllers appear
@@ -23,8 +40,17 @@ import time
 controller_path = '/dev/input/event2'
 controller = None  # Will hold the controller object once connected
 
+# How long to wait between connection attempts after the controller was
+# lost while driving (shorter than at startup, to get back quickly)
+reconnectInterval = 0.25
+
+# Connection statistics (see getConnectionStats())
+disconnectCount = 0           # How many times the controller was lost
+lastReconnectSeconds = None   # How long the last reconnection took
+totalReconnectSeconds = 0.0   # Time spent without a controller, in total
+
 
-def connectToController():
+def connectToController(retryInterval=1):
     """
     Connect to the game controller.
     
@@ -34,31 +60,152 @@ def connectToController():
     For Bluetooth controllers: Make sure the controller is turned on and has
     auto-connected (you should see a solid Xbox button, not flashing).
     
+    Parameters:
+    -----------
+    retryInterval : float
+        Seconds to wait between connection attempts
+    
     Uses 'global' keyword because we're modifying the module-level 'controller' variable.
     """
     global controller
+    from evdev import InputDevice
     retry_count = 0
     
     while controller is None:
         try:
             # Try to open the controller device
             controller = InputDevice(controller_path)
-            print(f"✓ Controller connected at {controller_path}")
-            print(f"  Device: {controller.name}")
-        except (FileNotFoundError, PermissionError) as e:
-            # Controller not found - wait and try again
+            log.info('controller', '✓ Controller connected at %s', controller_path)
+            log.info('controller', '  Device: %s', controller.name)
+        except OSError:
+            # Controller not found (or its device node is still half set
+            # up after a Bluetooth reconnect: ENODEV, EIO) - wait and try again
             retry_count += 1
             if retry_count == 1:
-                print(f"Looking for controller at {controller_path}...")
-                print("  - If using USB: Make sure it's plugged in")
-                print("  - If using Bluetooth: Turn on controller (press Xbox button)")
-                print("  - See docs/XBOX_CONTROLLER_BLUETOOTH.md for setup help")
-                print()
+                log.info('controller', 'Looking for controller at %s...', controller_path)
+                log.info('controller', "  - If using USB: Make sure it's plugged in")
+                log.info('controller', '  - If using Bluetooth: Turn on controller (press Xbox button)')
+                log.info('controller', '  - See docs/XBOX_CONTROLLER_BLUETOOTH.md for setup help')
+                log.info('controller', '')
             elif retry_count % 5 == 0:
-                print(f"Still waiting for controller... (attempt {retry_count})")
-                print(f"  Tip: Check if device path is correct with: ls /dev/input/event*")
+                log.info('controller', 'Still waiting for controller... (attempt %d)', retry_count)
+                log.info('controller', '  Tip: Check if device path is correct with: ls /dev/input/event*')
             
-            time.sleep(1)
+            time.sleep(retryInterval)
+
+
+class DeviceReadError(Exception):
+    """
+    Reading the controller failed (it was unplugged or dropped out).
+    
+    Raised by deviceEvents() instead of the OSError itself, so the event
+    loop can tell a lost controller apart from an OSError raised by a
+    callback - for example a failed motor write, which is a real hardware
+    fault and must not be mistaken for a disconnect.
+    
+    Attributes:
+    -----------
+    error : OSError
+        The error raised by the device
+    """
+    
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+def deviceEvents(device):
+    """
+    Read events from a controller, turning read errors into DeviceReadError.
+    
+    Only errors of the read itself are caught: an error raised by the code
+    that handles an event does not pass through here.
+    
+    Parameters:
+    -----------
+    device : evdev.InputDevice
+        The connected controller
+    """
+    try:
+        # read_loop() returns events as they happen - it never ends!
+        yield from device.read_loop()
+    except OSError as error:
+        raise DeviceReadError(error) from error
+
+
+def getConnectionStats():
+    """
+    Get statistics about lost and recovered controller connections.
+    
+    Returns:
+    --------
+    dict : {'disconnects': times the controller was lost,
+            'lastReconnectSeconds': duration of the last reconnection (or None),
+            'totalReconnectSeconds': total time spent reconnecting}
+    """
+    return {
+        'disconnects': disconnectCount,
+        'lastReconnectSeconds': lastReconnectSeconds,
+        'totalReconnectSeconds': totalReconnectSeconds,
+    }
+
+
+def controllerLost(error, onDisconnect):
+    """
+    Handle a controller that stopped working while we were reading it.
+    
+    Bluetooth controllers can drop out (low battery, out of range) and USB
+    cables can be pulled. Reading from the device then raises OSError.
+    This function does everything that must happen RIGHT AWAY - before we
+    start waiting for the controller to come back.
+    
+    Parameters:
+    -----------
+    error : OSError
+        The error raised by the device
+    onDisconnect : function or None
+        Called with no arguments, e.g. to stop the motors
+        
+    Returns:
+    --------
+    float : time.monotonic() when the loss was noticed (pass it to
+            controllerRecovered() after reconnecting)
+    """
+    global controller, disconnectCount
+    
+    lostAt = time.monotonic()
+    disconnectCount += 1
+    
+    # First priority: let the caller stop the motors
+    if onDisconnect is not None:
+        onDisconnect()
+    
+    log.warning('controller', '⚠️  Controller lost (%s) - reconnecting...', error)
+    
+    # Release the old device so the new connection starts clean
+    try:
+        controller.close()
+    except OSError:
+        pass
+    controller = None
+    
+    return lostAt
+
+
+def controllerRecovered(lostAt):
+    """
+    Record a successful reconnection.
+    
+    Parameters:
+    -----------
+    lostAt : float
+        Value returned by controllerLost()
+    """
+    global lastReconnectSeconds, totalReconnectSeconds
+    
+    lastReconnectSeconds = time.monotonic() - lostAt
+    totalReconnectSeconds += lastReconnectSeconds
+    log.info('controller', '✓ Controller back after %.1f s', lastReconnectSeconds)
 
 
 # Dictionary mapping event codes (numbers) to friendly button/stick names
@@ -95,7 +242,314 @@ buttonNames = {
 }
 
 
-def eventLoop(onButton, onStick):
+# Names of the analog axes (codes 0-5). Everything else in buttonNames is a button.
+# Frame callbacks receive both kinds mixed together, so this set lets them tell
+# the two apart without knowing the raw event codes.
+stickNames = frozenset(name for code, name in buttonNames.items() if code <= 5)
+
+# Event codes of the analog axes, for the event loops
+stickCodes = frozenset(code for code in buttonNames if code <= 5)
+
+
+# Subscriptions
+# -------------
+# onStick() gets a NAME for every event and has to compare it against
+# the names it knows, and it is called even for sticks it ignores.
+# Instead, a program can subscribe one handler to each input it uses:
+#
+#     controller.subscribe('stick1-Y', onForwardStick)
+#     controller.subscribe((EV_KEY, 304), onAButton)   # the same as 'A'
+#
+# Names are turned into the event's (type, code) pair once, when the
+# handler is subscribed. The event loop then finds the handler with one
+# dictionary lookup per event and calls it with the normalized value.
+# Events nobody subscribed to are dropped right there, before any
+# Python callback runs.
+
+# The kernel numbers buttons (BTN_...) from 0x100 up; lower codes in
+# buttonNames are axes (ABS_...), including the D-pad
+FIRST_BUTTON_CODE = 0x100
+
+subscriptions = {}  # (event type, event code) -> handler(value)
+
+# The table adaptCallbacks() built last, with the callbacks it was built
+# for: a loop started again with the same callbacks (after a reconnect,
+# or replaying several recordings) reuses it instead of building a new one
+adaptedCallbacks = (None, None, {})
+
+
+def inputType(code):
+    """
+    Event type (EV_ABS or EV_KEY) of a code from buttonNames.
+    """
+    return EV_KEY if code >= FIRST_BUTTON_CODE else EV_ABS
+
+
+def inputKey(input):
+    """
+    Find the (event type, event code) pair of an input.
+    
+    Parameters:
+    -----------
+    input : str or tuple
+        A name from buttonNames ('A', 'stick1-Y', ...), or an
+        (event type, event code) pair such as (EV_KEY, 304)
+        
+    Returns:
+    --------
+    tuple : (event type, event code)
+    """
+    if isinstance(input, str):
+        for code, name in buttonNames.items():
+            if name == input:
+                return (inputType(code), code)
+        raise ValueError(f"Unknown input '{input}' (use one of "
+                         f"{sorted(buttonNames.values())} or an (event type, code) pair)")
+    
+    eventType, code = input
+    if eventType not in INPUT_TYPES:
+        raise ValueError('event type must be EV_KEY or EV_ABS')
+    return (int(eventType), int(code))
+
+
+def subscribe(input, handler, handlers=None):
+    """
+    Call handler(value) whenever one input changes.
+    
+    Each input has at most one handler: subscribing again replaces it.
+    
+    Parameters:
+    -----------
+    input : str or tuple
+        Name or (event type, event code) pair, see inputKey()
+    handler : function
+        Called with the normalized value (-1.0 to 1.0 for sticks, shaped by
+        the axis profile if there is one; see eventLoop() for buttons)
+    handlers : dict, optional
+        Subscription table to add to (default: the module's subscriptions)
+        
+    Returns:
+    --------
+    tuple : The (event type, event code) pair the handler is listening to
+    """
+    key = inputKey(input)
+    if handlers is None:
+        handlers = subscriptions
+    handlers[key] = handler
+    return key
+
+
+def unsubscribe(input):
+    """
+    Stop calling the handler of one input (events for it are dropped again).
+    """
+    subscriptions.pop(inputKey(input), None)
+
+
+def clearSubscriptions():
+    """
+    Remove every subscription.
+    """
+    # clear() instead of a new dict: a running loop keeps using this one
+    subscriptions.clear()
+
+
+def adaptCallbacks(onButton, onStick):
+    """
+    Build subscriptions that call classic onButton/onStick callbacks.
+    
+    This is the adapter behind callbackLoop(): every mapped stick calls
+    onStick(name, value) and every mapped button calls onButton(name, value),
+    as before. Either callback may be None - its inputs are then dropped.
+    
+    Returns:
+    --------
+    dict : Subscription table for subscriptionLoop()
+    """
+    global adaptedCallbacks
+    
+    lastButton, lastStick, handlers = adaptedCallbacks
+    if onButton == lastButton and onStick == lastStick:
+        return handlers
+    
+    handlers = {}
+    for code, name in buttonNames.items():
+        callback = onStick if code in stickCodes else onButton
+        if callback is not None:
+            # partial() remembers the name, so no string is built per event
+            handlers[(inputType(code), code)] = partial(callback, name)
+    adaptedCallbacks = (onButton, onStick, handlers)
+    return handlers
+
+
+# Input shaping ("response curves")
+# ---------------------------------
+# By default a stick position is just raw / 32767. An axis profile can
+# change that: ignore small movements around the center (deadzone), make
+# the middle of the stick less sensitive for precise driving (expo), flip
+# the direction (invert) or limit the top speed (scale).
+#
+# Doing that math for every event would slow down the event loop, so for
+# each shaped axis we work out the answer for EVERY possible raw value once,
+# when the profile is set, and store it in a table. Normalizing an event is
+# then a single table lookup: axisTables[code][raw - AXIS_RAW_MIN].
+
+# Raw range of a (16-bit) controller axis
+AXIS_RAW_MIN = -32768
+AXIS_RAW_MAX = 32767
+
+axisProfiles = {}   # stick name -> (deadzone, expo, invert, scale)
+axisTables = {}     # event code -> table of normalized values for that axis
+tableCache = {}     # profile -> table, so axes with the same profile share one
+
+
+def shapeAxis(raw, deadzone=0.0, expo=0.0, invert=False, scale=1.0):
+    """
+    Turn a raw axis value into a shaped value between -scale and scale.
+    
+    This is the math behind the axis tables. It is only run while a table
+    is built (and for the rare value outside AXIS_RAW_MIN..AXIS_RAW_MAX).
+    
+    Parameters:
+    -----------
+    raw : int
+        Raw value from the controller (-32767 to 32767)
+    deadzone, expo, invert, scale :
+        See setAxisProfile()
+        
+    Returns:
+    --------
+    float : The shaped value
+    """
+    value = min(max(raw / 32767, -1.0), 1.0)
+    size = abs(value)
+    
+    if size <= deadzone:
+        return 0.0
+    
+    # Start counting from the edge of the deadzone, so the output still
+    # grows smoothly from 0 instead of jumping to 'deadzone'
+    size = (size - deadzone) / (1 - deadzone)
+    
+    # Expo: a mix of a straight line and a cubic curve. The cubic part is
+    # flat near the center (fine control) and steep near the edge.
+    size = (1 - expo) * size + expo * size ** 3
+    
+    if (value < 0) != invert:
+        size = -size
+    return size * scale
+
+
+def buildAxisTable(profile):
+    """
+    Build (or reuse) the lookup table for a profile.
+    
+    Parameters:
+    -----------
+    profile : tuple
+        (deadzone, expo, invert, scale)
+        
+    Returns:
+    --------
+    array : One float per raw value from AXIS_RAW_MIN to AXIS_RAW_MAX
+    """
+    table = tableCache.get(profile)
+    if table is None:
+        table = array('d', (shapeAxis(raw, *profile)
+                            for raw in range(AXIS_RAW_MIN, AXIS_RAW_MAX + 1)))
+        tableCache[profile] = table
+    return table
+
+
+def setAxisProfile(stick, deadzone=0.0, expo=0.0, invert=False, scale=1.0):
+    """
+    Choose how one stick axis is shaped.
+    
+    The axis's lookup table is rebuilt only if the profile really changed,
+    so this is cheap to call again with the same settings.
+    
+    Parameters:
+    -----------
+    stick : str
+        Name of the axis (one of stickNames, e.g. 'stick1-X')
+    deadzone : float
+        Positions closer to the center than this (0.0 to <1.0) count as 0.
+        Useful for worn sticks that do not return exactly to the center.
+    expo : float
+        0.0 = straight line (default), 1.0 = fully cubic. Higher values make
+        small stick movements gentler without lowering the top speed.
+    invert : bool
+        True flips the direction of the axis
+    scale : float
+        Value at full stick (1.0 = unchanged, 0.5 = half speed)
+        
+    Example:
+    --------
+    # Precise driving: ignore drift, gentle center, 70% top speed
+    setAxisProfile('stick1-Y', deadzone=0.05, expo=0.6, scale=0.7)
+    """
+    codes = [code for code, name in buttonNames.items() if name == stick]
+    if stick not in stickNames or not codes:
+        raise ValueError(f"Unknown stick '{stick}' (use one of {sorted(stickNames)})")
+    if not 0.0 <= deadzone < 1.0:
+        raise ValueError('deadzone must be from 0.0 up to (not including) 1.0')
+    if not 0.0 <= expo <= 1.0:
+        raise ValueError('expo must be from 0.0 to 1.0')
+    
+    profile = (float(deadzone), float(expo), bool(invert), float(scale))
+    if axisProfiles.get(stick) == profile:
+        return
+    
+    axisProfiles[stick] = profile
+    table = buildAxisTable(profile)
+    for code in codes:
+        axisTables[code] = table
+    forgetUnusedTables()
+
+
+def clearAxisProfile(stick=None):
+    """
+    Go back to plain raw / 32767 normalization.
+    
+    Parameters:
+    -----------
+    stick : str, optional
+        Axis to reset. Default: all axes.
+    """
+    for name in ([stick] if stick is not None else list(axisProfiles)):
+        axisProfiles.pop(name, None)
+        for code, codeName in buttonNames.items():
+            if codeName == name:
+                axisTables.pop(code, None)
+    forgetUnusedTables()
+
+
+def forgetUnusedTables():
+    """
+    Drop cached tables no axis uses any more (each one is about 0.5 MB).
+    """
+    used = set(axisProfiles.values())
+    for profile in list(tableCache):
+        if profile not in used:
+            del tableCache[profile]
+
+
+def normalizeAxis(code, raw):
+    """
+    Normalize a raw axis value with the axis's profile (if it has one).
+    
+    The event loops do the same lookup inline; this is for everything else.
+    """
+    table = axisTables.get(code)
+    if table is None:
+        return raw / 32767
+    if AXIS_RAW_MIN <= raw <= AXIS_RAW_MAX:
+        return table[raw - AXIS_RAW_MIN]
+    return shapeAxis(raw, *axisProfiles[buttonNames[code]])
+
+
+def eventLoop(onButton=None, onStick=None, onFrame=None, onDisconnect=None, reconnect=True,
+              recordTo=None):
     """
     Main event loop - continuously reads controller input.
     
@@ -112,35 +566,338 @@ def eventLoop(onButton, onStick):
         Callback function for stick/joystick events. Called with (stick_name, value)
         Example: onStick('stick1-Y', 0.5) when left stick is pushed halfway up
         
+    onFrame : function, optional
+        Callback function for whole input frames. Called with a dictionary of
+        {name: value} holding every stick and button that changed in the frame.
+        Example: onFrame({'stick1-X': 0.3, 'stick1-Y': -0.7}) for a diagonal push
+        When given, onButton and onStick are NOT called by the loop - the frame
+        callback receives everything instead.
+        
+    Without any of these three callbacks, the loop calls the handlers
+    registered with subscribe() instead (see subscriptionLoop()).
+        
+    onDisconnect : function, optional
+        Called with no arguments as soon as the controller is lost (for
+        example a Bluetooth dropout). Use it to stop the motors.
+        
+    reconnect : bool
+        If True (default), wait for the controller to come back and carry
+        on calling the same callbacks. If False, the error is raised.
+        
+    recordTo : str, optional
+        File path. Every raw event read from the controller is saved there
+        so the session can be replayed later (see robot.recording).
+        
     How it works:
     -------------
-    1. Read events from the controller in a continuous loop
-    2. Check if event is a button (EV_KEY) or stick (EV_ABS)
-    3. Convert the event code to a friendly name using buttonNames dictionary
-    4. Normalize the value (divide by 32767 to get range -1.0 to 1.0)
-    5. Call the appropriate callback function
+    1. Before the loop, turn onButton/onStick into one handler per input in
+       buttonNames that already knows its friendly name (adaptCallbacks())
+    2. Read events from the controller in a continuous loop
+    3. Look up the handler for the event's type (EV_KEY button or EV_ABS
+       stick) and code; drop the event if there is none
+    4. Normalize the value (divide by 32767 to get range -1.0 to 1.0, or
+       look it up in the axis's shaping table, see setAxisProfile())
+    5. Call the handler, which calls onButton or onStick with the name
+    
+    Frames:
+    -------
+    The controller does not send a diagonal stick push as one event. It sends
+    one event per axis (X, then Y) followed by a SYN_REPORT marker that means
+    "this group of changes belongs together". With onFrame, the loop collects
+    changes until that marker and delivers them all at once, so the robot
+    updates its motors once per frame instead of once per axis.
+    
+    Disconnects:
+    ------------
+    If the controller disappears, reading it raises OSError. Instead of
+    crashing, the loop calls onDisconnect(), reconnects (see
+    reconnectInterval) and continues. The motors and GPIO setup are left
+    alone, so nothing has to be restarted. Only errors from READING the
+    controller count as a disconnect (see deviceEvents()); an OSError
+    raised by a callback, like a failed motor write, stops the loop.
     """
-    global controller
+    # One recorder for the whole session, even across reconnects
+    recorder = recording.Recorder(recordTo) if recordTo is not None else None
     
-    # read_loop() returns events as they happen - this loop never ends!
-    for event in controller.read_loop():
-        # Check if this is a button press/release (EV_KEY) or joystick movement (EV_ABS)
-        if event.type in [ecodes.EV_KEY, ecodes.EV_ABS]:
-            
-            # Joystick events have codes 0-5
-            if event.code <= 5 and event.code in buttonNames:
-                # Normalize joystick value: raw values are -32767 to 32767
-                # We convert to -1.0 to 1.0 for easier use
-                normalized_value = event.value / 32767
-                onStick(buttonNames[event.code], normalized_value)
+    try:
+        while True:
+            try:
+                events = deviceEvents(controller)
+                if recorder is not None:
+                    events = recorder.wrap(events)
                 
-            # Button events have codes > 5
-            elif event.code in buttonNames:
-                # Button values: 0 = released, 1 = pressed
-                # We normalize to 0.0 or 1.0 for consistency
-                normalized_value = event.value / 32767
-                onButton(buttonNames[event.code], normalized_value)
+                dispatchEvents(events, onButton, onStick, onFrame)
+                return
+            
+            except DeviceReadError as lost:
+                if not reconnect:
+                    raise lost.error
+                lostAt = controllerLost(lost.error, onDisconnect)
+                connectToController(reconnectInterval)
+                controllerRecovered(lostAt)
+    
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+
+def dispatchEvents(events, onButton=None, onStick=None, onFrame=None):
+    """
+    Pass events to the loop that matches the callbacks given.
+    
+    onFrame: frameLoop(). onButton and/or onStick: callbackLoop().
+    None of them: subscriptionLoop() with the module's subscriptions.
+    Used by eventLoop() and by recording.replay().
+    """
+    if onFrame is not None:
+        frameLoop(onFrame, events)
+    elif onButton is None and onStick is None:
+        subscriptionLoop(events)
+    else:
+        callbackLoop(onButton, onStick, events)
+
+
+def subscriptionLoop(events, handlers=None):
+    """
+    Event loop that calls the subscribed handler of each event.
+    
+    Parameters:
+    -----------
+    events : iterable of events
+        Where the events come from: controller.read_loop() when driving,
+        or a recording when replaying (see robot.recording)
+    handlers : dict, optional
+        Subscription table (default: the module's subscriptions, see
+        subscribe()). Handlers subscribed while the loop runs are used
+        from the next event on.
+    """
+    if handlers is None:
+        handlers = subscriptions
+    
+    for event in events:
+        if metrics.enabled:
+            metrics.countEvent(event.type)
+        
+        # One lookup finds the handler. Nothing subscribed (this also
+        # covers EV_SYN markers and unmapped codes): drop the event now.
+        handler = handlers.get((event.type, event.code))
+        if handler is None:
+            continue
+        
+        if latency.enabled:
+            # Remember when this event arrived (see robot.latency)
+            latency.eventTime = event.timestamp()
+        
+        # Normalize: raw values are -32767 to 32767, we convert to -1.0 to
+        # 1.0 (or look the shaped value up in the axis table, see
+        # setAxisProfile()). Button values 0/1 are divided the same way.
+        table = axisTables.get(event.code) if event.type == EV_ABS else None
+        if table is None:
+            handler(event.value / 32767)
+        elif AXIS_RAW_MIN <= event.value <= AXIS_RAW_MAX:
+            handler(table[event.value - AXIS_RAW_MIN])
+        else:
+            handler(normalizeAxis(event.code, event.value))
+
+
+def callbackLoop(onButton, onStick, events):
+    """
+    Event loop that calls onButton/onStick for every single event.
+    
+    This is the loop behind eventLoop(onButton, onStick). See eventLoop()
+    for the callbacks. It is an adapter: the callbacks are turned into
+    subscriptions (see adaptCallbacks()) and run by subscriptionLoop(), so
+    events of unmapped codes never reach them.
+    
+    Parameters:
+    -----------
+    events : iterable of events
+        Where the events come from: controller.read_loop() when driving,
+        or a recording when replaying (see robot.recording)
+    """
+    subscriptionLoop(events, adaptCallbacks(onButton, onStick))
+
+
+class FrameBuilder:
+    """
+    Collects controller events into frames.
+    
+    Feed it events one at a time with feed(). Most events just update the
+    frame being built; when the kernel marks the end of a frame
+    (EV_SYN / SYN_REPORT), feed() returns the finished frame.
+    
+    The frame is a dictionary {name: normalized_value}, using the same names
+    and normalization as eventLoop(). If the same axis changes twice inside
+    one frame, only the newest value is kept.
+    
+    This is shared by frameLoop() (normal loop) and frames() (asyncio), so
+    both treat frames exactly the same way.
+    
+    Dropped frames:
+    ---------------
+    If the program falls behind, the kernel's event buffer can overflow and
+    it sends SYN_DROPPED. Everything up to the next SYN_REPORT is then
+    unreliable, so we throw it away and read the current stick positions
+    straight from the device instead.
+    """
+    
+    def __init__(self):
+        self.changes = {}
+        self.dropping = False
+        self.frameTime = None  # Timestamp of the frame's first event (for robot.latency)
+    
+    def feed(self, event):
+        """
+        Add one event to the frame being built.
+        
+        Parameters:
+        -----------
+        event : evdev.InputEvent
+            Event read from the controller
+            
+        Returns:
+        --------
+        dict or None : The finished frame, or None if the frame is not
+                       finished yet (or nothing in it changed)
+        """
+        if metrics.enabled:
+            metrics.countEvent(event.type)
+        
+        if event.type == EV_SYN:
+            if event.code == SYN_REPORT:
+                if self.dropping:
+                    # End of the damaged stretch - rebuild the stick state
+                    self.dropping = False
+                    self.changes = {}
+                    resyncSticks(self.changes)
+                if self.changes:
+                    frame = self.changes
+                    self.changes = {}  # Fresh dict - the caller may keep the old one
+                    if latency.enabled:
+                        latency.eventTime = self.frameTime
+                    return frame
+            elif event.code == SYN_DROPPED:
+                self.dropping = True
                 
-            # Uncomment this to see unmapped buttons/sticks:
-            # else:
-            #     print('Unknown event code:', event.code)
+        elif not self.dropping and event.type in INPUT_TYPES:
+            name = buttonNames.get(event.code)
+            if name is not None:
+                if latency.enabled and not self.changes:
+                    self.frameTime = event.timestamp()
+                # Same normalization as eventLoop() for both sticks and buttons
+                table = axisTables.get(event.code)
+                if table is None:
+                    self.changes[name] = event.value / 32767
+                elif AXIS_RAW_MIN <= event.value <= AXIS_RAW_MAX:
+                    self.changes[name] = table[event.value - AXIS_RAW_MIN]
+                else:
+                    self.changes[name] = normalizeAxis(event.code, event.value)
+        
+        return None
+
+
+def frameLoop(onFrame, events):
+    """
+    Event loop that delivers one batched update per controller frame.
+    
+    This is the loop behind eventLoop(..., onFrame=...). It collects the
+    changes with a FrameBuilder and hands each finished frame to onFrame
+    when the kernel says the frame is complete (EV_SYN / SYN_REPORT).
+    
+    Parameters:
+    -----------
+    onFrame : function
+        Called with a dictionary {name: normalized_value}
+    events : iterable of events
+        Where the events come from (see callbackLoop())
+    """
+    builder = FrameBuilder()
+    
+    for event in events:
+        frame = builder.feed(event)
+        if frame is not None:
+            if metrics.enabled:
+                metrics.countFrame(frame)
+            onFrame(frame)
+
+
+async def frames(onDisconnect=None, reconnect=True):
+    """
+    Read controller frames with asyncio.
+    
+    This is the asyncio version of frameLoop(). Instead of calling a
+    function for each frame, it is an "async generator" you loop over:
+    
+        async for frame in controller.frames():
+            print(frame)     # e.g. {'stick1-Y': -0.5}
+    
+    While it waits for the controller, other asyncio tasks (a telemetry
+    server, a watchdog, a network command source...) keep running in the
+    same thread.
+    
+    Parameters:
+    -----------
+    onDisconnect : function, optional
+        Called with no arguments as soon as the controller is lost
+    reconnect : bool
+        If True (default), wait for the controller to come back and keep
+        yielding frames. If False, the error is raised.
+    
+    Yields:
+    -------
+    dict : One frame {name: normalized_value}, see FrameBuilder
+    """
+    # Imported here: programs that never use asyncio do not pay for loading it
+    import asyncio
+    
+    while True:
+        builder = FrameBuilder()
+        events = controller.async_read_loop()
+        
+        while True:
+            # Only the read itself counts as a disconnect (see deviceEvents())
+            try:
+                event = await events.__anext__()
+            except StopAsyncIteration:
+                return
+            except OSError as error:
+                if not reconnect:
+                    raise
+                lostAt = controllerLost(error, onDisconnect)
+                break
+            
+            frame = builder.feed(event)
+            if frame is not None:
+                if metrics.enabled:
+                    metrics.countFrame(frame)
+                yield frame
+        
+        # connectToController() sleeps between attempts - keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, connectToController, reconnectInterval)
+        controllerRecovered(lostAt)
+
+
+def resyncSticks(changes):
+    """
+    Read the current position of every mapped stick into a changes dictionary.
+    
+    Used after SYN_DROPPED, when some stick events were lost and the values
+    we last reported may be wrong.
+    
+    Parameters:
+    -----------
+    changes : dict
+        Dictionary to fill with {stick_name: normalized_value}
+    """
+    if controller is None:
+        # Replaying a recording - there is no device to ask
+        return
+    
+    for code, name in buttonNames.items():
+        if name in stickNames:
+            try:
+                changes[name] = normalizeAxis(code, controller.absinfo(code).value)
+            except OSError:
+                # This controller does not have that axis
+                pass
@@ -0,0 +1,328 @@
+"""
+Control Loop Deadline Monitor
+=============================
+This module watches the control loop and stops the motors if it stops
+making progress.
+
+Why do we need this?
+--------------------
+The motors keep the last duty cycle they were given. If the program gets
+stuck - a long garbage collection pause, a print() waiting for a blocked
+terminal, a controller read that never returns - the robot keeps driving
+at its last speed with nobody in control.
+
+How it works:
+-------------
+- The control loop calls feed() after every successful motor update
+- A separate thread sleeps until "last update + deadline"
+- If no new update came by then, it calls the stop function (for example
+  MotorBank.makeStopper(), which zeroes every PWM channel directly)
+- The next update after that resumes normal driving
+
+The input thread:
+-----------------
+The control loop runs on its own thread, so it keeps updating the motors
+even when the INPUT thread is stuck. The input thread therefore calls
+inputStarted() and inputDone() around every event it handles, and the
+control loop asks inputFresh() while the robot moves:
+
+- inputTimeout: one event is taking too long (a print() in a button
+  callback blocked on the terminal, a lock that is never released)
+- quietTimeout (optional): no event at all for this long. This also
+  catches a controller read that never returns, but most controllers
+  send nothing while the sticks are held still - only use it with a
+  controller (or driver) that repeats its state, or the robot stops
+  whenever the sticks are held steady.
+
+When the input is not fresh, drive.controlUpdate() leaves the motors alone
+and does NOT call feed(), so the monitor stops them one deadline later.
+The motors resume with the next event that arrives.
+
+Statistics:
+-----------
+Besides stopping the motors, the monitor measures the gaps between updates,
+which helps to choose the control rate and to find what causes delays:
+
+- Near miss: a gap longer than nearMiss * deadline that still made it
+- Stall: a gap longer than the deadline (the motors were stopped)
+- Stop delay: how long after the deadline the motors were actually stopped
+
+Note: Python threads share one interpreter lock. Stalls that WAIT (blocked
+I/O, sleeping) let the monitor run on time. A stall that keeps the lock
+busy (a long garbage collection) delays the monitor too; the motors are
+then stopped as soon as it gets to run, and the stop delay shows how late.
+
+Example usage:
+--------------
+    monitor = DeadlineMonitor(0.05, motor.bank.makeStopper())
+    monitor.start()
+    ...
+    setMotors()
+    monitor.feed()      # After every control update
+    ...
+    monitor.stop()
+    print(monitor.report())
+"""
+
+import threading
+import time
+from .latency import LatencyHistogram
+
+
+class DeadlineMonitor:
+    """
+    Stops the motors when the control loop misses its deadline.
+
+    Parameters:
+    -----------
+    deadline : float
+        Longest allowed time between two control updates, in seconds.
+        A few control periods is a good start (e.g. 0.05 s at 200 Hz).
+    onMiss : function
+        Called with no arguments (from the monitor thread) when the deadline
+        is missed. It should stop the motors, quickly.
+    onRecover : function, optional
+        Called with no arguments (from the control loop) by the first
+        feed() after a miss
+    nearMiss : float
+        Gaps longer than this fraction of the deadline count as near misses
+    inputTimeout : float, optional
+        Longest time the input thread may spend on one event, in seconds
+        (see inputFresh()). Default None: not checked.
+    quietTimeout : float, optional
+        Longest time without any input event while the robot moves, in
+        seconds. Default None: not checked (see "The input thread" above).
+    clock : function
+        Returns the time in seconds (default time.monotonic; tests can
+        pass a fake clock)
+
+    Attributes:
+    -----------
+    updates : int
+        Number of feed() calls
+    nearMisses : int
+        Gaps longer than nearMiss * deadline that were still in time
+    stalls : int
+        Gaps longer than the deadline
+    maxGap : float
+        Longest gap between two updates, in seconds
+    stallDurations : LatencyHistogram
+        How long each stall lasted (see robot.latency)
+    maxStopDelay : float
+        Longest time from a missed deadline until onMiss() was called
+    inputStalls : int
+        Times inputFresh() found the input stuck or quiet for too long
+    """
+
+    def __init__(self, deadline, onMiss, onRecover=None, nearMiss=0.5, inputTimeout=None,
+                 quietTimeout=None, clock=time.monotonic):
+        if deadline <= 0:
+            raise ValueError(f'deadline must be positive, got {deadline}')
+        if not 0.0 < nearMiss < 1.0:
+            raise ValueError(f'nearMiss must be between 0 and 1, got {nearMiss}')
+
+        for name, value in (('inputTimeout', inputTimeout), ('quietTimeout', quietTimeout)):
+            if value is not None and value <= 0:
+                raise ValueError(f'{name} must be positive, got {value}')
+
+        self.deadline = deadline
+        self.onMiss = onMiss
+        self.onRecover = onRecover
+        self.nearMissGap = deadline * nearMiss
+        self.inputTimeout = inputTimeout
+        self.quietTimeout = quietTimeout
+        self.clock = clock
+
+        self.lastUpdate = clock()
+        self.lastInput = self.lastUpdate   # When the input thread last started an event
+        self.inputBusy = False             # True while it handles one
+        self.inputStale = False            # True from a stale inputFresh() until fresh again
+        self.tripped = False   # True from a miss until the next feed()
+        self.thread = None
+        self.stopEvent = threading.Event()
+
+        self.updates = 0
+        self.nearMisses = 0
+        self.stalls = 0
+        self.maxGap = 0.0
+        self.stallDurations = LatencyHistogram()
+        self.totalStallSeconds = 0.0
+        self.maxStopDelay = 0.0
+        self.inputStalls = 0
+
+    def feed(self):
+        """
+        Report a successful control update.
+
+        Call this right after the motors were updated. It only reads the
+        clock and compares one number, unless the gap was unusually long.
+        """
+        now = self.clock()
+        gap = now - self.lastUpdate
+        self.lastUpdate = now
+        self.updates += 1
+
+        if gap >= self.nearMissGap or self.tripped:
+            self.recordGap(gap)
+
+    def recordGap(self, gap):
+        """
+        Count a long gap (the slow part of feed()).
+        """
+        if gap > self.maxGap:
+            self.maxGap = gap
+
+        if gap >= self.deadline:
+            self.stalls += 1
+            self.stallDurations.record(gap)
+            self.totalStallSeconds += gap
+        else:
+            self.nearMisses += 1
+
+        if self.tripped:
+            self.tripped = False
+            if self.onRecover is not None:
+                self.onRecover()
+
+    def inputStarted(self):
+        """
+        Report that the input thread started handling an event.
+        """
+        self.lastInput = self.clock()
+        self.inputBusy = True
+
+    def inputDone(self):
+        """
+        Report that the input thread finished handling the event.
+        """
+        self.inputBusy = False
+
+    def inputFresh(self):
+        """
+        Check that the input thread is still making progress.
+
+        Called by the control loop while the robot moves. Returns False if
+        the input thread has spent more than inputTimeout on one event, or
+        (with quietTimeout) has handled no event for longer than that. The
+        control loop should then leave the motors alone and NOT call
+        feed(), so the monitor stops them.
+
+        Returns:
+        --------
+        bool : True if the input is fine (or not checked)
+        """
+        limit = self.inputTimeout if self.inputBusy else self.quietTimeout
+        if limit is None or self.clock() - self.lastInput <= limit:
+            self.inputStale = False
+            return True
+
+        if not self.inputStale:
+            self.inputStale = True
+            self.inputStalls += 1
+        return False
+
+    def check(self):
+        """
+        Check the deadline once, and stop the motors if it was missed.
+
+        Returns:
+        --------
+        float : Seconds until the next check is needed
+        """
+        # The moment the next update is due at the latest
+        due = self.lastUpdate + self.deadline
+        delay = due - self.clock()
+        if delay > 0:
+            return delay
+
+        if not self.tripped:
+            self.tripped = True
+            self.onMiss()
+            stopDelay = self.clock() - due
+            if stopDelay > self.maxStopDelay:
+                self.maxStopDelay = stopDelay
+
+        # The motors are stopped - check again one deadline later
+        return self.deadline
+
+    def run(self):
+        """
+        Watch the deadline until stop() is called.
+
+        This blocks the calling thread. Use start() to run it in the
+        background instead.
+        """
+        self.stopEvent.clear()
+
+        while not self.stopEvent.is_set():
+            self.stopEvent.wait(self.check())
+
+    def start(self):
+        """
+        Start watching in a background (daemon) thread.
+
+        The deadline counts from this moment, so call it just before the
+        control loop starts.
+
+        Returns:
+        --------
+        threading.Thread : The monitor thread
+        """
+        self.lastUpdate = self.clock()
+        self.lastInput = self.lastUpdate
+        self.thread = threading.Thread(target=self.run, name='deadline-monitor', daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """
+        Stop watching and wait for the monitor thread to finish.
+        """
+        self.stopEvent.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def stats(self):
+        """
+        Return the statistics as a dictionary.
+
+        Returns:
+        --------
+        dict : deadline, counters, and gap/stall/stop delay values in milliseconds
+        """
+        stalls = self.stallDurations.summary()
+        return {
+            'deadlineMs': self.deadline * 1000,
+            'updates': self.updates,
+            'nearMisses': self.nearMisses,
+            'stalls': self.stalls,
+            'maxGapMs': self.maxGap * 1000,
+            'stallP50Ms': stalls['p50Ms'],
+            'stallP99Ms': stalls['p99Ms'],
+            'totalStallMs': self.totalStallSeconds * 1000,
+            'maxStopDelayMs': self.maxStopDelay * 1000,
+            'inputStalls': self.inputStalls,
+        }
+
+    def report(self):
+        """
+        Describe the statistics.
+
+        Returns:
+        --------
+        str : Printable lines, e.g.
+              "Deadline 50.0 ms: 12,000 updates, 3 near misses, 1 stall ..."
+        """
+        stats = self.stats()
+        lines = [f"Deadline {stats['deadlineMs']:.1f} ms: {stats['updates']:,} updates, "
+                 f"{stats['nearMisses']:,} near misses, {stats['stalls']:,} stalls, "
+                 f"longest gap {stats['maxGapMs']:.3f} ms"]
+        if self.stalls:
+            lines.append(f"  Stalls: p50 {stats['stallP50Ms']:.3f} ms  p99 {stats['stallP99Ms']:.3f} ms  "
+                         f"total {stats['totalStallMs']:.1f} ms  "
+                         f"motors stopped up to {stats['maxStopDelayMs']:.3f} ms after the deadline")
+        if self.inputStalls:
+            lines.append(f"  Input stuck or quiet while moving: {self.inputStalls:,} times "
+                         f"(motors left to the deadline)")
+        return '\n'.join(lines)
@@ -12,6 +12,9 @@ Program Flow:
 3. Initialize hardware (motors and controller)
 4. Start event loop (runs forever, processing controller input)
 
+start() runs this with a normal (blocking) loop. run() is the asyncio
+version, for programs that run other coroutines alongside the robot.
+
 Controls:
 ---------
 Left Stick Y-axis:  Forward/Backward movement
@@ -25,7 +28,14 @@ from . import motor
 from .controller import eventLoop, connectToController
 from .motor import motorForward, motorBackward, moveMotor1, moveMotor2, initMotors
 import time
-from .mecanum import makeMotorVector, driveMotors
+from array import array
+from functools import partial
+from .mecanum import makeMotorVector, motorVectorInto, enableMotorTable, driveMotors, stopMotors
+from .scheduler import Scheduler
+from .deadline import DeadlineMonitor
+from . import latency
+from . import metrics
+from . import log
 
 # Global variables to track current movement commands
 # These are updated by controller input and used to calculate motor powers
@@ -33,6 +43,30 @@ left = 0       # Strafe left/right (-1.0 to 1.0)
 forward = 0    # Move forward/backward (-1.0 to 1.0)
 turn = 0       # Rotate left/right (-1.0 to 1.0)
 
+# When True, every stick change immediately recalculates the motors.
+# start(controlRate=...) sets this to False and lets the scheduler update
+# the motors at a fixed rate instead; stick events then only store values.
+motorsFollowInput = True
+
+# setMotors() writes the motor powers into this buffer instead of building
+# a new list for every update
+motorPowers = array('d', [0.0] * 4)
+
+# The Scheduler running the fixed-rate control loop (None when not used)
+scheduler = None
+
+# The DeadlineMonitor watching the control loop (None when not used)
+monitor = None
+
+# Button presses are logged (see robot.log), but a burst of presses should
+# not flood a slow console: keep at most 20 per second, the rest is counted
+log.setRateLimit('button', perSecond=20, burst=40)
+
+# Used by run() (asyncio): True while a motor update is waiting for the
+# motor thread. Another update is then not needed - the waiting one will
+# read the newest stick values when it runs.
+motorUpdateQueued = False
+
 
 # Example function for testing motors (currently commented out)
 # def doHelloDance():
@@ -67,7 +101,8 @@ def onButton(button, value):
         
     Current behavior:
     -----------------
-    Just prints the button event to the console.
+    Just logs the button event (see robot.log - it is written to the
+    console by a background thread, so a slow console cannot delay us).
     
     Ideas for expansion:
     --------------------
@@ -76,7 +111,7 @@ def onButton(button, value):
     - Use 'start' button to reset robot position
     - Use triggers to control a robot arm or gripper
     """
-    print('button', button, value)
+    log.info('button', 'button %s %s', button, value)
 
 
 def clipValue(value):
@@ -109,9 +144,10 @@ def setMotors():
     
     Flow:
     -----
-    1. Call makeMotorVector() with current forward, left, turn values
-    2. Get back a list of 4 motor power values
-    3. Pass that list to driveMotors() to actually move the motors
+    1. Call motorVectorInto() with current forward, left, turn values
+       (this runs makeMotorVectorInto(), or uses the lookup table if enabled)
+    2. It fills the motorPowers buffer with the 4 motor power values
+    3. Pass that buffer to driveMotors() to actually move the motors
     
     Why this is separate:
     ---------------------
@@ -123,16 +159,158 @@ def setMotors():
     # print('values', forward, left, turn)
     
     # Calculate motor powers using mecanum wheel kinematics
-    vec = makeMotorVector(forward, left, turn)
+    # (or look them up, if start() enabled the motor table), reusing
+    # the motorPowers buffer
+    motorVectorInto(motorPowers, forward, left, turn)
     
     # Apply the calculated powers to the motors
-    driveMotors(vec)
+    driveMotors(motorPowers)
+    
+    if metrics.enabled:
+        metrics.setMotorsCalls.values[0] += 1
     
     # Alternative simple two-motor control (commented out):
     # moveMotor1(clipValue(y - x))
     # moveMotor2(-clipValue(y + x))
 
 
+def controlUpdate():
+    """
+    One run of the fixed-rate control loop (see start(controlRate=...)).
+    
+    Updates the motors, then tells the deadline monitor (if there is one)
+    that the control loop is still alive.
+    
+    While the robot moves, the monitor is also asked whether the INPUT
+    thread is still making progress. If it is stuck, this update is
+    skipped and the monitor is not fed, so it stops the motors (see
+    robot.deadline, "The input thread").
+    """
+    if monitor is None:
+        setMotors()
+        return
+    
+    if (forward or left or turn) and not monitor.inputFresh():
+        return
+    
+    setMotors()
+    monitor.feed()
+
+
+def setForward(value):
+    """Left stick vertical axis: forward/backward."""
+    global forward
+    # We negate the value because stick up (-1.0) should mean forward (+1.0)
+    forward = -value
+
+
+def setLeft(value):
+    """Left stick horizontal axis: left/right strafe."""
+    global left
+    # We negate because stick left (-1.0) should mean left (+1.0)
+    left = -value
+
+
+def setTurn(value):
+    """Right stick horizontal axis: rotation."""
+    global turn
+    # We negate because stick left should rotate left (counter-clockwise)
+    turn = -value
+
+
+# Which stick changes which movement command. Sticks that are not listed
+# do not move the robot.
+axisSetters = {
+    'stick1-Y': setForward,
+    'stick1-X': setLeft,
+    'stick2-X': setTurn,
+}
+
+
+def updateAxis(stick, value):
+    """
+    Store a new stick position in the matching movement command.
+    
+    This is the stick-to-movement mapping shared by onStick() and onFrame()
+    (see axisSetters). It only updates the global variables - it does NOT
+    move the motors.
+    
+    Parameters:
+    -----------
+    stick : str
+        Name of the stick ('stick1-X', 'stick1-Y', 'stick2-X', etc.)
+    value : float
+        Position of the stick (-1.0 to 1.0)
+        
+    Returns:
+    --------
+    bool : True if the stick controls the robot, False if it is unused
+    """
+    setter = axisSetters.get(stick)
+    if setter is None:
+        return False
+    
+    setter(value)
+    
+    if latency.enabled:
+        # This input changed the robot's movement - start its latency clock
+        latency.commandChanged()
+    
+    return True
+
+
+def followStick(setter):
+    """
+    Make the subscription handler for one stick (see subscribeControls()).
+    
+    The handler stores the new position with setter, then updates the
+    motors - the same as onStick(), without looking up the stick's name.
+    """
+    def onAxis(value):
+        if monitor is not None:
+            monitor.inputStarted()
+        setter(value)
+        if latency.enabled:
+            latency.commandChanged()
+        if motorsFollowInput:
+            setMotors()
+        if monitor is not None:
+            monitor.inputDone()
+    
+    return onAxis
+
+
+def onSubscribedButton(button, value):
+    """
+    Subscription handler for the buttons (see subscribeControls()).
+    
+    Calls onButton(), and tells the deadline monitor (if there is one)
+    while it runs, so a button callback that blocks is noticed.
+    """
+    if monitor is not None:
+        monitor.inputStarted()
+    onButton(button, value)
+    if monitor is not None:
+        monitor.inputDone()
+
+
+def subscribeControls():
+    """
+    Subscribe the driving controls to the controller (controller.subscribe()).
+    
+    Each stick in axisSetters gets its own handler and each button calls
+    onButton() with its name (through onSubscribedButton()). Sticks that do not drive the robot are not
+    subscribed, so the event loop drops their events without calling
+    anything. Used by start(batchFrames=False).
+    """
+    for stick, setter in axisSetters.items():
+        controller.subscribe(stick, followStick(setter))
+    
+    for code, name in controller.buttonNames.items():
+        if name not in controller.stickNames:
+            controller.subscribe(name, partial(onSubscribedButton, name))
+
+
 def onStick(stick, value):
     """
     Callback function for controller joystick movements.
@@ -155,72 +333,410 @@ def onStick(stick, value):
     stick1-X (Left stick horizontal): Left/Right strafe
     stick2-X (Right stick horizontal): Rotation
     
-    Why 'global'?
-    -------------
-    We use the 'global' keyword because we need to modify the module-level
-    variables (forward, left, turn) that are defined outside this function.
-    Without 'global', Python would create new local variables instead.
+    See updateAxis() for how each stick changes the movement commands.
     """
     # Uncomment this line to see all stick movements:
     # print('stick', stick, value)
     
-    # Declare that we're modifying the global variables
-    global forward
-    global left
-    global turn
-    
-    if stick == 'stick1-Y':
-        # Left stick vertical axis controls forward/backward
-        # We negate the value because stick up (-1.0) should mean forward (+1.0)
-        forward = -value
+    if updateAxis(stick, value) and motorsFollowInput:
         setMotors()  # Recalculate and apply new motor powers
-        
-    elif stick == 'stick1-X':
-        # Left stick horizontal axis controls left/right strafe
-        # We negate because stick left (-1.0) should mean left (+1.0)
-        left = -value
-        setMotors()
-        
-    elif stick == 'stick2-X':
-        # Right stick horizontal axis controls rotation
-        # We negate because stick left should rotate left (counter-clockwise)
-        turn = -value
-        setMotors()
 
 
-def start():
+def onFrame(changes):
+    """
+    Callback function for a whole controller frame.
+    
+    The controller event loop calls this once per frame with every stick
+    and button that changed. A diagonal stick push changes two axes at
+    once; handling them together means we run the mecanum math and write
+    the motors ONE time, and the motors never briefly see a half-updated
+    direction (new X with old Y).
+    
+    Parameters:
+    -----------
+    changes : dict
+        {name: value} for everything that changed, for example
+        {'stick1-X': 0.3, 'stick1-Y': -0.7}
+    """
+    if monitor is not None:
+        monitor.inputStarted()
+    
+    moved = False
+    
+    for name, value in changes.items():
+        if name in controller.stickNames:
+            if updateAxis(name, value):
+                moved = True
+        else:
+            onButton(name, value)
+    
+    if moved and motorsFollowInput:
+        setMotors()  # Once per frame, after all axes are updated
+    
+    if monitor is not None:
+        monitor.inputDone()
+
+
+def resetAxes():
+    """
+    Set all movement commands back to zero (robot standing still).
+    """
+    global forward, left, turn
+    forward = 0
+    left = 0
+    turn = 0
+
+
+def onDisconnect():
+    """
+    Callback for when the controller is lost while driving.
+    
+    The controller event loop calls this the moment the controller stops
+    responding (for example a Bluetooth dropout). Without it the motors
+    would keep running at their last speed with nobody in control!
+    
+    We forget the last stick positions too. Otherwise, when the controller
+    comes back and only one stick moves, the robot would mix it with the
+    old positions of the other sticks.
+    """
+    resetAxes()
+    stopMotors()
+    log.warning('drive', 'Motors stopped - waiting for controller')
+
+
+def start(controlRate=None, motorTableSteps=None, recordTo=None, measureLatency=False,
+          axisProfiles=None, deadline=None, realtime=None, batchFrames=True,
+          metricsPort=None, inputTimeout=None, quietTimeout=None):
     """
     Initialize hardware and start the robot control loop.
     
     This is the main entry point for the robot program. It performs
     all initialization steps and then enters the event loop.
     
+    Parameters:
+    -----------
+    controlRate : float, optional
+        Update the motors at this fixed rate in Hz (e.g. 200) instead of
+        on every controller event. Controller input then only stores the
+        latest stick values, and a Scheduler applies them to the motors.
+        Default None keeps the event-driven behavior.
+    motorTableSteps : int, optional
+        Precompute the mecanum math for this many levels per stick axis
+        (e.g. 41) and look motor vectors up instead of calculating them.
+        See mecanum.MotorVectorTable. Default None calculates every time.
+    recordTo : str, optional
+        Save every controller event to this file, to replay the session
+        later with robot.recording.replay()
+    measureLatency : bool
+        Measure the time from each stick event to its motor update and
+        print the p50/p99/p99.9/max latency when the program stops
+        (see robot.latency)
+    axisProfiles : dict, optional
+        Response curves for the sticks, as {stick name: settings}, e.g.
+        {'stick1-Y': {'deadzone': 0.05, 'expo': 0.6}}. See
+        controller.setAxisProfile() for the settings.
+    deadline : float, optional
+        Stop the motors if the control loop has not updated them for this
+        many seconds (e.g. 0.05), and print gap/stall statistics when the
+        program stops. Needs controlRate. See robot.deadline.
+    inputTimeout : float, optional
+        With deadline: stop the motors if the input thread spends longer
+        than this on one controller event while the robot moves (for
+        example a blocked print in onButton). Default: the deadline.
+    quietTimeout : float, optional
+        With deadline: also stop the motors if no controller event at all
+        arrives for this long while the robot moves. Off by default -
+        most controllers send nothing while the sticks are held still.
+    realtime : bool or dict, optional
+        True (or a dict of settings) runs the input, control and deadline
+        threads with SCHED_FIFO priority, locks memory and freezes the
+        garbage collector after startup, then prints what the system
+        actually allowed. Settings: 'priority' (of the input thread,
+        default 48; control gets +1 and deadline +2, so the default
+        layout tops out at 50), 'cpus' (e.g. [3]), 'lockMemory' (default
+        True), 'prefaultBytes'.
+        Steps that need missing privileges are skipped. See robot.realtime.
+    batchFrames : bool
+        True (default): handle the stick changes of a controller frame
+        together (see onFrame()). False: handle every event on its own,
+        through the controller subscriptions (see subscribeControls()):
+        one lookup per event, and sticks that do not drive the robot are
+        dropped without a call. That path allocates no memory per event (no frame
+        dictionary), which suits high event rates - best combined with
+        controlRate, so a diagonal push still gives one motor update.
+    metricsPort : int, optional
+        Count events, frames and motor updates and serve them in the
+        Prometheus format at http://127.0.0.1:<metricsPort>/metrics
+        (e.g. 9105). See robot.metrics.
+    
     Steps:
     ------
     1. Print startup message
     2. Initialize motor hardware (GPIO pins and PWM)
     3. Connect to the game controller
     4. Print ready message
-    5. Enter event loop (runs forever until program is stopped)
+    5. Start the fixed-rate control loop (only if controlRate is given)
+    6. Enter event loop (runs forever until program is stopped)
     
-    The event loop will continuously call onButton() and onStick()
-    as controller events occur.
+    The event loop will continuously call onFrame() as controller
+    events occur, which passes stick changes on to the motors and
+    button presses on to onButton().
     
     To stop:
     --------
     Press Ctrl+C to exit the program
     """
-    print('Starting: Drive Robot')
+    global motorsFollowInput, scheduler, monitor
+    
+    if deadline is not None and controlRate is None:
+        # Without a control loop the motors are only updated when the
+        # controller sends events, so a stick held still would look like a stall
+        raise ValueError('deadline needs controlRate (a fixed-rate control loop)')
+    
+    log.info('drive', 'Starting: Drive Robot')
     
     # Initialize motors (sets up GPIO pins and PWM)
     initMotors()
     
+    if motorTableSteps is not None:
+        # Build the lookup table before driving starts (takes a moment)
+        table = enableMotorTable(motorTableSteps, motorTableSteps, motorTableSteps)
+        log.info('drive', 'Motor table ready: %s vectors, %.1f MB',
+                 f'{len(table.vectors):,}', table.memorySize() / 1e6)
+    
+    if axisProfiles:
+        # Build the stick lookup tables before driving starts
+        for stick, settings in axisProfiles.items():
+            controller.setAxisProfile(stick, **settings)
+    
     # Connect to controller (waits until controller is found)
     connectToController()
-    print('Connected to Controller')
+    log.info('drive', 'Connected to Controller')
+    
+    if realtime:
+        # Imported here: it is only needed in real-time mode
+        from . import realtime as realtimeMode
+        settings = {} if realtime is True else dict(realtime)
+        priority = settings.get('priority', realtimeMode.DEFAULT_PRIORITY)
+        cpus = settings.get('cpus')
+        # Everything is initialized now - lock it in memory
+        realtimeMode.setupProcess(settings.get('lockMemory', True),
+                                  settings.get('prefaultBytes', realtimeMode.PREFAULT_BYTES))
+    
+    # From here on every thread that was started is stopped again in the
+    # finally: below, even if a later step fails
+    try:
+        if controlRate is not None:
+            # Motors are updated by the scheduler, not by controller events
+            motorsFollowInput = False
+            # If an update fails (e.g. a GPIO write error), the scheduler
+            # logs it and the motors are stopped instead of keeping their duty
+            stopOnError = motor.bank.makeStopper()
+            scheduler = Scheduler(onError=lambda task, error: stopOnError())
+            scheduler.addTask('control', controlRate, controlUpdate)
+            
+            if deadline is not None:
+                # The stop function is prepared now, so stopping needs no lookups
+                # (The motor bank catches up with the stop by itself, see
+                # MotorBank.checkStops())
+                monitor = DeadlineMonitor(deadline, motor.bank.makeStopper(),
+                                          inputTimeout=inputTimeout or deadline,
+                                          quietTimeout=quietTimeout)
+                monitorThread = monitor.start()
+                if realtime:
+                    # Above the control loop, so it can stop the motors when that is stuck
+                    realtimeMode.setupThread('deadline', monitorThread.native_id, priority + 2, cpus)
+                log.info('drive', 'Deadline monitor: motors stop after %.0f ms without an update', deadline * 1000)
+            
+            controlThread = scheduler.start()
+            if realtime:
+                realtimeMode.setupThread('control', controlThread.native_id, priority + 1, cpus)
+            log.info('drive', 'Control loop running at %s Hz', controlRate)
+        
+        if measureLatency:
+            latency.enable()
+        
+        if metricsPort is not None:
+            # Started before this thread turns real-time below: a new thread
+            # inherits the priority and CPUs of the thread that starts it
+            metrics.enable()
+            metricsServer = metrics.serve(metricsPort)
+            host, port = metricsServer.server_address[:2]
+            log.info('drive', 'Metrics: http://%s:%s/metrics', host, port)
+        
+        if not batchFrames:
+            subscribeControls()
+        
+        # From now on messages are queued and written by a background thread,
+        # so a slow console cannot hold up the event loop. (Like the metrics
+        # server, the writer must not inherit the real-time priority below.)
+        log.start()
+        
+        if realtime:
+            # This thread runs the controller event loop
+            realtimeMode.setupThread('input', 0, priority, cpus)
+            realtimeMode.freezeGC()
+            log.info('drive', '%s', realtimeMode.formatReport())
+        
+        log.info('drive', 'Ready to drive!')
+        
+        # Start the event loop (this function never returns)
+        # It will call onFrame() once per controller frame (or, without
+        # batchFrames, the subscribed handler of each event)
+        # If the controller is lost, onDisconnect() stops the motors and the
+        # loop reconnects by itself - no restart needed
+        eventLoop(onFrame=onFrame if batchFrames else None,
+                  onDisconnect=onDisconnect, recordTo=recordTo)
+    finally:
+        if monitor is not None:
+            # Stop watching first, so stopping the control loop is not a "stall"
+            monitor.stop()
+            log.info('drive', '%s', monitor.report())
+            monitor = None
+        
+        if scheduler is not None:
+            # Stop the control loop and show how well it kept its rate
+            scheduler.stop()
+            log.info('drive', '%s', scheduler.formatReport())
+            scheduler = None
+            motorsFollowInput = True
+        
+        if measureLatency:
+            latency.disable()
+            log.info('drive', '%s', latency.report())
+        
+        if metricsPort is not None:
+            metrics.stopServing()
+            metrics.disable()
+        
+        if not batchFrames:
+            controller.clearSubscriptions()
+        
+        # Write everything still queued (and how much was dropped)
+        log.stop()
+
+
+def applyQueuedUpdate():
+    """
+    Run one queued motor update (called on run()'s motor thread).
     
-    print('Ready to drive!')
+    Clears motorUpdateQueued BEFORE reading the stick values, so any
+    stick change that arrives after this point queues a new update.
+    """
+    global motorUpdateQueued
+    motorUpdateQueued = False
+    setMotors()
+
+
+async def run():
+    """
+    Initialize hardware and drive the robot using asyncio.
+    
+    This does the same job as start(), but as a coroutine. While it waits
+    for controller input, other coroutines in the same program keep
+    running - for example a telemetry server or a network command source:
+    
+        async def main():
+            await asyncio.gather(drive.run(), telemetryServer())
+        
+        asyncio.run(main())
+    
+    Why a separate motor thread?
+    ----------------------------
+    GPIO writes are normal (blocking) function calls. If they ran on the
+    asyncio event loop, every motor update would pause ALL coroutines,
+    including the one reading the controller. Instead, motor updates run
+    on one background thread. If the stick moves again while an update is
+    still waiting, no extra update is queued - the waiting one will use the
+    newest stick values anyway.
+    
+    To stop:
+    --------
+    Cancel the task (or press Ctrl+C with asyncio.run()). The motors are
+    stopped on the way out.
+    
+    Errors:
+    -------
+    If a motor write on the motor thread fails, run() stops reading the
+    controller, stops the motors and raises that error - it does not keep
+    driving with motors that no longer follow the sticks. A failed final
+    stop is raised too.
+    """
+    global motorUpdateQueued
+    # Imported here: start() does not need them, and they are slow to load
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    
+    log.info('drive', 'Starting: Drive Robot (asyncio)')
+    
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    
+    # One thread owns all GPIO calls, so motor writes never overlap
+    motorThread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='motors')
+    
+    # The first motor error, which ends run()
+    failure = None
+    
+    def motorsDone(future):
+        # Runs on the event loop when a motor job has finished
+        nonlocal failure
+        if future.cancelled() or future.exception() is None or failure is not None:
+            return
+        failure = future.exception()
+        log.error('drive', 'Motor update failed: %r - stopping', failure)
+        task.cancel()   # Wakes run() up, even while it waits for the controller
+    
+    def onMotorThread(function, *args):
+        future = loop.run_in_executor(motorThread, function, *args)
+        future.add_done_callback(motorsDone)
+        return future
+    
+    try:
+        # Both of these block, so they run off the event loop too
+        await loop.run_in_executor(motorThread, initMotors)
+        await loop.run_in_executor(None, connectToController)
+        log.info('drive', 'Connected to Controller')
+        
+        log.start()
+        log.info('drive', 'Ready to drive!')
+        
+        def motorsOff():
+            # Controller lost: forget the sticks and stop on the motor thread
+            resetAxes()
+            onMotorThread(driveMotors, [0, 0, 0, 0])
+        
+        lastUpdate = None
+        
+        try:
+            async for frame in controller.frames(onDisconnect=motorsOff):
+                moved = False
+                
+                for name, value in frame.items():
+                    if name in controller.stickNames:
+                        if updateAxis(name, value):
+                            moved = True
+                    else:
+                        onButton(name, value)
+                
+                if moved and not motorUpdateQueued:
+                    motorUpdateQueued = True
+                    lastUpdate = onMotorThread(applyQueuedUpdate)
+            
+            if lastUpdate is not None:
+                # The controller is gone: wait for the last update (raises its error)
+                await asyncio.shield(lastUpdate)
+        except asyncio.CancelledError:
+            if failure is not None:
+                # Cancelled by motorsDone(): report the motor error instead
+                raise failure from None
+            raise
     
-    # Start the event loop (this function never returns)
-    # It will call onButton() and onStick() as events occur
-    eventLoop(onButton, onStick)
+    finally:
+        # Stop the motors from the motor thread, after any queued update
+        stop = motorThread.submit(driveMotors, [0, 0, 0, 0])
+        motorThread.shutdown(wait=True)
+        motorUpdateQueued = False
+        log.stop()
+        # Raises if the stop failed: the motors may still be running
+        stop.result()
@@ -0,0 +1,106 @@
+"""
+GPIO Backend Selection
+======================
+This module decides which library the motor code talks to.
+
+The motor module needs an object that works like RPi.GPIO (setmode, setup,
+PWM, ...). On the robot that is the real RPi.GPIO library (or rpi-lgpio on
+a Pi 5). On a laptop or a CI server there are no GPIO pins, so we use a
+simulator instead that records what WOULD have happened.
+
+Available backends:
+-------------------
+- 'rpi': The real RPi.GPIO / rpi-lgpio library (default)
+- 'sim': robot.simgpio - records every call, no hardware needed
+- 'sysfs': robot.sysfspwm - hardware PWM channels through /sys/class/pwm
+  (no busy software PWM threads; see that module for the pin setup)
+
+Choosing a backend:
+-------------------
+Set the ROBOT_GPIO environment variable before starting the program:
+
+    ROBOT_GPIO=sim python3 run_robot.py
+    ROBOT_GPIO=sim python3 tests/test_movements.py
+
+or call setBackend() from Python before initMotors():
+
+    from robot import gpio
+    gpio.setBackend('sim')
+
+The library is only loaded when the motors are initialized, so importing
+the robot package never needs GPIO hardware.
+"""
+
+import os
+
+# Names of the available backends
+BACKENDS = ('rpi', 'sim', 'sysfs')
+
+# Name of the backend to use (see the list above). A wrong ROBOT_GPIO value
+# is reported by getGPIO(), so importing the package still works.
+backendName = os.environ.get('ROBOT_GPIO', 'rpi')
+
+# The loaded GPIO module, once getGPIO() has been called
+GPIO = None
+
+
+def setBackend(name):
+    """
+    Choose the GPIO backend.
+
+    Call this before initMotors(). Motors that were already initialized
+    keep using the old backend.
+
+    Parameters:
+    -----------
+    name : str
+        'rpi', 'sim' or 'sysfs'
+    """
+    global backendName, GPIO
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown GPIO backend '{name}' (use 'rpi', 'sim' or 'sysfs')")
+
+    backendName = name
+    GPIO = None  # Loaded again by the next getGPIO()
+
+
+def getGPIO():
+    """
+    Load (once) and return the GPIO module for the chosen backend.
+
+    Returns:
+    --------
+    module : Something that works like RPi.GPIO
+
+    Raises:
+    -------
+    ImportError : The 'rpi' backend was chosen but RPi.GPIO is not installed
+    ValueError : Unknown backend name (e.g. a typo in ROBOT_GPIO) - better
+                 to stop here than to drive a simulator while the real
+                 motors do nothing
+    """
+    global GPIO
+
+    if GPIO is None:
+        if backendName == 'rpi':
+            try:
+                import RPi.GPIO as module
+            except ImportError as error:
+                raise ImportError(
+                    'RPi.GPIO is not installed. On a Raspberry Pi install it with\n'
+                    '  sudo apt install python3-rpi-lgpio   (Pi 5)\n'
+                    '  sudo apt install python3-rpi.gpio    (Pi 4 and older)\n'
+                    'To run without hardware, set ROBOT_GPIO=sim') from error
+        elif backendName == 'sysfs':
+            from . import sysfspwm as module
+        elif backendName == 'sim':
+            from . import simgpio as module
+        else:
+            # setBackend() checks its name, so this came from ROBOT_GPIO
+            raise ValueError(f"Unknown GPIO backend '{backendName}' in ROBOT_GPIO "
+                             f"(use 'rpi', 'sim' or 'sysfs')")
+
+        GPIO = module
+
+    return GPIO
@@ -0,0 +1,303 @@
+"""
+General Wheel Kinematics
+========================
+This module converts between how the robot BODY moves and how fast each
+WHEEL turns, for any wheel layout that can be described by a matrix.
+
+The mecanum module does this for one robot with three hard-coded
+vectors. Here the same idea is written as a "mixing matrix" so that the
+same code works for mecanum, omni and differential (tank) drive robots,
+and for real robot sizes.
+
+Key Concepts:
+-------------
+- Body twist: How the robot body moves, as three numbers
+    vx = forward speed, vy = leftward speed, wz = turning speed
+    (counter-clockwise positive, like the mecanum module's "turn")
+- Wheel speeds: How fast each wheel spins (one number per wheel)
+- Inverse kinematics: twist -> wheel speeds ("how do I drive the wheels
+  to move like this?")
+- Forward kinematics: wheel speeds -> twist ("the wheels are turning like
+  this, so how is the robot moving?")
+- Mixing matrix M: one row per wheel, one column per twist component.
+  Inverse kinematics is simply  wheels = M @ twist
+- Pseudo-inverse: A robot with 4 wheels and 3 twist components has more
+  equations than unknowns, so M has no normal inverse. The pseudo-inverse
+  gives the best-fitting twist instead. It also handles robots that cannot
+  strafe at all (differential drive).
+
+Both matrices are calculated once when the Kinematics object is made, so
+every command afterwards costs one small matrix-vector product.
+
+Example usage:
+--------------
+    from robot.kinematics import mecanum, differential
+
+    robot = mecanum(wheelRadius=0.04, trackWidth=0.20, wheelBase=0.18)
+    wheels = robot.inverse(0.5, 0.0, 1.0)    # rad/s for [FL, BL, FR, BR]
+    twist = robot.forward(wheels)            # back to [vx, vy, wz]
+
+    tank = differential(wheelRadius=0.03, trackWidth=0.15)
+    tank.inverse(0.3, 0.0, 0.5)              # rad/s for [left, right]
+
+Requires: NumPy (pip install numpy)
+"""
+
+import math
+import numpy as np
+
+
+class Kinematics:
+    """
+    Forward and inverse kinematics for one wheel layout.
+
+    Parameters:
+    -----------
+    matrix : array-like, shape (wheels, 3)
+        Mixing matrix. Row i gives wheel i's speed as
+        matrix[i][0] * vx + matrix[i][1] * vy + matrix[i][2] * wz
+    wheelNames : list of str, optional
+        Label for each wheel (used in reports and examples only)
+
+    Attributes:
+    -----------
+    matrix : numpy.ndarray, shape (wheels, 3)
+        Mixing matrix (inverse kinematics)
+    pseudoInverse : numpy.ndarray, shape (3, wheels)
+        Pseudo-inverse of the mixing matrix (forward kinematics)
+
+    Example:
+    --------
+    The mecanum module's vectors as a mixing matrix (unitless, -1 to 1):
+
+        Kinematics([[1, -1, -1],     # Motor 1 (Front-Left)
+                    [1,  1, -1],     # Motor 2 (Back-Left)
+                    [1,  1,  1],     # Motor 3 (Front-Right)
+                    [1, -1,  1]])    # Motor 4 (Back-Right)
+    """
+
+    def __init__(self, matrix, wheelNames=None):
+        self.matrix = np.array(matrix, dtype=float)
+        if self.matrix.ndim != 2 or self.matrix.shape[1] != 3:
+            raise ValueError(f'Mixing matrix must have shape (wheels, 3), got {self.matrix.shape}')
+
+        self.pseudoInverse = np.linalg.pinv(self.matrix)
+        self.wheelCount = self.matrix.shape[0]
+        self.wheelNames = list(wheelNames) if wheelNames else [
+            f'wheel{i + 1}' for i in range(self.wheelCount)]
+
+        # Transposed copies so batches (one command per ROW) can be
+        # multiplied directly: (N, 3) @ (3, wheels) -> (N, wheels)
+        self.matrixT = self.matrix.T.copy()
+        self.pseudoInverseT = self.pseudoInverse.T.copy()
+
+    def inverse(self, vx, vy, wz):
+        """
+        Inverse kinematics: body twist -> wheel speeds.
+
+        Parameters:
+        -----------
+        vx : float
+            Forward speed
+        vy : float
+            Leftward (strafe) speed
+        wz : float
+            Counter-clockwise turning speed
+
+        Returns:
+        --------
+        numpy.ndarray : One speed per wheel
+        """
+        return self.matrix @ np.array((vx, vy, wz), dtype=float)
+
+    def forward(self, wheelSpeeds):
+        """
+        Forward kinematics: wheel speeds -> body twist.
+
+        If the wheel speeds do not match any possible body movement (for
+        example, wheels fighting each other), this returns the closest one.
+
+        Parameters:
+        -----------
+        wheelSpeeds : array-like
+            One speed per wheel
+
+        Returns:
+        --------
+        numpy.ndarray : [vx, vy, wz]
+        """
+        return self.pseudoInverse @ np.asarray(wheelSpeeds, dtype=float)
+
+    def inverseBatch(self, twists):
+        """
+        Inverse kinematics for many twists at once.
+
+        Parameters:
+        -----------
+        twists : array-like, shape (N, 3)
+            One [vx, vy, wz] per row
+
+        Returns:
+        --------
+        numpy.ndarray, shape (N, wheels) : One row of wheel speeds per twist
+        """
+        return np.asarray(twists, dtype=float) @ self.matrixT
+
+    def forwardBatch(self, wheelSpeeds):
+        """
+        Forward kinematics for many sets of wheel speeds at once.
+
+        Parameters:
+        -----------
+        wheelSpeeds : array-like, shape (N, wheels)
+            One set of wheel speeds per row
+
+        Returns:
+        --------
+        numpy.ndarray, shape (N, 3) : One [vx, vy, wz] per row
+        """
+        return np.asarray(wheelSpeeds, dtype=float) @ self.pseudoInverseT
+
+    def desaturate(self, wheelSpeeds, limit=1.0):
+        """
+        Scale wheel speeds down so that none of them exceeds a limit.
+
+        All wheels are scaled by the same factor, so the robot still moves
+        in the requested direction, just slower. Speeds already within the
+        limit are left unchanged. Works for one set of speeds or a batch
+        (one set per row).
+
+        Parameters:
+        -----------
+        wheelSpeeds : array-like, shape (wheels,) or (N, wheels)
+            Wheel speeds, e.g. from inverse() or inverseBatch()
+        limit : float
+            Largest allowed absolute speed (1.0 for motor powers)
+
+        Returns:
+        --------
+        numpy.ndarray : Scaled wheel speeds, same shape as the input
+        """
+        wheelSpeeds = np.asarray(wheelSpeeds, dtype=float)
+        largest = np.max(np.abs(wheelSpeeds), axis=-1, keepdims=True)
+        return wheelSpeeds / np.maximum(largest / limit, 1.0)
+
+
+def mecanum(wheelRadius=1.0, trackWidth=1.0, wheelBase=1.0, rollerAngle=45.0):
+    """
+    Kinematics for a 4-wheel mecanum robot (rollers in an "X" seen from above).
+
+    Wheels are ordered like the rest of the robot package:
+    [Motor1 Front-Left, Motor2 Back-Left, Motor3 Front-Right, Motor4 Back-Right]
+
+    Parameters:
+    -----------
+    wheelRadius : float
+        Wheel radius (e.g. meters). Wheel speeds come out in rad/s
+    trackWidth : float
+        Distance between the left and right wheels
+    wheelBase : float
+        Distance between the front and back wheels
+    rollerAngle : float
+        Angle of the rollers against the wheel axle in degrees (45 for
+        normal mecanum wheels)
+
+    Returns:
+    --------
+    Kinematics
+
+    Note:
+    -----
+    With the defaults (everything 1.0, 45°) the matrix is exactly the
+    mecanum module's forwardVec / leftVec / turnVec, so it works with
+    unitless -1.0 to 1.0 commands too.
+    """
+    halfTrack = trackWidth / 2
+    halfBase = wheelBase / 2
+    # tan(45°) is not exactly 1.0 in floating point - keep the common
+    # case exact so the matrix matches the mecanum module's vectors
+    strafe = 1.0 if rollerAngle == 45 else 1 / math.tan(math.radians(rollerAngle))
+
+    # (x position, y position, roller direction sign) for each wheel,
+    # x forward and y to the left of the robot's center
+    wheels = [
+        (halfBase, halfTrack, -1),     # Front-Left
+        (-halfBase, halfTrack, 1),     # Back-Left
+        (halfBase, -halfTrack, 1),     # Front-Right
+        (-halfBase, -halfTrack, -1),   # Back-Right
+    ]
+
+    # The wheel drives the part of its contact point's velocity that is
+    # not taken up by the free-spinning roller:
+    #   contact velocity = (vx - wz * y, vy + wz * x)
+    #   wheel speed * r  = contact_x + sign * contact_y / tan(rollerAngle)
+    matrix = [[1 / wheelRadius,
+               sign * strafe / wheelRadius,
+               (-y + sign * strafe * x) / wheelRadius]
+              for x, y, sign in wheels]
+
+    return Kinematics(matrix, ['front-left', 'back-left', 'front-right', 'back-right'])
+
+
+def omni(wheelRadius=1.0, robotRadius=1.0, wheelAngles=(45, 135, 225, 315)):
+    """
+    Kinematics for an omni-wheel robot with wheels around a circle.
+
+    Each wheel sits at wheelAngles[i] degrees around the center (0 = straight
+    ahead, counting counter-clockwise) and rolls along the circle, i.e.
+    at right angles to the line from the center. The default is a 4-wheel
+    "X-drive"; use (0, 120, 240) for a 3-wheel "kiwi" robot.
+
+    Parameters:
+    -----------
+    wheelRadius : float
+        Wheel radius. Wheel speeds come out in rad/s
+    robotRadius : float
+        Distance from the robot's center to each wheel
+    wheelAngles : list of float
+        Position of each wheel around the robot, in degrees
+
+    Returns:
+    --------
+    Kinematics
+    """
+    matrix = []
+    for angle in wheelAngles:
+        position = math.radians(angle)
+        x = robotRadius * math.cos(position)
+        y = robotRadius * math.sin(position)
+        # Direction the wheel pushes: 90° counter-clockwise from its position
+        driveX = -math.sin(position)
+        driveY = math.cos(position)
+        # Wheel speed * r = drive direction · contact velocity
+        matrix.append([driveX / wheelRadius,
+                       driveY / wheelRadius,
+                       (-y * driveX + x * driveY) / wheelRadius])
+
+    return Kinematics(matrix, [f'wheel@{angle}°' for angle in wheelAngles])
+
+
+def differential(wheelRadius=1.0, trackWidth=1.0):
+    """
+    Kinematics for a differential (tank) drive robot: one left and one right wheel.
+
+    A differential robot cannot strafe, so the vy column is all zeros.
+    Forward kinematics always reports vy = 0.
+
+    Parameters:
+    -----------
+    wheelRadius : float
+        Wheel radius. Wheel speeds come out in rad/s
+    trackWidth : float
+        Distance between the left and right wheels
+
+    Returns:
+    --------
+    Kinematics : Wheels ordered [left, right]
+    """
+    halfTrack = trackWidth / 2
+    matrix = [
+        [1 / wheelRadius, 0.0, -halfTrack / wheelRadius],   # Left wheel
+        [1 / wheelRadius, 0.0, halfTrack / wheelRadius],    # Right wheel
+    ]
+    return Kinematics(matrix, ['left', 'right'])
@@ -0,0 +1,244 @@
+"""
+Input-to-Motor Latency Measurement
+==================================
+This module measures how long it takes from the moment the controller
+reports a stick movement until the motors are told about it.
+
+How it works:
+-------------
+Every controller event carries a timestamp from the Linux kernel: the
+moment the event arrived from USB/Bluetooth. When measuring is enabled:
+
+1. The controller loop stores that timestamp in eventTime while it hands
+   the event (or frame: the time of its first event) to the callbacks
+2. When the drive code changes a movement command because of it, it calls
+   commandChanged(), which keeps that time in inputTime
+3. The new command travels through the mecanum math as usual
+4. When mecanum.driveMotors() has written the motors, motorsWritten()
+   records "now - inputTime" in a histogram
+
+When measuring is disabled, the only cost is checking 'enabled' once per
+event and once per motor update.
+
+Key Concepts:
+-------------
+- Latency: The delay between cause (stick moved) and effect (motor changed)
+- Percentile: p99 = 1 ms means 99% of updates took 1 ms or less
+- Histogram: Counts of how many measurements fell into each time range
+  ("bucket"), instead of storing every measurement. Memory stays the same
+  no matter how long the robot runs.
+- Log buckets: Buckets get wider as times get longer (1 us wide near zero,
+  about 6% of the value for longer times), so both tiny and huge delays are
+  measured with similar relative accuracy.
+
+Example usage:
+--------------
+    from robot import latency
+    latency.enable()
+    ...drive...
+    print(latency.report())
+
+Note: evdev timestamps use the system clock (time.time()), so measurements
+are compared against time.time() as well.
+"""
+
+import time
+
+# Measuring switched on/off. Checked on every event - keep it a plain bool.
+enabled = False
+
+# Kernel timestamp (seconds) of the event/frame being handled right now
+eventTime = None
+
+# Kernel timestamp of the OLDEST input the motors have not acted on yet,
+# or None if there is no new input since the last motor update
+inputTime = None
+
+# Buckets per doubling of time (16 -> about 6% bucket width)
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+# Longest latency kept apart from the others: 2**27 us (about 134 s)
+MAX_MICROSECONDS = (1 << 27) - 1
+
+
+class LatencyHistogram:
+    """
+    Fixed-size histogram of latencies with logarithmic buckets.
+
+    Values are stored in microseconds. Below 32 us every microsecond has its
+    own bucket; above that, each doubling of time (32-64 us, 64-128 us, ...)
+    is split into 16 buckets. 384 buckets cover everything up to ~134 s.
+    """
+
+    def __init__(self):
+        self.bucketCount = self.bucketIndex(MAX_MICROSECONDS) + 1
+        self.buckets = [0] * self.bucketCount
+        self.count = 0
+        self.maxSeconds = 0.0
+
+    @staticmethod
+    def bucketIndex(microseconds):
+        """
+        Find the bucket for a value in microseconds.
+
+        The top bits of the number pick the bucket: 'shift' says how many
+        low bits are ignored (0 for small values), and the remaining 5 bits
+        (16-31) give the position inside that doubling.
+        """
+        shift = microseconds.bit_length() - SUB_BUCKET_BITS - 1
+        if shift < 0:
+            shift = 0
+        return (shift << SUB_BUCKET_BITS) + (microseconds >> shift)
+
+    @staticmethod
+    def bucketUpperBound(index):
+        """
+        Largest value (in microseconds) that falls into a bucket.
+        """
+        shift = (index >> SUB_BUCKET_BITS) - 1
+        if shift < 0:
+            shift = 0
+        low = (index - (shift << SUB_BUCKET_BITS)) << shift
+        return low + (1 << shift) - 1
+
+    def record(self, seconds):
+        """
+        Add one latency measurement.
+
+        Parameters:
+        -----------
+        seconds : float
+            The latency (negative values, e.g. after a clock change, are ignored)
+        """
+        if seconds < 0:
+            return
+
+        microseconds = int(seconds * 1000000)
+        if microseconds > MAX_MICROSECONDS:
+            microseconds = MAX_MICROSECONDS
+
+        self.buckets[self.bucketIndex(microseconds)] += 1
+        self.count += 1
+        if seconds > self.maxSeconds:
+            self.maxSeconds = seconds
+
+    def percentile(self, percent):
+        """
+        Get the latency that 'percent' % of measurements are at or below.
+
+        The answer is the upper edge of the bucket it falls in (never more
+        than the largest measurement), so it is slightly pessimistic.
+
+        Parameters:
+        -----------
+        percent : float
+            0 to 100, e.g. 99.9
+
+        Returns:
+        --------
+        float : Latency in seconds (0.0 if nothing was recorded)
+        """
+        if self.count == 0:
+            return 0.0
+
+        # Number of measurements that must be at or below the answer
+        needed = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, bucketCount in enumerate(self.buckets):
+            seen += bucketCount
+            if seen >= needed:
+                return min(self.bucketUpperBound(index) / 1000000, self.maxSeconds)
+        return self.maxSeconds
+
+    def summary(self):
+        """
+        Get the most useful statistics.
+
+        Returns:
+        --------
+        dict : count, and p50 / p99 / p99.9 / max latency in milliseconds
+        """
+        return {
+            'count': self.count,
+            'p50Ms': self.percentile(50) * 1000,
+            'p99Ms': self.percentile(99) * 1000,
+            'p999Ms': self.percentile(99.9) * 1000,
+            'maxMs': self.maxSeconds * 1000,
+        }
+
+    def reset(self):
+        """
+        Forget all measurements.
+        """
+        self.buckets = [0] * self.bucketCount
+        self.count = 0
+        self.maxSeconds = 0.0
+
+
+# The histogram used by the drive program
+histogram = LatencyHistogram()
+
+
+def enable():
+    """
+    Start measuring input-to-motor latency.
+    """
+    global enabled, eventTime, inputTime
+    eventTime = None
+    inputTime = None
+    enabled = True
+
+
+def disable():
+    """
+    Stop measuring (the measurements so far are kept).
+    """
+    global enabled, eventTime, inputTime
+    enabled = False
+    eventTime = None
+    inputTime = None
+
+
+def commandChanged():
+    """
+    Note that the event being handled changed a movement command.
+
+    Called by the drive code (only when measuring is enabled). If several
+    inputs arrive before the motors are updated, the oldest one is kept -
+    it is the one that waited longest.
+    """
+    global inputTime
+    if inputTime is None:
+        inputTime = eventTime
+
+
+def motorsWritten():
+    """
+    Record the latency of the input the motors were just updated for.
+
+    Called by mecanum.driveMotors() after a motor update when measuring is
+    enabled. If there was no new input since the last update (for example
+    the fixed-rate control loop repeating the same command), nothing is
+    recorded.
+    """
+    global inputTime
+    stamp = inputTime
+    if stamp is not None:
+        inputTime = None
+        histogram.record(time.time() - stamp)
+
+
+def report():
+    """
+    Describe the measured latencies.
+
+    Returns:
+    --------
+    str : One printable line, e.g.
+          "Input->motor latency: 1,234 updates  p50 0.412 ms  p99 1.310 ms ..."
+    """
+    stats = histogram.summary()
+    return (f"Input->motor latency: {stats['count']:,} updates  "
+            f"p50 {stats['p50Ms']:.3f} ms  p99 {stats['p99Ms']:.3f} ms  "
+            f"p99.9 {stats['p999Ms']:.3f} ms  max {stats['maxMs']:.3f} ms")
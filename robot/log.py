@@ -0,0 +1,346 @@
+"""
+Robot Logging
+=============
+This module writes the robot's messages (button presses, connection
+changes, reports) without ever making the driving code wait for the
+terminal.
+
+Why not just print()?
+---------------------
+print() waits until the text has been written. Over SSH or a slow serial
+console that can take milliseconds, and a burst of button presses then
+holds up the controller loop - and with it the motor updates.
+
+How it works:
+-------------
+- Each message has a "kind" (for example 'button' or 'controller'), a
+  level, and a text with %-style placeholders plus its values
+- After start(), a message is only added to a queue. The text is put
+  together later, by a background thread that writes the queued messages
+  every flushInterval seconds. A slow terminal only slows that thread.
+- The queue has a fixed size (maxQueued). When it is full, new messages
+  are dropped and counted instead of using more and more memory.
+- A kind can be rate-limited (at most N messages per second, with a short
+  burst allowed) or sampled (only every Nth message is kept). Messages
+  that are left out are counted too.
+- Every few seconds, and at stop(), the writer reports how many messages
+  of each kind were dropped, e.g.:
+      (log: dropped 153 'button' - rate limit)
+
+Before start() (and after stop()) messages are written straight away, so
+simple scripts and startup messages behave exactly like print().
+
+Example usage:
+--------------
+    from robot import log
+    log.setRateLimit('button', perSecond=20)
+    log.start()
+    log.info('button', 'button %s %s', 'A', 1.0)   # Only queues it
+    log.stop()                                      # Writes what is left
+"""
+
+import collections
+import sys
+import threading
+import time
+
+# Levels (the same numbers as Python's logging module)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+# Messages below this level are ignored
+level = INFO
+
+# How each line is written. Available fields: time, level, kind, text.
+# 'json' writes one JSON object per line instead (for log collectors).
+lineFormat = '{text}'
+
+# Where the lines go (anything with write() and flush()). None means
+# sys.stdout - looked up when writing, so a redirected stdout is followed.
+sink = None
+
+# Most messages waiting in the queue; newer ones are dropped beyond that
+maxQueued = 1000
+
+# How often (seconds) the writer thread writes the queued messages
+flushInterval = 0.05
+
+# How often (seconds) the writer reports dropped messages
+dropReportInterval = 5.0
+
+# Queued messages: (time, level, kind, text, args). deque.append() and
+# popleft() are safe to use from different threads without a lock.
+queue = collections.deque()
+
+# True while the writer thread is running
+running = False
+writerThread = None
+stopEvent = threading.Event()
+
+# Rate limits and sampling, by kind (see setRateLimit() and setSampling())
+limits = {}
+
+# Dropped messages: {(kind, reason): count}, reason 'full', 'rate' or 'sample'
+dropped = collections.Counter()
+
+# Dropped messages not reported yet, same form as 'dropped'
+unreported = collections.Counter()
+
+
+class RateLimit:
+    """
+    Token bucket: allows perSecond messages on average, and short bursts.
+
+    Also does sampling: with sampleEvery N, only every Nth message passes.
+    """
+
+    def __init__(self, perSecond=None, burst=None, sampleEvery=1):
+        self.perSecond = perSecond
+        self.burst = burst if burst is not None else perSecond
+        self.tokens = self.burst
+        self.refilled = time.monotonic()
+        self.sampleEvery = sampleEvery
+        self.seen = 0
+
+    def allow(self):
+        """
+        Decide whether the next message may pass.
+
+        Returns:
+        --------
+        str or None : None if it may pass, else why not ('sample' or 'rate')
+        """
+        if self.sampleEvery > 1:
+            self.seen += 1
+            if self.seen % self.sampleEvery:
+                return 'sample'
+
+        if self.perSecond is None:
+            return None
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.perSecond)
+        self.refilled = now
+        if self.tokens < 1:
+            return 'rate'
+        self.tokens -= 1
+        return None
+
+
+def setRateLimit(kind, perSecond, burst=None):
+    """
+    Allow at most perSecond messages of a kind (None removes the limit).
+
+    Parameters:
+    -----------
+    kind : str
+        Message kind, e.g. 'button'
+    perSecond : float or None
+        Average messages per second that are kept
+    burst : float, optional
+        How many may come at once after a quiet time (default perSecond)
+    """
+    limit = limits.get(kind)
+    sampleEvery = limit.sampleEvery if limit is not None else 1
+    limits[kind] = RateLimit(perSecond, burst, sampleEvery)
+
+
+def setSampling(kind, every):
+    """
+    Keep only every Nth message of a kind (1 keeps all).
+    """
+    limit = limits.get(kind)
+    if limit is None:
+        limits[kind] = RateLimit(sampleEvery=every)
+    else:
+        limit.sampleEvery = every
+
+
+def drop(kind, reason):
+    dropped[kind, reason] += 1
+    unreported[kind, reason] += 1
+
+
+def message(messageLevel, kind, text, *args):
+    """
+    Log a message.
+
+    Parameters:
+    -----------
+    messageLevel : int
+        DEBUG, INFO, WARNING or ERROR
+    kind : str
+        What the message is about, for rate limits and drop counts
+    text : str
+        The message, with %-style placeholders for args (e.g. 'speed %.2f').
+        It is only put together when the message is written.
+    *args :
+        Values for the placeholders
+    """
+    if messageLevel < level:
+        return
+
+    limit = limits.get(kind)
+    if limit is not None:
+        reason = limit.allow()
+        if reason is not None:
+            drop(kind, reason)
+            return
+
+    if not running:
+        writeLines([(time.time(), messageLevel, kind, text, args)])
+        return
+
+    if len(queue) >= maxQueued:
+        drop(kind, 'full')
+        return
+    queue.append((time.time(), messageLevel, kind, text, args))
+
+
+def debug(kind, text, *args):
+    message(DEBUG, kind, text, *args)
+
+
+def info(kind, text, *args):
+    message(INFO, kind, text, *args)
+
+
+def warning(kind, text, *args):
+    message(WARNING, kind, text, *args)
+
+
+def error(kind, text, *args):
+    message(ERROR, kind, text, *args)
+
+
+def formatLine(entry):
+    """
+    Turn a queued message into the line to write (without the newline).
+    """
+    stamp, messageLevel, kind, text, args = entry
+    if args:
+        try:
+            text = text % args
+        except (TypeError, ValueError) as problem:
+            text = f'{text} {args!r} (log format error: {problem})'
+
+    if lineFormat == 'json':
+        import json  # Only needed for this format
+        return json.dumps({'time': stamp, 'level': LEVEL_NAMES.get(messageLevel, messageLevel),
+                           'kind': kind, 'text': text})
+    clock = time.strftime('%H:%M:%S', time.localtime(stamp)) + f'.{int(stamp % 1 * 1000):03d}'
+    return lineFormat.format(time=clock, level=LEVEL_NAMES.get(messageLevel, messageLevel),
+                             kind=kind, text=text)
+
+
+def writeLines(entries):
+    """
+    Write messages to the sink, then flush it once.
+    """
+    out = sink if sink is not None else sys.stdout
+    out.write(''.join(formatLine(entry) + '\n' for entry in entries))
+    out.flush()
+
+
+def reportDrops():
+    """
+    Write (and forget) the counts of messages dropped since the last report.
+    """
+    if not unreported:
+        return
+    # Take each count out with one pop(): a drop counted while this runs
+    # stays in unreported for the next report instead of being cleared away
+    counts = {key: unreported.pop(key) for key in list(unreported)}
+    reasons = {'full': 'queue full', 'rate': 'rate limit', 'sample': 'sampling'}
+    lines = [(time.time(), WARNING, 'log', "(log: dropped %d '%s' - %s)", (count, kind, reasons[reason]))
+             for (kind, reason), count in sorted(counts.items())]
+    writeLines(lines)
+
+
+def drain():
+    """
+    Write every queued message (in batches), then report drops if due.
+    """
+    batch = []
+    while queue:
+        batch.append(queue.popleft())
+        if len(batch) == 100:
+            writeLines(batch)
+            batch = []
+    if batch:
+        writeLines(batch)
+
+
+def writerLoop():
+    """
+    The writer thread: write the queue every flushInterval seconds.
+    """
+    lastReport = time.monotonic()
+    while not stopEvent.wait(flushInterval):
+        try:
+            drain()
+            if time.monotonic() - lastReport >= dropReportInterval:
+                reportDrops()
+                lastReport = time.monotonic()
+        except (OSError, ValueError):
+            # The sink is gone (e.g. a closed terminal): throw the messages
+            # away rather than let them fill the queue
+            queue.clear()
+
+
+def start():
+    """
+    Queue messages from now on, and start the writer thread.
+
+    Returns:
+    --------
+    threading.Thread : The writer thread
+    """
+    global running, writerThread
+    if running:
+        return writerThread
+    stopEvent.clear()
+    writerThread = threading.Thread(target=writerLoop, name='log-writer', daemon=True)
+    writerThread.start()
+    running = True
+    return writerThread
+
+
+def stop():
+    """
+    Stop the writer thread, write what is still queued and report drops.
+
+    Messages are written straight away again afterwards.
+    """
+    global running, writerThread
+    if not running:
+        return
+    running = False
+    stopEvent.set()
+    writerThread.join()
+    writerThread = None
+    drain()
+    reportDrops()
+
+
+def getDropStats():
+    """
+    Get the number of dropped messages per kind and reason.
+
+    Returns:
+    --------
+    dict : {(kind, reason): count}
+    """
+    return dict(dropped)
+
+
+def reset():
+    """
+    Forget rate limits, sampling and drop counts.
+    """
+    limits.clear()
+    dropped.clear()
+    unreported.clear()
@@ -32,7 +32,10 @@ Key Concepts:
 - Normalization: Scaling values so motors don't exceed 100% power
 """
 
-from .motor import moveMotor1, moveMotor2, moveMotor3, moveMotor4
+import sys
+from . import motor
+from . import latency
+from . import metrics
 
 # Base movement vectors for mecanum wheels
 # Each vector shows how the 4 motors should spin for that movement
@@ -43,6 +46,10 @@ forwardVec = [1, 1, 1, 1]      # All wheels spin forward
 leftVec = [-1, 1, 1, -1]       # Front-left & back-right backward, others forward
 turnVec = [-1, -1, 1, 1]       # Left side backward, right side forward
 
+# Optional lookup table used instead of makeMotorVector() while driving.
+# None means "calculate every time". See enableMotorTable().
+motorTable = None
+
 
 def driveMotors(powerVec):
     """
@@ -59,10 +66,16 @@ def driveMotors(powerVec):
     driveMotors([1.0, 1.0, 1.0, 1.0])  # Full speed forward
     driveMotors([0, 0, 0, 0])           # Stop all motors
     """
-    moveMotor1(powerVec[0])
-    moveMotor2(powerVec[1])
-    moveMotor3(powerVec[2])
-    moveMotor4(powerVec[3])
+    # One call updates every motor (see motor.MotorBank.apply)
+    motor.bank.apply(powerVec)
+    
+    if metrics.enabled:
+        # Served as robot_motor_power (see robot.metrics)
+        metrics.motorPower.setAll(powerVec)
+    
+    if latency.enabled:
+        # Record how long the input behind this update waited (see robot.latency)
+        latency.motorsWritten()
 
 
 def stopMotors():
@@ -159,9 +172,315 @@ def makeMotorVector(forward, left, turn):
     makeMotorVector(0.5, 0.5, 0)  # Move forward-left diagonal
     makeMotorVector(0.7, 0, 0.3)  # Move forward while turning left
     """
+    # Same math as combinePower(), but the divisor is only calculated once
+    # for all four motors instead of once per motor
+    divisor = max(abs(forward) + abs(left) + abs(turn), 1)
+    
     return [
-        combinePower(0, forward, left, turn),  # Motor 1 (Front-Left)
-        combinePower(1, forward, left, turn),  # Motor 2 (Back-Left)
-        combinePower(2, forward, left, turn),  # Motor 3 (Front-Right)
-        combinePower(3, forward, left, turn),  # Motor 4 (Back-Right)
+        (forwardVec[0] * forward + leftVec[0] * left + turnVec[0] * turn) / divisor,  # Motor 1 (Front-Left)
+        (forwardVec[1] * forward + leftVec[1] * left + turnVec[1] * turn) / divisor,  # Motor 2 (Back-Left)
+        (forwardVec[2] * forward + leftVec[2] * left + turnVec[2] * turn) / divisor,  # Motor 3 (Front-Right)
+        (forwardVec[3] * forward + leftVec[3] * left + turnVec[3] * turn) / divisor,  # Motor 4 (Back-Right)
     ]
+
+
+def makeMotorVectorInto(buffer, forward, left, turn):
+    """
+    Same as makeMotorVector(), but writes the result into an existing buffer.
+    
+    makeMotorVector() builds a new list for every call. When the motors
+    are updated hundreds of times per second, those lists keep Python's
+    memory allocator and garbage collector busy. Reusing one buffer - best
+    an array('d'), which stores plain numbers instead of float objects -
+    avoids that.
+    
+    Parameters:
+    -----------
+    buffer : array('d') or list
+        At least 4 elements; elements 0-3 are overwritten
+    forward, left, turn : float
+        Movement commands, same as makeMotorVector()
+        
+    Returns:
+    --------
+    The same buffer, holding [Motor1_power, Motor2_power, Motor3_power, Motor4_power]
+    
+    Example:
+    --------
+    from array import array
+    powers = array('d', [0.0] * 4)      # Create once
+    makeMotorVectorInto(powers, 1, 0, 0)
+    driveMotors(powers)
+    """
+    divisor = max(abs(forward) + abs(left) + abs(turn), 1)
+    
+    buffer[0] = (forwardVec[0] * forward + leftVec[0] * left + turnVec[0] * turn) / divisor
+    buffer[1] = (forwardVec[1] * forward + leftVec[1] * left + turnVec[1] * turn) / divisor
+    buffer[2] = (forwardVec[2] * forward + leftVec[2] * left + turnVec[2] * turn) / divisor
+    buffer[3] = (forwardVec[3] * forward + leftVec[3] * left + turnVec[3] * turn) / divisor
+    return buffer
+
+
+def makeMotorMatrix(commands):
+    """
+    Create motor power vectors for many movement commands at once.
+    
+    This is the batch version of makeMotorVector(), for tools that need to
+    evaluate thousands of commands (path previews, calibration sweeps).
+    It uses NumPy to process all commands in one pass instead of a Python
+    loop, which is much faster for large batches.
+    
+    Parameters:
+    -----------
+    commands : array-like, shape (N, 3)
+        One row per command: [forward, left, turn]
+        
+    Returns:
+    --------
+    numpy.ndarray, shape (N, 4) : One row per command:
+        [Motor1_power, Motor2_power, Motor3_power, Motor4_power]
+        Row i gives exactly the same numbers as makeMotorVector(*commands[i])
+        
+    Example:
+    --------
+    makeMotorMatrix([[1, 0, 0],
+                     [0.5, 0.5, 0]])
+    # -> array([[1., 1., 1., 1.],
+    #           [0., 1., 1., 0.]])
+    
+    Requires NumPy (pip install numpy).
+    """
+    # NumPy is only needed here (many commands at once), so it is imported
+    # here too: the robot itself runs fine without it, and importing this
+    # module stays fast
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError('makeMotorMatrix() needs NumPy: pip install numpy') from None
+    
+    commands = np.asarray(commands, dtype=float)
+    if commands.ndim != 2 or commands.shape[1] != 3:
+        raise ValueError(f'commands must have shape (N, 3), got {commands.shape}')
+    
+    # Split into columns shaped (N, 1) so they combine with the 4 base values
+    forward = commands[:, 0:1]
+    left = commands[:, 1:2]
+    turn = commands[:, 2:3]
+    
+    # Same operations in the same order as makeMotorVector(), so the
+    # results match it exactly (not just approximately)
+    divisor = np.maximum(np.abs(forward) + np.abs(left) + np.abs(turn), 1)
+    combined = (np.array(forwardVec) * forward +
+                np.array(leftVec) * left +
+                np.array(turnVec) * turn)
+    
+    return combined / divisor
+
+
+class MotorVectorTable:
+    """
+    A precomputed table of motor vectors for quantized stick inputs.
+    
+    Instead of running the mecanum math for every stick movement, we run
+    it ONCE for every combination of (forward, left, turn) levels and store
+    the results. Looking up a motor vector is then just turning the three
+    inputs into a table position.
+    
+    Each axis is split into a number of evenly spaced levels from -1.0 to
+    1.0. With 41 levels per axis the step is 0.05, which is finer than the
+    ±0.1 motor deadzone. Use an odd number of levels so that 0.0 is exactly
+    one of them (a centered stick gives exactly zero power).
+    
+    Parameters:
+    -----------
+    forwardSteps, leftSteps, turnSteps : int
+        Number of levels for each axis (at least 2). The table holds
+        forwardSteps * leftSteps * turnSteps vectors, so memory grows
+        quickly: 41 levels -> 68,921 vectors, 101 levels -> 1,030,301.
+        
+    Example:
+    --------
+    table = MotorVectorTable(41, 41, 41)
+    table.lookup(0.5, 0.5, 0)    # Same as makeMotorVector(0.5, 0.5, 0)
+    table.memorySize()           # Bytes used by the table
+    table.verify()               # Worst-case error vs makeMotorVector()
+    """
+    
+    def __init__(self, forwardSteps=41, leftSteps=41, turnSteps=41):
+        for steps in (forwardSteps, leftSteps, turnSteps):
+            if steps < 2:
+                raise ValueError(f'Each axis needs at least 2 levels, got {steps}')
+        
+        self.forwardSteps = forwardSteps
+        self.leftSteps = leftSteps
+        self.turnSteps = turnSteps
+        
+        # Multiply an input (-1.0 to 1.0, shifted to 0.0 to 2.0) by these
+        # to get its level number (0 to steps-1)
+        self.forwardScale = (forwardSteps - 1) / 2
+        self.leftScale = (leftSteps - 1) / 2
+        self.turnScale = (turnSteps - 1) / 2
+        
+        # Many motor powers repeat (0.0, 1.0, 0.5, ...). Sharing one float
+        # object per distinct value keeps the table much smaller.
+        shared = {}
+        
+        # One flat list, ordered forward-major: position of (f, l, t) is
+        # (f * leftSteps + l) * turnSteps + t
+        self.vectors = []
+        for f in range(forwardSteps):
+            forward = f / self.forwardScale - 1
+            for l in range(leftSteps):
+                left = l / self.leftScale - 1
+                for t in range(turnSteps):
+                    turn = t / self.turnScale - 1
+                    vec = makeMotorVector(forward, left, turn)
+                    self.vectors.append(tuple(shared.setdefault(v, v) for v in vec))
+    
+    def lookup(self, forward, left, turn):
+        """
+        Get the motor vector for a movement command from the table.
+        
+        Each input is rounded to the nearest level; values outside -1.0 to
+        1.0 are treated as -1.0 or 1.0.
+        
+        Parameters:
+        -----------
+        forward, left, turn : float
+            Movement commands, same as makeMotorVector()
+            
+        Returns:
+        --------
+        tuple : (Motor1_power, Motor2_power, Motor3_power, Motor4_power)
+                The tuple is shared by the table - do not try to change it
+        """
+        # int(x + 0.5) rounds to the nearest level for x >= 0
+        f = int((forward + 1) * self.forwardScale + 0.5)
+        l = int((left + 1) * self.leftScale + 0.5)
+        t = int((turn + 1) * self.turnScale + 0.5)
+        
+        # Keep the levels inside the table
+        f = 0 if f < 0 else self.forwardSteps - 1 if f >= self.forwardSteps else f
+        l = 0 if l < 0 else self.leftSteps - 1 if l >= self.leftSteps else l
+        t = 0 if t < 0 else self.turnSteps - 1 if t >= self.turnSteps else t
+        
+        return self.vectors[(f * self.leftSteps + l) * self.turnSteps + t]
+    
+    def memorySize(self):
+        """
+        Count the memory used by the table.
+        
+        Returns:
+        --------
+        int : Bytes used by the list, the tuples and the (shared) floats
+        """
+        size = sys.getsizeof(self.vectors)
+        floats = {}
+        for vec in self.vectors:
+            size += sys.getsizeof(vec)
+            for value in vec:
+                floats[id(value)] = value
+        size += sum(sys.getsizeof(value) for value in floats.values())
+        return size
+    
+    def verify(self, samplesPerAxis=51):
+        """
+        Check how far the table can be from the exact calculation.
+        
+        Compares lookup() with makeMotorVector() on an even grid of
+        samplesPerAxis values per axis and reports the largest difference
+        in any single motor power.
+        
+        Parameters:
+        -----------
+        samplesPerAxis : int
+            Grid size per axis. Pick a number that does NOT line up with
+            the table levels (the default 51 vs 41 levels) so that inputs
+            between levels are tested too.
+            
+        Returns:
+        --------
+        dict : {'maxError': largest difference (0.0 to 2.0),
+                'worstInput': (forward, left, turn) where it happened,
+                'samples': number of inputs checked}
+        """
+        maxError = 0.0
+        worstInput = (0.0, 0.0, 0.0)
+        grid = [2 * i / (samplesPerAxis - 1) - 1 for i in range(samplesPerAxis)]
+        
+        for forward in grid:
+            for left in grid:
+                for turn in grid:
+                    exact = makeMotorVector(forward, left, turn)
+                    table = self.lookup(forward, left, turn)
+                    for i in range(4):
+                        error = abs(exact[i] - table[i])
+                        if error > maxError:
+                            maxError = error
+                            worstInput = (forward, left, turn)
+        
+        return {'maxError': maxError, 'worstInput': worstInput,
+                'samples': samplesPerAxis ** 3}
+
+
+def enableMotorTable(forwardSteps=41, leftSteps=41, turnSteps=41):
+    """
+    Build a MotorVectorTable and use it for driving.
+    
+    After this, motorVector() (used by the drive program) looks motor
+    vectors up in the table instead of calculating them.
+    
+    Parameters:
+    -----------
+    forwardSteps, leftSteps, turnSteps : int
+        Levels per axis, see MotorVectorTable
+        
+    Returns:
+    --------
+    MotorVectorTable : The new table
+    """
+    global motorTable
+    motorTable = MotorVectorTable(forwardSteps, leftSteps, turnSteps)
+    return motorTable
+
+
+def disableMotorTable():
+    """
+    Stop using the lookup table - go back to calculating every vector.
+    """
+    global motorTable
+    motorTable = None
+
+
+def motorVector(forward, left, turn):
+    """
+    Get the motor vector for a movement command, using the table if enabled.
+    
+    Parameters:
+    -----------
+    forward, left, turn : float
+        Movement commands, same as makeMotorVector()
+        
+    Returns:
+    --------
+    list or tuple : 4 motor powers (a tuple when it comes from the table)
+    """
+    if motorTable is not None:
+        return motorTable.lookup(forward, left, turn)
+    return makeMotorVector(forward, left, turn)
+
+
+def motorVectorInto(buffer, forward, left, turn):
+    """
+    Same as motorVector(), but writes the result into an existing buffer.
+    
+    See makeMotorVectorInto() for why.
+    
+    Returns:
+    --------
+    The same buffer, holding the 4 motor powers
+    """
+    if motorTable is not None:
+        buffer[0], buffer[1], buffer[2], buffer[3] = motorTable.lookup(forward, left, turn)
+        return buffer
+    return makeMotorVectorInto(buffer, forward, left, turn)
@@ -0,0 +1,408 @@
+"""
+Runtime Metrics
+===============
+This module counts what the drive pipeline does and serves the numbers
+over HTTP, so the health of several robots can be checked (or collected
+by Prometheus) without logging in to each one.
+
+What is measured:
+-----------------
+- robot_controller_events_total      Events read, by type (key/abs/syn/other)
+- robot_frames_dispatched_total      Frames handed to onFrame()
+- robot_frame_changes                Changes per frame (histogram)
+- robot_set_motors_total             setMotors() calls
+- robot_duty_writes_total            PWM duty writes, issued or elided (cached)
+- robot_motor_power                  Current power of each motor (-1 to 1)
+- robot_controller_disconnects_total How often the controller was lost
+- robot_controller_reconnect_seconds_total   Time spent reconnecting
+- robot_controller_connected         1 while a controller is connected
+- robot_log_dropped_total            Log messages left out, by reason (robot.log)
+
+Keeping it cheap:
+-----------------
+Every metric keeps its numbers in an array created when the metric is
+created ("preallocated slots"), one slot per label value. Counting is one
+addition into that array - no dictionary, no string, no lock. The drive
+code only counts while 'enabled' is True (like robot.latency), so a robot
+without metrics pays one boolean check.
+
+Numbers the package already keeps (duty write counters, connection
+statistics) are not counted twice: "collectors" copy them into the
+metrics when a scrape asks for them.
+
+A scrape runs in the server's own thread and only READS the arrays; it
+never takes a lock that the control path waits for. (A single value may
+be one update behind - that is fine for monitoring.)
+
+Example usage:
+--------------
+    from robot import metrics
+    metrics.enable()
+    server = metrics.serve(9105)          # http://127.0.0.1:9105/metrics
+    ...
+    metrics.stopServing()
+
+The server listens on 127.0.0.1 only. To scrape from another machine set
+ROBOT_METRICS_HOST=0.0.0.0 (or pass host= to serve()).
+"""
+
+import bisect
+import os
+import threading
+from array import array
+
+# Counting switched on/off. Checked on every event - keep it a plain bool.
+enabled = False
+
+# Where serve() listens by default
+DEFAULT_PORT = 9105
+DEFAULT_HOST = os.environ.get('ROBOT_METRICS_HOST', '127.0.0.1')
+
+# Every metric, in the order they are served
+registry = []
+
+# Functions called before every scrape, to copy existing counters in
+collectors = []
+
+# The running HTTP server and its thread (see serve())
+server = None
+serverThread = None
+
+
+def formatValue(value):
+    """
+    Write a number the way the Prometheus text format expects it.
+    """
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    if value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """
+    Base class: a named value, or one value per label value.
+
+    Parameters:
+    -----------
+    name : str
+        Metric name, e.g. 'robot_set_motors_total'
+    help : str
+        One-line description (served as # HELP)
+    label : str, optional
+        Label name, e.g. 'type'
+    labelValues : sequence of str
+        Every value the label can have. One slot is created for each;
+        slot 0 is the first value.
+
+    Attributes:
+    -----------
+    values : array of float
+        The slots. Code that counts very often may use values[slot] += 1
+        directly.
+    """
+    kind = 'untyped'
+
+    def __init__(self, name, help, label=None, labelValues=()):
+        if label is not None and not labelValues:
+            raise ValueError(f'{name}: a label needs its list of values')
+        self.name = name
+        self.help = help
+        self.label = label
+        self.labelValues = tuple(labelValues)
+        self.values = array('d', [0.0] * max(1, len(self.labelValues)))
+
+    def slot(self, labelValue):
+        """
+        Find the slot of a label value (do this once, not per update).
+        """
+        return self.labelValues.index(labelValue)
+
+    def set(self, value, slot=0):
+        self.values[slot] = value
+
+    def reset(self):
+        for slot in range(len(self.values)):
+            self.values[slot] = 0.0
+
+    def render(self, lines):
+        """
+        Add this metric's lines in the Prometheus text format.
+        """
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} {self.kind}')
+        if self.label is None:
+            lines.append(f'{self.name} {formatValue(self.values[0])}')
+        else:
+            for labelValue, value in zip(self.labelValues, self.values):
+                lines.append(f'{self.name}{{{self.label}="{labelValue}"}} {formatValue(value)}')
+
+
+class Counter(Metric):
+    """
+    A total that only goes up (events, calls, writes).
+
+    set() is for collectors that copy a total kept elsewhere.
+    """
+    kind = 'counter'
+
+    def inc(self, slot=0, amount=1.0):
+        self.values[slot] += amount
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down (a motor power, a connection state).
+    """
+    kind = 'gauge'
+
+    def setAll(self, values):
+        """
+        Set every slot from a sequence, in slot order (e.g. a motor vector).
+        """
+        slots = self.values
+        for slot in range(len(slots)):
+            slots[slot] = values[slot]
+
+
+class Histogram(Metric):
+    """
+    Counts how many observations fall at or below each bound.
+
+    Parameters:
+    -----------
+    name, help :
+        See Metric
+    bounds : sequence of float
+        Upper bounds of the buckets, ascending. A last bucket for
+        everything larger (+Inf) is added automatically.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help, bounds):
+        super().__init__(name, help)
+        self.bounds = tuple(bounds)
+        if list(self.bounds) != sorted(self.bounds):
+            raise ValueError(f'{name}: bounds must be ascending')
+        self.counts = array('d', [0.0] * (len(self.bounds) + 1))
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # bisect_left: a value equal to a bound belongs in that bound's bucket ("le")
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def reset(self):
+        for index in range(len(self.counts)):
+            self.counts[index] = 0.0
+        self.total = 0.0
+        self.count = 0
+
+    def render(self, lines):
+        lines.append(f'# HELP {self.name} {self.help}')
+        lines.append(f'# TYPE {self.name} histogram')
+        cumulative = 0.0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{formatValue(float(bound))}"}} '
+                         f'{formatValue(cumulative)}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {formatValue(float(self.count))}')
+        lines.append(f'{self.name}_sum {formatValue(float(self.total))}')
+        lines.append(f'{self.name}_count {self.count}')
+
+
+def register(metric):
+    """
+    Add a metric to the registry (it is then served) and return it.
+    """
+    if any(existing.name == metric.name for existing in registry):
+        raise ValueError(f"A metric named '{metric.name}' already exists")
+    registry.append(metric)
+    return metric
+
+
+def addCollector(function):
+    """
+    Call a function (with no arguments) before every scrape.
+    """
+    collectors.append(function)
+    return function
+
+
+def render():
+    """
+    Run the collectors and describe every metric.
+
+    Returns:
+    --------
+    str : The Prometheus text format ("exposition format")
+    """
+    for collect in collectors:
+        collect()
+    lines = []
+    for metric in registry:
+        metric.render(lines)
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def enable():
+    """
+    Start counting in the drive pipeline.
+    """
+    global enabled
+    enabled = True
+
+
+def disable():
+    """
+    Stop counting (the numbers so far are kept).
+    """
+    global enabled
+    enabled = False
+
+
+def reset():
+    """
+    Set every metric back to zero.
+    """
+    for metric in registry:
+        metric.reset()
+
+
+# The drive pipeline's metrics
+# ----------------------------
+# Event types have their own slots; everything else shares 'other'
+EVENT_TYPE_SLOTS = {0: 0, 1: 1, 3: 2}   # EV_SYN, EV_KEY, EV_ABS
+OTHER_EVENT_SLOT = 3
+
+eventsRead = register(Counter('robot_controller_events_total',
+                              'Controller events read, by event type.',
+                              'type', ('syn', 'key', 'abs', 'other')))
+framesDispatched = register(Counter('robot_frames_dispatched_total',
+                                    'Controller frames handed to the frame callback.'))
+frameChanges = register(Histogram('robot_frame_changes',
+                                  'Stick and button changes per dispatched frame.',
+                                  (1, 2, 3, 4, 6, 8)))
+setMotorsCalls = register(Counter('robot_set_motors_total',
+                                  'Motor power recalculations (drive.setMotors calls).'))
+dutyWrites = register(Counter('robot_duty_writes_total',
+                              'PWM duty cycle writes, issued to the hardware or elided '
+                              'because the value was unchanged.',
+                              'result', ('issued', 'elided')))
+motorPower = register(Gauge('robot_motor_power',
+                            'Power last sent to each motor (-1 to 1).',
+                            'motor', ('1', '2', '3', '4')))
+disconnects = register(Counter('robot_controller_disconnects_total',
+                               'Times the controller was lost while driving.'))
+reconnectSeconds = register(Counter('robot_controller_reconnect_seconds_total',
+                                    'Time spent waiting for a lost controller to come back.'))
+connected = register(Gauge('robot_controller_connected',
+                           '1 while a controller is connected, else 0.'))
+logDropped = register(Counter('robot_log_dropped_total',
+                              'Log messages left out: queue full, rate limit or sampling.',
+                              'reason', ('full', 'rate', 'sample')))
+
+
+def countEvent(eventType):
+    """
+    Count one controller event (called by the controller loops when enabled).
+    """
+    eventsRead.values[EVENT_TYPE_SLOTS.get(eventType, OTHER_EVENT_SLOT)] += 1
+
+
+def countFrame(frame):
+    """
+    Count one dispatched frame and its size (called when enabled).
+    """
+    framesDispatched.values[0] += 1
+    frameChanges.observe(len(frame))
+
+
+@addCollector
+def collectPipeline():
+    """
+    Copy the counters the motor and controller modules already keep.
+    """
+    # Imported here: these modules import this one
+    from . import controller, log, motor
+
+    dutyWrites.values[0] = motor.dutyWritesIssued
+    dutyWrites.values[1] = motor.dutyWritesSkipped
+    disconnects.values[0] = controller.disconnectCount
+    reconnectSeconds.values[0] = controller.totalReconnectSeconds
+    connected.values[0] = 0.0 if controller.controller is None else 1.0
+
+    # (list() copies the counts in one step, while other threads may add more)
+    totals = [0.0] * len(logDropped.values)
+    for (kind, reason), count in list(log.dropped.items()):
+        totals[logDropped.slot(reason)] += count
+    for slot, total in enumerate(totals):
+        logDropped.values[slot] = total
+
+
+def serve(port=DEFAULT_PORT, host=DEFAULT_HOST):
+    """
+    Serve the metrics over HTTP from a background (daemon) thread.
+
+    GET /metrics returns render(); every other path returns 404.
+
+    Parameters:
+    -----------
+    port : int
+        TCP port (0 lets the system choose a free one - see the returned
+        server's server_address)
+    host : str
+        Address to listen on (default 127.0.0.1: this computer only)
+
+    Returns:
+    --------
+    http.server.HTTPServer : The running server
+    """
+    global server, serverThread
+
+    # Imported here: programs that never serve metrics do not load them
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    if server is not None:
+        raise RuntimeError('The metrics server is already running')
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # No line on the console for every scrape
+
+    server = HTTPServer((host, port), MetricsHandler)
+    serverThread = threading.Thread(target=server.serve_forever, name='metrics-server',
+                                    daemon=True)
+    serverThread.start()
+    return server
+
+
+def stopServing():
+    """
+    Stop the HTTP server (if it is running) and wait for its thread.
+    """
+    global server, serverThread
+    if server is None:
+        return
+    server.shutdown()
+    server.server_close()
+    serverThread.join()
+    server = None
+    serverThread = None
@@ -0,0 +1,474 @@
+"""
+Motion Scripts
+==============
+This module plays scripted maneuvers: "drive forward for 2 seconds, speed
+up while strafing left, turn on the spot..." - with exact timing.
+
+Why not driveMotors() and time.sleep()?
+----------------------------------------
+A loop of driveMotors(); time.sleep(2) drifts: every sleep wakes up a bit
+late, and the delays add up over a long script. It also cannot change the
+speed smoothly, and the program can do nothing else while it sleeps.
+
+How it works:
+-------------
+1. Describe the maneuver as segments:
+   - Hold: keep one (forward, left, turn) command for a while
+   - Ramp: change smoothly from one command to another
+   - Trapezoid: speed up, cruise, slow down again ("trapezoidal profile")
+2. compileScript() works out the motor vector for every control step in
+   advance (e.g. 100 per second) and stores them in one array. Playing
+   the script then does no math at all.
+3. play() writes step N at the absolute time start + N / rate. A step
+   that starts late does not delay the steps after it, so nothing drifts.
+   Run it in a thread (start()) and the program can do other work.
+4. The report shows the timing error of every segment: how late its
+   steps were, and how far its real duration was from the planned one.
+
+Checking a script without the robot:
+------------------------------------
+preview() plays the script with a virtual clock (sleeping just moves the
+clock forward) and without motors, so a 1 minute script is checked in a
+few milliseconds. validate() lists mistakes (commands outside -1..1,
+ramps longer than their segment) before anything moves.
+
+Example usage:
+--------------
+    from robot.motion import Hold, Ramp, Trapezoid, compileScript
+
+    script = compileScript([
+        Trapezoid(forward=1, duration=3, rampTime=0.5),
+        Hold(duration=0.5),                               # Stand still
+        Ramp(start=(0, 0, 0), end=(0, 0, 1), duration=1),
+    ], rate=100)
+    print(script.preview().formatReport())   # Instant, no motors
+    report = script.play()                   # Real time, drives the motors
+"""
+
+import threading
+import time
+import traceback
+from array import array
+from . import log
+from .mecanum import makeMotorVectorInto, driveMotors
+
+# Control steps per second, unless compileScript() is told otherwise
+DEFAULT_RATE = 100
+
+STOP = (0.0, 0.0, 0.0)
+
+
+def checkCommand(name, command):
+    """
+    List the problems of one (forward, left, turn) command.
+    """
+    if len(command) != 3:
+        return [f'{name}: a command needs (forward, left, turn), got {command!r}']
+    return [f'{name}: {axis} {value} is outside -1..1'
+            for axis, value in zip(('forward', 'left', 'turn'), command)
+            if not -1 <= value <= 1]
+
+
+class Hold:
+    """
+    Keep one movement command for a while.
+
+    Parameters:
+    -----------
+    forward, left, turn : float
+        Movement command (-1.0 to 1.0), like makeMotorVector().
+        All zero (the default) means stand still.
+    duration : float
+        Seconds
+    name : str, optional
+        Label for the report
+    """
+
+    def __init__(self, forward=0.0, left=0.0, turn=0.0, duration=1.0, name=None):
+        self.command = (forward, left, turn)
+        self.duration = duration
+        self.name = name or f'hold {forward:+.2f} {left:+.2f} {turn:+.2f}'
+
+    def commandAt(self, seconds):
+        return self.command
+
+    def problems(self):
+        return checkCommand(self.name, self.command)
+
+
+class Ramp:
+    """
+    Change smoothly (linearly) from one movement command to another.
+
+    Parameters:
+    -----------
+    start, end : tuple (forward, left, turn)
+        Command at the beginning and at the end of the segment
+    duration : float
+        Seconds
+    name : str, optional
+        Label for the report
+    """
+
+    def __init__(self, start=STOP, end=STOP, duration=1.0, name=None):
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self.duration = duration
+        self.name = name or 'ramp'
+
+    def commandAt(self, seconds):
+        share = min(max(seconds / self.duration, 0.0), 1.0) if self.duration > 0 else 1.0
+        return tuple(a + (b - a) * share for a, b in zip(self.start, self.end))
+
+    def problems(self):
+        return checkCommand(self.name, self.start) + checkCommand(self.name, self.end)
+
+
+class Trapezoid:
+    """
+    Speed up, cruise, slow down: a trapezoidal speed profile.
+
+    The command grows from zero to (forward, left, turn) during rampTime,
+    stays there, and shrinks back to zero during the last rampTime - gentle
+    on the wheels and the gears, and the robot does not skid.
+
+        speed
+          |     ___________
+          |    /           \\
+          |___/             \\___ time
+              <-> rampTime
+
+    Parameters:
+    -----------
+    forward, left, turn : float
+        Cruising command (-1.0 to 1.0)
+    duration : float
+        Seconds, including both ramps
+    rampTime : float
+        Seconds to speed up (and again to slow down)
+    name : str, optional
+        Label for the report
+    """
+
+    def __init__(self, forward=0.0, left=0.0, turn=0.0, duration=1.0, rampTime=0.25, name=None):
+        self.command = (forward, left, turn)
+        self.duration = duration
+        self.rampTime = rampTime
+        self.name = name or f'trapezoid {forward:+.2f} {left:+.2f} {turn:+.2f}'
+
+    def commandAt(self, seconds):
+        if self.rampTime <= 0:
+            share = 1.0
+        else:
+            share = min(seconds, self.duration - seconds, self.rampTime) / self.rampTime
+            share = min(max(share, 0.0), 1.0)
+        return tuple(value * share for value in self.command)
+
+    def problems(self):
+        problems = checkCommand(self.name, self.command)
+        if self.rampTime < 0:
+            problems.append(f'{self.name}: rampTime {self.rampTime} is negative')
+        elif 2 * self.rampTime > self.duration:
+            problems.append(f'{self.name}: two ramps of {self.rampTime} s do not fit '
+                            f'in {self.duration} s')
+        return problems
+
+
+def validate(segments, rate=DEFAULT_RATE):
+    """
+    List everything wrong with a script, without compiling it.
+
+    Returns:
+    --------
+    list of str : One line per problem (empty if the script is fine)
+    """
+    problems = []
+    if rate <= 0:
+        problems.append(f'rate must be positive, got {rate}')
+    if not segments:
+        problems.append('the script has no segments')
+    for segment in segments:
+        if segment.duration <= 0:
+            problems.append(f'{segment.name}: duration must be positive, got {segment.duration}')
+        elif rate > 0 and segment.duration * rate < 1:
+            problems.append(f'{segment.name}: {segment.duration} s is shorter than one '
+                            f'control step ({1 / rate} s)')
+        problems.extend(segment.problems())
+    return problems
+
+
+def compileScript(segments, rate=DEFAULT_RATE):
+    """
+    Check a list of segments and work out every motor vector in advance.
+
+    Parameters:
+    -----------
+    segments : list of Hold / Ramp / Trapezoid
+        The maneuver, in order
+    rate : float
+        Control steps per second
+
+    Returns:
+    --------
+    MotionScript : Ready to play()
+
+    Raises:
+    -------
+    ValueError : If validate() finds problems (all of them are listed)
+    """
+    problems = validate(segments, rate)
+    if problems:
+        raise ValueError('Invalid motion script:\n  ' + '\n  '.join(problems))
+
+    period = 1.0 / rate
+    vectors = array('d')
+    table = []       # (name, first step, step count, planned seconds)
+    buffer = array('d', [0.0] * 4)
+    step = 0
+
+    for segment in segments:
+        count = max(1, round(segment.duration * rate))
+        for index in range(count):
+            # Each step's command is the one at the middle of the step
+            makeMotorVectorInto(buffer, *segment.commandAt((index + 0.5) * period))
+            vectors.extend(buffer)
+        table.append((segment.name, step, count, count * period))
+        step += count
+
+    return MotionScript(vectors, table, rate)
+
+
+class VirtualClock:
+    """
+    A clock that only moves when something sleeps - for previews.
+
+    Pass now and sleep to MotionScript.play() instead of the real ones.
+    """
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.time += seconds
+
+
+class MotionScript:
+    """
+    A compiled motion script: one motor vector per control step.
+
+    Made by compileScript(), not directly.
+
+    Attributes:
+    -----------
+    vectors : array('d')
+        4 motor powers per step, all steps one after another
+    segments : list of tuples
+        (name, first step, step count, planned seconds) per segment
+    rate : float
+        Steps per second
+    steps : int
+        Number of steps
+    """
+
+    def __init__(self, vectors, segments, rate):
+        self.vectors = vectors
+        self.segments = segments
+        self.rate = rate
+        self.steps = len(vectors) // 4
+
+    @property
+    def duration(self):
+        """Planned length of the whole script in seconds."""
+        return self.steps / self.rate
+
+    def play(self, output=driveMotors, now=time.monotonic, sleep=time.sleep,
+             stopEvent=None, onSegment=None):
+        """
+        Play the script: write every step at its absolute deadline.
+
+        Parameters:
+        -----------
+        output : function
+            Called with the 4 motor powers of each step (default
+            driveMotors). Called once more with zeros at the end.
+        now, sleep : functions
+            Clock (seconds) and sleep function. Defaults are the real ones;
+            see VirtualClock for previews.
+        stopEvent : threading.Event, optional
+            Set it to stop early (the motors are stopped)
+        onSegment : function, optional
+            Called with the segment name when a segment begins
+
+        Returns:
+        --------
+        PlaybackReport : Timing error of every segment
+        """
+        vectors = self.vectors
+        period = 1.0 / self.rate
+        buffer = array('d', [0.0] * 4)
+        report = PlaybackReport(self)
+        start = now()
+        stopped = False
+
+        try:
+            for name, first, count, planned in self.segments:
+                if onSegment is not None:
+                    onSegment(name)
+                maxLate = 0.0
+                totalLate = 0.0
+                played = 0
+                began = None
+
+                for step in range(first, first + count):
+                    if stopEvent is not None and stopEvent.is_set():
+                        stopped = True
+                        break
+                    due = start + step * period
+                    delay = due - now()
+                    if delay > 0:
+                        sleep(delay)
+                    moment = now()
+                    if began is None:
+                        began = moment
+                    late = moment - due
+                    if late > maxLate:
+                        maxLate = late
+                    totalLate += late
+                    played += 1
+
+                    offset = step * 4
+                    buffer[0] = vectors[offset]
+                    buffer[1] = vectors[offset + 1]
+                    buffer[2] = vectors[offset + 2]
+                    buffer[3] = vectors[offset + 3]
+                    output(buffer)
+
+                if began is not None:
+                    report.addSegment(name, planned, began - (start + first * period),
+                                      maxLate, totalLate / played)
+                if stopped:
+                    break
+
+            if not stopped:
+                # The last step also lasts one period
+                delay = start + self.steps * period - now()
+                if delay > 0:
+                    sleep(delay)
+        finally:
+            # Always stop the motors - also when a step (output, onSegment)
+            # raised, so the robot does not keep driving at the last powers
+            output(array('d', [0.0] * 4))
+        report.finish(now() - start, stopped)
+        return report
+
+    def start(self, output=driveMotors, onSegment=None):
+        """
+        Play the script in a background thread.
+
+        Returns:
+        --------
+        tuple : (thread, stopEvent). Set stopEvent to stop early;
+                thread.report holds the PlaybackReport once it is done, or
+                thread.error the exception that ended the script early.
+        """
+        stopEvent = threading.Event()
+
+        def run():
+            try:
+                thread.report = self.play(output, stopEvent=stopEvent, onSegment=onSegment)
+            except Exception as error:
+                # play() has already stopped the motors
+                thread.error = error
+                log.error('motion', 'Motion script failed:\n%s', traceback.format_exc().rstrip())
+
+        thread = threading.Thread(target=run, name='motion-script', daemon=True)
+        thread.report = None
+        thread.error = None
+        thread.start()
+        return thread, stopEvent
+
+    def preview(self, output=None):
+        """
+        Play the script instantly with a virtual clock and no motors.
+
+        Parameters:
+        -----------
+        output : function, optional
+            Receives every step's motor powers (default: ignore them)
+
+        Returns:
+        --------
+        PlaybackReport : With a virtual clock every error is zero; the
+                         report shows the segments and the planned timing
+        """
+        clock = VirtualClock()
+        return self.play(output or (lambda powers: None), now=clock.now, sleep=clock.sleep)
+
+
+class PlaybackReport:
+    """
+    Timing of one play() of a MotionScript.
+
+    Attributes:
+    -----------
+    segments : list of dict
+        Per segment: name, plannedSeconds, startErrorMs (how late its first
+        step was), maxLateMs and meanLateMs (over all its steps),
+        durationErrorMs (real minus planned duration)
+    elapsed : float
+        Seconds from the first step until the motors were stopped
+    planned : float
+        Planned length of the script in seconds
+    stopped : bool
+        True if the script was stopped early
+    """
+
+    def __init__(self, script):
+        self.segments = []
+        self.planned = script.duration
+        self.elapsed = None
+        self.stopped = False
+
+    def addSegment(self, name, planned, startError, maxLate, meanLate):
+        self.segments.append({
+            'name': name,
+            'plannedSeconds': planned,
+            'startErrorMs': startError * 1000,
+            'maxLateMs': maxLate * 1000,
+            'meanLateMs': meanLate * 1000,
+            'durationErrorMs': 0.0,
+        })
+
+    def finish(self, elapsed, stopped):
+        """
+        Work out every segment's duration error (from the next segment's start).
+        """
+        self.elapsed = elapsed
+        self.stopped = stopped
+        for segment, following in zip(self.segments, self.segments[1:]):
+            segment['durationErrorMs'] = following['startErrorMs'] - segment['startErrorMs']
+        if self.segments and not stopped:
+            last = self.segments[-1]
+            last['durationErrorMs'] = (elapsed - self.planned) * 1000 - last['startErrorMs']
+
+    def formatReport(self):
+        """
+        Describe the timing, one line per segment.
+
+        Returns:
+        --------
+        str : Printable lines
+        """
+        lines = [f"Motion script: {self.planned:.2f} s planned, {self.elapsed:.3f} s played"
+                 + (' (STOPPED EARLY)' if self.stopped else '')]
+        lines.append(f"  {'Segment':<28}{'planned':>9}{'start err':>11}{'max late':>10}"
+                     f"{'mean late':>11}{'duration err':>14}")
+        for segment in self.segments:
+            lines.append(f"  {segment['name'][:27]:<28}{segment['plannedSeconds']:>8.2f}s"
+                         f"{segment['startErrorMs']:>9.3f}ms{segment['maxLateMs']:>8.3f}ms"
+                         f"{segment['meanLateMs']:>9.3f}ms{segment['durationErrorMs']:>12.3f}ms")
+        return '\n'.join(lines)
@@ -15,13 +15,38 @@ Key Concepts:
 - Duty Cycle: Percentage of time power is ON (0-100%). Higher = faster motor speed
 - H-Bridge: Circuit that allows motors to spin both directions
 
+Code Structure:
+- Motor: One motor (a forward and a backward PWM channel)
+- MotorBank: All the motors of a robot, created by initMotors()
+- moveMotor1-4(): Simple functions that control one motor of the bank
+
 Compatibility:
 - Works with both RPi.GPIO (Pi 4 and older) and rpi-lgpio (Pi 5)
 - The import statement works with either library installed
+- Without a Raspberry Pi, set ROBOT_GPIO=sim to use the simulator (see robot.gpio)
 """
 
-import RPi.GPIO as GPIO
 import time
+from .gpio import getGPIO
+from . import log
+
+# Default wiring: (forward pin, backward pin) for Motor 1, 2, 3, 4
+DEFAULT_PINS = [
+    (21, 20),   # Motor 1 (Front-Left)
+    (16, 26),   # Motor 2 (Back-Left)
+    (19, 13),   # Motor 3 (Front-Right)
+    (6, 5),     # Motor 4 (Back-Right)
+]
+
+# Default PWM frequency in Hz (cycles per second)
+DEFAULT_FREQUENCY = 100
+
+# Motor commands between -DEADZONE and DEADZONE turn the motor off
+# (very low duty cycles only make the motor hum without turning it)
+DEADZONE = 0.1
+
+# The MotorBank created by initMotors()
+bank = None
 
 # Global motor PWM objects
 # These will be initialized by initMotors() and used by all motor functions
@@ -34,8 +59,309 @@ motor3_backward = None
 motor4_forward = None
 motor4_backward = None
 
+# Duty cycle write cache
+# Every ChangeDutyCycle() call goes through the GPIO library (and often a
+# lock inside it), even when the new duty is the same as the old one. We
+# remember the last duty written to each PWM channel and skip writes that
+# would not change the output.
+#
+# dutyResolution is the smallest duty step (in percent) the driver can
+# actually produce. Duties are rounded to this step, so two values that
+# round to the same step count as "unchanged". Software PWM at 100 Hz
+# switches in 1 microsecond steps inside a 10 ms period: 0.01%.
+# Set it to 0 to only skip exactly repeated values.
+dutyResolution = 0.01
+
+# Rounding a float with round() creates an int object every time. Adding
+# and subtracting 1.5 * 2**52 rounds to the nearest whole number the same
+# way (halves to even) but stays a float, so quantizing a duty allocates
+# nothing. Exact for numbers below 2**51 - far more than 100 / 0.01.
+ROUNDING_MAGIC = 6755399441055744.0
+
+dutyWritesIssued = 0    # ChangeDutyCycle() calls actually made
+dutyWritesSkipped = 0   # Calls skipped because the duty had not changed
+
+
+class Motor:
+    """
+    One DC motor, driven by two PWM channels of a MotorBank.
+    
+    The motor spins forward when its forward channel has a duty cycle and
+    backward when its backward channel has one. Only one of them is ever on.
+    
+    Attributes:
+    -----------
+    bank : MotorBank
+        The bank that owns the PWM channels
+    channel : int
+        Index of the forward channel in the bank (backward is channel + 1)
+    forwardPin, backwardPin : int
+        GPIO pin numbers (for reference)
+    """
+    
+    # __slots__ fixes the attribute list: smaller objects, faster lookups
+    __slots__ = ('bank', 'channel', 'forwardPin', 'backwardPin')
+
+    def __init__(self, bank, channel, forwardPin, backwardPin):
+        self.bank = bank
+        self.channel = channel
+        self.forwardPin = forwardPin
+        self.backwardPin = backwardPin
+
+    def move(self, amount):
+        """
+        Set the motor's speed and direction.
+        
+        Parameters:
+        -----------
+        amount : float
+            Speed and direction: -1.0 (full backward) to 1.0 (full forward)
+            0 = stopped
+        
+        How it works:
+        -------------
+        - Positive values: Set forward pin to PWM, backward pin to 0
+        - Negative values: Set backward pin to PWM, forward pin to 0
+        - Values near zero (±0.1): Turn off both pins (deadzone prevents motor hum)
+        - Pins that already have the requested duty are not written again
+        """
+        bank = self.bank
+        channel = self.channel
+        
+        if amount > DEADZONE:
+            # Moving forward
+            bank.setChannel(channel, amount * 100)  # Convert 0-1 to 0-100%
+            bank.setChannel(channel + 1, 0)         # Turn off backward
+        elif amount < -DEADZONE:
+            # Moving backward
+            bank.setChannel(channel + 1, -amount * 100)  # Use absolute value
+            bank.setChannel(channel, 0)                  # Turn off forward
+        else:
+            # Stopped (deadzone: -0.1 to 0.1)
+            bank.setChannel(channel, 0)
+            bank.setChannel(channel + 1, 0)
+
+
+class MotorBank:
+    """
+    All the motors of a robot, with their PWM channels.
+    
+    The bank sets up the GPIO pins, creates one PWM channel per pin and
+    keeps everything about the channels in simple lists ("channel tables"),
+    ordered [motor1 forward, motor1 backward, motor2 forward, ...]:
+    
+    - pwms: the PWM objects
+    - writeDuty: each PWM's ChangeDutyCycle method, looked up once
+    - lastDuty: the duty cycle last written (for skipping unchanged writes)
+    
+    apply() can then update every motor in one loop over these lists.
+    
+    Parameters:
+    -----------
+    pins : list of (int, int)
+        (forward pin, backward pin) for each motor, in BCM numbering.
+        Any number of motors is fine - not just 4.
+    frequency : float
+        PWM frequency in Hz
+    GPIO : module, optional
+        GPIO library to use (default: the backend chosen in robot.gpio)
+    
+    Example:
+    --------
+    bank = MotorBank([(21, 20), (16, 26)], frequency=100)   # 2 motors
+    bank.apply([0.5, -0.5])                                  # Spin in place
+    bank.motors[0].move(1.0)                                 # One motor only
+    """
+    
+    __slots__ = ('pins', 'frequency', 'motors', 'pwms', 'writeDuty', 'lastDuty', 'stops',
+                 'stopsSeen')
+
+    def __init__(self, pins=DEFAULT_PINS, frequency=DEFAULT_FREQUENCY, GPIO=None):
+        if GPIO is None:
+            GPIO = getGPIO()
+        
+        self.pins = [tuple(pair) for pair in pins]
+        self.frequency = frequency
+        
+        # Set GPIO numbering mode to BCM (Broadcom chip-specific pin numbers)
+        # This means we use GPIO numbers (like GPIO 21) not physical pin numbers (like Pin 40)
+        GPIO.setmode(GPIO.BCM)
+        
+        # Configure each GPIO pin as an OUTPUT pin
+        for forwardPin, backwardPin in self.pins:
+            GPIO.setup(forwardPin, GPIO.OUT)
+            GPIO.setup(backwardPin, GPIO.OUT)
+        
+        # Create PWM objects for each motor direction
+        # GPIO.PWM(pin, frequency) - frequency is in Hz (cycles per second)
+        self.pwms = []
+        self.motors = []
+        for forwardPin, backwardPin in self.pins:
+            self.motors.append(Motor(self, len(self.pwms), forwardPin, backwardPin))
+            self.pwms.append(GPIO.PWM(forwardPin, frequency))
+            self.pwms.append(GPIO.PWM(backwardPin, frequency))
+        
+        # Start all PWM signals at 0% duty cycle (motors stopped)
+        # .start(duty_cycle) - duty_cycle is 0-100 percentage
+        for pwm in self.pwms:
+            pwm.start(0)
+        
+        self.writeDuty = [pwm.ChangeDutyCycle for pwm in self.pwms]
+        
+        # Every channel now outputs 0% - remember that so the first
+        # "stop" command does not write 0 again
+        self.lastDuty = [0.0] * len(self.pwms)
+        
+        # Emergency stops made by makeStopper(), and how many of them the
+        # duty cache has caught up with (see checkStops())
+        self.stops = 0
+        self.stopsSeen = 0
+
+    def setChannel(self, channel, duty):
+        """
+        Set the duty cycle of one PWM channel, skipping unchanged writes.
+        
+        Parameters:
+        -----------
+        channel : int
+            Index in the channel tables (motor number * 2, +1 for backward)
+        duty : float
+            Duty cycle in percent (0-100)
+        
+        How it works:
+        -------------
+        1. Round the duty to the driver's resolution (dutyResolution)
+        2. If the channel already has that duty, count a skipped write and stop
+        3. Otherwise call ChangeDutyCycle() and remember the new value
+        """
+        global dutyWritesIssued, dutyWritesSkipped
+        
+        if self.stops != self.stopsSeen:
+            self.checkStops()
+        
+        if dutyResolution:
+            duty = (duty / dutyResolution + ROUNDING_MAGIC - ROUNDING_MAGIC) * dutyResolution
+        
+        if self.lastDuty[channel] == duty:
+            dutyWritesSkipped += 1
+            return
+        
+        self.writeDuty[channel](duty)
+        self.lastDuty[channel] = duty
+        dutyWritesIssued += 1
+
+    def apply(self, powerVec):
+        """
+        Set the power of every motor in one call.
+        
+        Does the same as calling motors[i].move(powerVec[i]) for each
+        motor, but in a single loop over the channel tables, which saves
+        most of the Python function-call overhead.
+        
+        Parameters:
+        -----------
+        powerVec : list of floats
+            Power for each motor [-1.0 to 1.0], in motor order.
+            It may be shorter than the number of motors (the rest are
+            left alone).
+        """
+        global dutyWritesIssued, dutyWritesSkipped
+        
+        if self.stops != self.stopsSeen:
+            self.checkStops()
+        
+        step = dutyResolution
+        lastDuty = self.lastDuty
+        writeDuty = self.writeDuty
+        issued = 0
+        channel = 0
+        
+        for amount in powerVec:
+            # Same rules as Motor.move(): one direction on, the other off
+            if amount > DEADZONE:
+                forwardDuty = amount * 100
+                backwardDuty = 0.0
+            elif amount < -DEADZONE:
+                forwardDuty = 0.0
+                backwardDuty = -amount * 100
+            else:
+                forwardDuty = 0.0
+                backwardDuty = 0.0
+            
+            if step:
+                # Same as round(duty / step) * step (see ROUNDING_MAGIC)
+                forwardDuty = (forwardDuty / step + ROUNDING_MAGIC - ROUNDING_MAGIC) * step
+                backwardDuty = (backwardDuty / step + ROUNDING_MAGIC - ROUNDING_MAGIC) * step
+            
+            # Write only the channels that actually change
+            if lastDuty[channel] != forwardDuty:
+                writeDuty[channel](forwardDuty)
+                lastDuty[channel] = forwardDuty
+                issued += 1
+            if lastDuty[channel + 1] != backwardDuty:
+                writeDuty[channel + 1](backwardDuty)
+                lastDuty[channel + 1] = backwardDuty
+                issued += 1
+            
+            channel += 2
+        
+        dutyWritesIssued += issued
+        dutyWritesSkipped += channel - issued
+
+    def stop(self):
+        """
+        Stop all motors.
+        """
+        self.apply([0] * len(self.motors))
+
+    def makeStopper(self):
+        """
+        Create a function that stops all motors as fast as possible.
+        
+        The function writes 0% straight to every PWM channel with the
+        ChangeDutyCycle methods looked up NOW, without the motor logic or
+        the duty cache, so it does as little work as possible when it is
+        needed. It is meant for emergencies (see robot.deadline) and may be
+        called from another thread.
+        
+        Returns:
+        --------
+        function : Call it with no arguments to stop every motor
+        """
+        writers = tuple(self.writeDuty)
+        
+        def stopNow():
+            for write in writers:
+                write(0)
+            # The duty cache no longer knows what the channels output. It is
+            # NOT cleared here: apply() may be halfway through on the control
+            # thread. Counting the stop (after the zeros are written) makes
+            # the next normal update clear it and write every channel again.
+            self.stops += 1
+        
+        return stopNow
+
+    def checkStops(self):
+        """
+        Catch up with emergency stops (called by the writing thread).
+        
+        apply() and setChannel() call this when makeStopper()'s function
+        has stopped the motors since their last write. Forgetting the duty
+        cache then makes sure the motors really get the new values.
+        """
+        self.stopsSeen = self.stops
+        self.resetDutyCache()
+
+    def resetDutyCache(self):
+        """
+        Forget the remembered duty cycles, so the next write to every
+        channel really happens.
+        """
+        for channel in range(len(self.lastDuty)):
+            self.lastDuty[channel] = None
 
-def initMotors():
+
+def initMotors(pins=DEFAULT_PINS, frequency=DEFAULT_FREQUENCY):
     """
     Initialize GPIO pins and create PWM objects for all 4 motors.
     
@@ -43,8 +369,16 @@ def initMotors():
     It sets up the GPIO pins and creates PWM (Pulse Width Modulation) objects
     that allow us to control motor speed and direction.
     
-    GPIO Pin Assignments:
-    ---------------------
+    Parameters:
+    -----------
+    pins : list of (int, int)
+        (forward pin, backward pin) for each motor, in BCM numbering.
+        Default: the wiring below. Robots with more motors can list more.
+    frequency : float
+        PWM frequency in Hz (default 100)
+    
+    GPIO Pin Assignments (default):
+    -------------------------------
     Motor 1 (Front-Left):  GPIO 21 (forward), GPIO 20 (backward)
     Motor 2 (Back-Left):   GPIO 16 (forward), GPIO 26 (backward)
     Motor 3 (Front-Right): GPIO 19 (forward), GPIO 13 (backward)
@@ -53,59 +387,82 @@ def initMotors():
     PWM Frequency: 100 Hz
     - This means the signal switches on/off 100 times per second
     - Higher frequency = smoother motor operation
+    
+    Returns:
+    --------
+    MotorBank : The motors (also stored in the module variable 'bank')
     """
     # Use 'global' keyword to modify the module-level variables
+    global bank
     global motor1_forward, motor1_backward
     global motor2_forward, motor2_backward
     global motor3_forward, motor3_backward
     global motor4_forward, motor4_backward
     
-    print('Initializing motors...')
-    
-    # Set GPIO numbering mode to BCM (Broadcom chip-specific pin numbers)
-    # This means we use GPIO numbers (like GPIO 21) not physical pin numbers (like Pin 40)
-    GPIO.setmode(GPIO.BCM)
-    
-    # Configure each GPIO pin as an OUTPUT pin
-    # Motor 1 pins
-    GPIO.setup(20, GPIO.OUT)  # Motor 1 backward
-    GPIO.setup(21, GPIO.OUT)  # Motor 1 forward
-    
-    # Motor 2 pins
-    GPIO.setup(16, GPIO.OUT)  # Motor 2 forward
-    GPIO.setup(26, GPIO.OUT)  # Motor 2 backward
-    
-    # Motor 3 pins
-    GPIO.setup(19, GPIO.OUT)  # Motor 3 forward
-    GPIO.setup(13, GPIO.OUT)  # Motor 3 backward
-    
-    # Motor 4 pins
-    GPIO.setup(6, GPIO.OUT)   # Motor 4 forward
-    GPIO.setup(5, GPIO.OUT)   # Motor 4 backward
-
-    # Create PWM objects for each motor direction
-    # GPIO.PWM(pin, frequency) - frequency is in Hz (cycles per second)
-    motor1_forward = GPIO.PWM(21, 100)
-    motor1_backward = GPIO.PWM(20, 100)
-    motor2_forward = GPIO.PWM(16, 100)
-    motor2_backward = GPIO.PWM(26, 100)
-    motor3_forward = GPIO.PWM(19, 100)
-    motor3_backward = GPIO.PWM(13, 100)
-    motor4_forward = GPIO.PWM(6, 100)
-    motor4_backward = GPIO.PWM(5, 100)
-
-    # Start all PWM signals at 0% duty cycle (motors stopped)
-    # .start(duty_cycle) - duty_cycle is 0-100 percentage
-    motor1_forward.start(0)
-    motor1_backward.start(0)
-    motor2_forward.start(0)
-    motor2_backward.start(0)
-    motor3_forward.start(0)
-    motor3_backward.start(0)
-    motor4_forward.start(0)
-    motor4_backward.start(0)
-    
-    print('Motors initialized!')
+    log.info('motor', 'Initializing motors...')
+    
+    # Sets up the pins and starts every PWM channel at 0% (motors stopped)
+    bank = MotorBank(pins, frequency)
+    
+    # Keep the old names for the first 4 motors' PWM objects
+    # (older code may use them directly)
+    pwms = bank.pwms + [None] * (8 - len(bank.pwms))
+    (motor1_forward, motor1_backward, motor2_forward, motor2_backward,
+     motor3_forward, motor3_backward, motor4_forward, motor4_backward) = pwms[:8]
+    
+    log.info('motor', 'Motors initialized!')
+    return bank
+
+
+def setDuty(pwm, duty):
+    """
+    Set the duty cycle of one PWM channel, skipping unchanged writes.
+    
+    Parameters:
+    -----------
+    pwm : GPIO.PWM
+        The PWM channel (for example motor1_forward)
+    duty : float
+        Duty cycle in percent (0-100)
+    
+    See MotorBank.setChannel() for how unchanged writes are skipped.
+    """
+    bank.setChannel(bank.pwms.index(pwm), duty)
+
+
+def resetDutyCache():
+    """
+    Forget all remembered duty cycles.
+    
+    The next write on every channel will then always be made.
+    Call this if something other than this module changed the PWM
+    outputs, or after changing dutyResolution.
+    """
+    if bank is not None:
+        bank.resetDutyCache()
+
+
+def getDutyStats():
+    """
+    Get the duty cycle write counters.
+    
+    Useful for measuring how many library calls the cache saves while
+    driving.
+    
+    Returns:
+    --------
+    dict : {'issued': writes made, 'skipped': writes avoided}
+    """
+    return {'issued': dutyWritesIssued, 'skipped': dutyWritesSkipped}
+
+
+def resetDutyStats():
+    """
+    Set the duty cycle write counters back to zero.
+    """
+    global dutyWritesIssued, dutyWritesSkipped
+    dutyWritesIssued = 0
+    dutyWritesSkipped = 0
 
 
 def moveMotor1(amount):
@@ -117,25 +474,11 @@ def moveMotor1(amount):
     amount : float
         Speed and direction: -1.0 (full backward) to 1.0 (full forward)
         0 = stopped
-        
-    How it works:
-    -------------
-    - Positive values: Set forward pin to PWM, backward pin to 0
-    - Negative values: Set backward pin to PWM, forward pin to 0
-    - Values near zero (±0.1): Turn off both pins (deadzone prevents motor hum)
-    """
-    if amount > 0.1:
-        # Moving forward
-        motor1_forward.ChangeDutyCycle(amount * 100)  # Convert 0-1 to 0-100%
-        motor1_backward.ChangeDutyCycle(0)            # Turn off backward
-    elif amount < -0.1:
-        # Moving backward
-        motor1_backward.ChangeDutyCycle(-amount * 100)  # Use absolute value
-        motor1_forward.ChangeDutyCycle(0)               # Turn off forward
-    else:
-        # Stopped (deadzone: -0.1 to 0.1)
-        motor1_forward.ChangeDutyCycle(0)
-        motor1_backward.ChangeDutyCycle(0)
+    
+    This is a shortcut for bank.motors[0].move(amount) - see Motor.move()
+    for how the two PWM pins are set.
+    """
+    bank.motors[0].move(amount)
 
 
 def moveMotor2(amount):
@@ -143,15 +486,7 @@ def moveMotor2(amount):
     Control Motor 2 (Back-Left wheel).
     See moveMotor1() for parameter details.
     """
-    if amount > 0.1:
-        motor2_forward.ChangeDutyCycle(amount * 100)
-        motor2_backward.ChangeDutyCycle(0)
-    elif amount < -0.1:
-        motor2_backward.ChangeDutyCycle(-amount * 100)
-        motor2_forward.ChangeDutyCycle(0)
-    else:
-        motor2_forward.ChangeDutyCycle(0)
-        motor2_backward.ChangeDutyCycle(0)
+    bank.motors[1].move(amount)
 
 
 def moveMotor3(amount):
@@ -159,15 +494,7 @@ def moveMotor3(amount):
     Control Motor 3 (Front-Right wheel).
     See moveMotor1() for parameter details.
     """
-    if amount > 0.1:
-        motor3_forward.ChangeDutyCycle(amount * 100)
-        motor3_backward.ChangeDutyCycle(0)
-    elif amount < -0.1:
-        motor3_backward.ChangeDutyCycle(-amount * 100)
-        motor3_forward.ChangeDutyCycle(0)
-    else:
-        motor3_forward.ChangeDutyCycle(0)
-        motor3_backward.ChangeDutyCycle(0)
+    bank.motors[2].move(amount)
 
 
 def moveMotor4(amount):
@@ -175,15 +502,7 @@ def moveMotor4(amount):
     Control Motor 4 (Back-Right wheel).
     See moveMotor1() for parameter details.
     """
-    if amount > 0.1:
-        motor4_forward.ChangeDutyCycle(amount * 100)
-        motor4_backward.ChangeDutyCycle(0)
-    elif amount < -0.1:
-        motor4_backward.ChangeDutyCycle(-amount * 100)
-        motor4_forward.ChangeDutyCycle(0)
-    else:
-        motor4_forward.ChangeDutyCycle(0)
-        motor4_backward.ChangeDutyCycle(0)
+    bank.motors[3].move(amount)
 
 
 # Legacy functions for simple forward/backward control
@@ -197,12 +516,12 @@ def motorForward(amount):
     -----------
     amount : float
         Speed from 0.0 (stopped) to 1.0 (full speed)
-        
+    
     Note: This is a simple function that only controls Motor 1.
     For full robot control, use moveMotor1-4 or the mecanum module.
     """
-    motor1_backward.ChangeDutyCycle(0)
-    motor1_forward.ChangeDutyCycle(amount * 100)
+    bank.setChannel(1, 0)
+    bank.setChannel(0, amount * 100)
 
 
 def motorBackward(amount):
@@ -213,9 +532,9 @@ def motorBackward(amount):
     -----------
     amount : float
         Speed from 0.0 (stopped) to 1.0 (full speed)
-        
+    
     Note: This is a simple function that only controls Motor 1.
     For full robot control, use moveMotor1-4 or the mecanum module.
     """
-    motor1_forward.ChangeDutyCycle(0)
-    motor1_backward.ChangeDutyCycle(amount * 100)
+    bank.setChannel(0, 0)
+    bank.setChannel(1, amount * 100)
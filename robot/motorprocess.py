@@ -0,0 +1,572 @@
+"""
+Separate Motor Process
+======================
+This module runs the motor output in its own process, so nothing else the
+main program does (logging, telemetry, camera code) can hold up the motors.
+
+Why a separate process?
+-----------------------
+Python threads take turns: only one runs Python code at a time (the "GIL").
+A busy telemetry thread therefore also delays the thread that writes the
+motors. Two PROCESSES each have their own interpreter and run side by side.
+
+    Input process                        Motor process
+    -------------                        -------------
+    controller -> sticks -> mecanum      owns the GPIO pins
+    math -> motor powers  --shared-->    reads the newest powers
+                            memory       and writes the motors
+
+How the powers get across:
+--------------------------
+A small block of shared memory (multiprocessing.shared_memory) holds the
+newest command: a sequence number, two timestamps and the motor powers.
+Nothing is pickled or copied through a queue - the input process writes the
+numbers in place and the motor process reads them.
+
+The block is protected by a "seqlock": the writer makes the sequence number
+odd before changing the data and even again afterwards. The reader reads
+the number, then the data, then the number again; if it was odd or has
+changed, a write was in progress and the reader simply reads again.
+
+Besides the shared memory, a pipe works as a doorbell: the writer sends one
+byte after each command, so the motor process wakes up immediately instead
+of checking in a loop. When the input process ends - normally or by a
+crash - the kernel closes its end of the pipe and the motor process stops
+the motors at once.
+
+Safety:
+-------
+The input process republishes the command regularly (a "heartbeat"), but
+only while its input thread is making progress: a callback stuck on one
+controller event for longer than staleAfter (see robot.deadline, "The
+input thread") pauses the heartbeat. If no command arrives for staleAfter
+seconds - the input process hangs, or is too busy - the motor process
+stops the motors until commands come back.
+
+The other way round, the motor process reports back once its motors are
+initialized (startMotorProcess() fails if it does not), and the heartbeat
+checks that it is still alive. If it dies, the input process logs an error
+and stops as if Ctrl+C was pressed, instead of driving with nothing on the
+motors.
+
+Note: the seqlock relies on the writes landing in memory in program order.
+That holds on the Pi in practice (each step is a separate system-level
+operation in the interpreter), but it is not a formal memory barrier.
+
+Example usage:
+--------------
+    from robot import motorprocess
+    motorprocess.start(staleAfter=0.1)   # Instead of drive.start()
+"""
+
+import math
+import multiprocessing
+import os
+import select
+import signal
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from . import controller, drive, gpio, latency, log, motor
+from .controller import connectToController, eventLoop
+from .deadline import DeadlineMonitor
+from .mecanum import driveMotors, stopMotors
+from .scheduler import Scheduler
+
+SEQUENCE = struct.Struct('<Q')   # At the start of the block
+
+# How often the input process republishes the command (Hz)
+HEARTBEAT_RATE = 50
+
+# Stop the motors when no command arrived for this long (seconds)
+STALE_AFTER = 0.1
+
+# How long startMotorProcess() waits for the motor process to report in (seconds)
+START_TIMEOUT = 5.0
+
+
+class CommandChannel:
+    """
+    Shared memory holding the newest motor command, plus a doorbell pipe.
+
+    Create it BEFORE starting the motor process; the process inherits both
+    the memory and the pipe. Then each side calls its useAs...() method.
+
+    Memory layout (little-endian):
+        sequence       8 bytes   Even = complete, odd = being written
+        writeTime      8 bytes   time.monotonic() of the write
+        inputTime      8 bytes   time.time() of the input behind it, NaN if none
+        powers         8 bytes per motor
+
+    Parameters:
+    -----------
+    motors : int
+        Number of motor powers in a command
+    """
+
+    def __init__(self, motors=4):
+        self.motors = motors
+        self.body = struct.Struct(f'<dd{motors}d')
+        self.memory = shared_memory.SharedMemory(create=True,
+                                                 size=SEQUENCE.size + self.body.size)
+        self.buffer = self.memory.buf
+        SEQUENCE.pack_into(self.buffer, 0, 0)
+        self.sequence = 0
+        self.lock = threading.Lock()   # Several writer threads take turns
+        self.readEnd, self.writeEnd = os.pipe()
+
+    def useAsWriter(self):
+        """Keep only the writer's end of the doorbell (in the input process)."""
+        os.close(self.readEnd)
+        self.readEnd = None
+        # Never wait for a slow reader: a full pipe already means "wake up"
+        os.set_blocking(self.writeEnd, False)
+
+    def useAsReader(self):
+        """Keep only the reader's end of the doorbell (in the motor process)."""
+        os.close(self.writeEnd)
+        self.writeEnd = None
+        self.poller = select.poll()
+        self.poller.register(self.readEnd, select.POLLIN)
+
+    def publish(self, powers, inputTime=math.nan):
+        """
+        Write a new command and ring the doorbell.
+
+        Parameters:
+        -----------
+        powers : sequence of floats
+            One power per motor
+        inputTime : float
+            time.time() of the input that caused this command (NaN if none)
+        """
+        with self.lock:
+            sequence = self.sequence + 1
+            SEQUENCE.pack_into(self.buffer, 0, sequence)       # Odd: writing
+            self.body.pack_into(self.buffer, SEQUENCE.size, time.monotonic(), inputTime, *powers)
+            self.sequence = sequence + 1
+            SEQUENCE.pack_into(self.buffer, 0, self.sequence)  # Even: complete
+        try:
+            os.write(self.writeEnd, b'\x01')
+        except BlockingIOError:
+            pass  # The reader has not caught up with older rings - it will see this one too
+
+    def read(self, timeout=None):
+        """
+        Read the newest complete command.
+
+        Parameters:
+        -----------
+        timeout : float, optional
+            Give up if a write has not finished after this many seconds -
+            for example because the writer died halfway through one.
+            Default: wait as long as it takes.
+
+        Returns:
+        --------
+        tuple or None : (sequence, writeTime, inputTime, powers...), or None
+                        when the timeout passed with a write still unfinished
+        """
+        giveUpAt = None
+        while True:
+            before = SEQUENCE.unpack_from(self.buffer, 0)[0]
+            if before & 1:
+                # Being written right now. A write takes microseconds, so
+                # the clock is only read once it is taking suspiciously long.
+                if timeout is not None:
+                    if giveUpAt is None:
+                        giveUpAt = time.monotonic() + timeout
+                    elif time.monotonic() > giveUpAt:
+                        return None
+                continue
+            values = self.body.unpack_from(self.buffer, SEQUENCE.size)
+            if SEQUENCE.unpack_from(self.buffer, 0)[0] == before:
+                return (before,) + values
+
+    def wait(self, timeout):
+        """
+        Wait until the doorbell rings or the timeout passes.
+
+        Parameters:
+        -----------
+        timeout : float
+            Seconds to wait at most
+
+        Returns:
+        --------
+        bool : False if the writer has gone away (its end of the pipe closed)
+        """
+        if self.poller.poll(timeout * 1000):
+            if not os.read(self.readEnd, 4096):
+                return False
+        return True
+
+    def close(self):
+        """Close this side's pipe end and memory (the writer also removes the memory)."""
+        for end in (self.readEnd, self.writeEnd):
+            if end is not None:
+                os.close(end)
+        self.readEnd = self.writeEnd = None
+        self.buffer = None
+        self.memory.close()
+
+    def unlink(self):
+        """Remove the shared memory block from the system (writer only)."""
+        self.memory.unlink()
+
+
+class SharedMotorBank:
+    """
+    Stand-in for motor.bank in the input process.
+
+    mecanum.driveMotors() calls bank.apply(powers) as usual, and this class
+    publishes the powers to the motor process instead of writing GPIO pins.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.lastPowers = [0.0] * channel.motors
+
+    def apply(self, powerVec):
+        """Send a new command (with the input time, when latency is measured)."""
+        self.lastPowers[:] = powerVec
+        inputTime = latency.inputTime if latency.enabled and latency.inputTime is not None else math.nan
+        self.channel.publish(powerVec, inputTime)
+
+    def heartbeat(self):
+        """Send the last command again, to show the input process is alive."""
+        self.channel.publish(self.lastPowers)
+
+    def stop(self):
+        self.apply([0.0] * self.channel.motors)
+
+    def makeStopper(self):
+        return self.stop
+
+    def checkStops(self):
+        """Nothing to catch up with: the duty cache lives in the motor process."""
+
+    def resetDutyCache(self):
+        """
+        Nothing to forget here: the duty cache lives in the motor process,
+        which writes its own PWM channels. Kept so motor.resetDutyCache()
+        works the same with or without the motor process.
+        """
+
+
+class CommandFollower:
+    """
+    What the motor process does with each command it reads.
+
+    New commands are applied to the motors; a command older than staleAfter
+    stops them (once) until a fresh one arrives.
+
+    Parameters:
+    -----------
+    staleAfter : float
+        Stop the motors when the newest command is older than this (seconds)
+    measureLatency : bool
+        Record input-to-motor latency (see robot.latency)
+    apply, stop : functions
+        Write the motor powers / stop the motors (default driveMotors and
+        stopMotors)
+    clock : function
+        time.monotonic, the clock of the command's writeTime (tests can
+        pass a fake clock)
+    """
+
+    def __init__(self, staleAfter, measureLatency=False, apply=driveMotors, stop=stopMotors,
+                 clock=time.monotonic):
+        self.staleAfter = staleAfter
+        self.measureLatency = measureLatency
+        self.apply = apply
+        self.stop = stop
+        self.clock = clock
+        self.lastSequence = 0
+        self.stopped = True
+        self.staleStops = 0
+        self.updates = 0
+
+    def handle(self, command):
+        """
+        Act on the newest command, as returned by CommandChannel.read().
+
+        None (no complete command could be read) counts as stale.
+        """
+        if command is None:
+            self.stopStale()
+            return
+
+        sequence, writeTime, inputTime = command[0], command[1], command[2]
+
+        if self.clock() - writeTime > self.staleAfter:
+            self.stopStale()
+            return
+
+        if sequence != self.lastSequence:
+            self.lastSequence = sequence
+            self.apply(command[3:])
+            self.stopped = False
+            self.updates += 1
+            if self.measureLatency and inputTime == inputTime:  # Not NaN
+                latency.histogram.record(time.time() - inputTime)
+
+    def stopStale(self):
+        """
+        Stop the motors (once) because there is no fresh command.
+        """
+        if not self.stopped:
+            self.stop()
+            self.stopped = True
+            self.staleStops += 1
+            log.warning('motor', 'Motors stopped - no command for %.0f ms',
+                        self.staleAfter * 1000)
+
+
+def motorProcessMain(channel, staleAfter, backendName, measureLatency, results):
+    """
+    The motor process: apply commands from the channel until the input process ends.
+
+    Parameters:
+    -----------
+    channel : CommandChannel
+        Inherited from the input process
+    staleAfter : float
+        Stop the motors when the newest command is older than this (seconds)
+    backendName : str
+        GPIO backend (see robot.gpio)
+    measureLatency : bool
+        Record input-to-motor latency (see robot.latency)
+    results : multiprocessing.connection.Connection
+        First {'ready': True} (or {'error': text}) once the motors are
+        initialized, then the statistics when the process ends
+    """
+    # Ctrl+C is for the input process: it ends, and we stop through the pipe
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    channel.useAsReader()
+
+    try:
+        gpio.setBackend(backendName)
+        motor.initMotors()
+    except Exception as error:
+        # Tell startMotorProcess() why, instead of dying silently
+        results.send({'error': f'{type(error).__name__}: {error}'})
+        results.close()
+        channel.close()
+        return
+    results.send({'ready': True})
+
+    follower = CommandFollower(staleAfter, measureLatency)
+    checkEvery = staleAfter / 2
+
+    try:
+        while channel.wait(checkEvery):
+            # A write left half-done (the input process died during it)
+            # must not keep us here: give up after staleAfter and stop
+            follower.handle(channel.read(staleAfter))
+    finally:
+        stopMotors()
+        results.send({'updates': follower.updates, 'staleStops': follower.staleStops,
+                      'latency': latency.histogram.summary(),
+                      'duty': motor.getDutyStats()})
+        results.close()
+        channel.close()
+
+
+def startMotorProcess(staleAfter=STALE_AFTER, measureLatency=False, motors=4):
+    """
+    Start the motor process and make this process send commands to it.
+
+    Call this before starting any threads (the process is forked).
+    Afterwards motor.bank is a SharedMotorBank, so setMotors(),
+    driveMotors() and stopMotors() send their powers to the motor process.
+
+    Waits until the motor process has initialized the motors.
+
+    Returns:
+    --------
+    tuple : (process, channel, results connection) for stopMotorProcess()
+
+    Raises:
+    -------
+    RuntimeError : The motor process failed to initialize the motors, died,
+                   or did not report in within START_TIMEOUT seconds
+    """
+    channel = CommandChannel(motors)
+    resultsReader, resultsWriter = multiprocessing.Pipe(duplex=False)
+
+    # 'fork' hands the shared memory and the pipe to the child as they are -
+    # nothing is pickled
+    context = multiprocessing.get_context('fork')
+    process = context.Process(target=motorProcessMain, name='motors', daemon=True,
+                              args=(channel, staleAfter, gpio.backendName,
+                                    measureLatency, resultsWriter))
+    process.start()
+    resultsWriter.close()
+    channel.useAsWriter()
+
+    # Handshake: do not drive until the motor process owns the motors
+    try:
+        reply = resultsReader.recv() if resultsReader.poll(START_TIMEOUT) else None
+    except EOFError:
+        reply = None   # It died before saying anything
+    if reply is None or 'error' in reply:
+        channel.close()
+        channel.unlink()
+        process.kill()
+        process.join()
+        reason = reply['error'] if reply else f'no reply (exit code {process.exitcode})'
+        raise RuntimeError(f'Motor process did not start: {reason}')
+
+    motor.bank = SharedMotorBank(channel)
+    return process, channel, resultsReader
+
+
+def makeHeartbeat(process, bank, watch=None, onDeath=None):
+    """
+    Make the heartbeat task of the input process.
+
+    Each run checks that the motor process is still alive, then sends the
+    last command again - but only while the input thread is making
+    progress, so a stuck input thread lets the motor process go stale.
+
+    Parameters:
+    -----------
+    process : multiprocessing.Process
+        The motor process
+    bank : SharedMotorBank
+        Sends the heartbeat
+    watch : DeadlineMonitor, optional
+        Its inputFresh() tells whether the input thread is stuck (its
+        monitor thread is not needed)
+    onDeath : function, optional
+        Called once if the motor process has died. Default: log an error
+        and interrupt the main thread like Ctrl+C, to end the program.
+
+    Returns:
+    --------
+    function : The task, for Scheduler.addTask()
+    """
+    mainThread = threading.main_thread().ident
+    reported = False
+
+    def interruptMain():
+        log.error('drive', 'Motor process died (exit code %s) - stopping', process.exitcode)
+        signal.pthread_kill(mainThread, signal.SIGINT)
+
+    if onDeath is None:
+        onDeath = interruptMain
+
+    def beat():
+        nonlocal reported
+        if process.exitcode is not None:
+            if not reported:
+                reported = True
+                onDeath()
+            return
+        if watch is None or watch.inputFresh():
+            bank.heartbeat()
+
+    return beat
+
+
+def stopMotorProcess(process, channel, results, timeout=2.0):
+    """
+    End the motor process (it stops the motors first) and collect its statistics.
+
+    Returns:
+    --------
+    dict or None : updates, staleStops, latency summary and duty stats
+    """
+    channel.close()          # The motor process sees the pipe close and stops
+    try:
+        stats = results.recv() if results.poll(timeout) else None
+    except EOFError:
+        stats = None         # It died without sending them
+    process.join(timeout)
+    channel.unlink()
+    motor.bank = None
+    return stats
+
+
+def formatStats(stats):
+    """
+    Describe the motor process statistics in one or two lines.
+    """
+    if stats is None:
+        return 'Motor process: no statistics (it did not end cleanly)'
+    lines = [f"Motor process: {stats['updates']:,} updates, "
+             f"{stats['staleStops']} stops for stale commands"]
+    if stats['latency']['count']:
+        lines.append(f"Input->motor latency: {stats['latency']['count']:,} updates  "
+                     f"p50 {stats['latency']['p50Ms']:.3f} ms  p99 {stats['latency']['p99Ms']:.3f} ms  "
+                     f"p99.9 {stats['latency']['p999Ms']:.3f} ms  max {stats['latency']['maxMs']:.3f} ms")
+    return '\n'.join(lines)
+
+
+def start(staleAfter=STALE_AFTER, heartbeatRate=HEARTBEAT_RATE, measureLatency=False,
+          batchFrames=True, recordTo=None):
+    """
+    Drive the robot with the motors in a separate process.
+
+    Works like drive.start(): same controls, same controller handling.
+
+    Parameters:
+    -----------
+    staleAfter : float
+        The motor process stops the motors when it has not heard from this
+        process for this many seconds
+    heartbeatRate : float
+        How often (Hz) the current command is sent again while nothing
+        changes. Must be well above 1 / staleAfter.
+    measureLatency : bool
+        Measure from each stick event to its motor write IN THE MOTOR
+        PROCESS, and print the percentiles when the program stops
+    batchFrames, recordTo :
+        Same as drive.start()
+    """
+    if heartbeatRate * staleAfter < 2:
+        raise ValueError('heartbeatRate is too low for staleAfter - the motors would '
+                         'stop between heartbeats')
+
+    log.info('drive', 'Starting: Drive Robot (separate motor process)')
+
+    # Fork before any thread exists
+    process, channel, results = startMotorProcess(staleAfter, measureLatency)
+    log.info('drive', 'Motor process running (pid %d)', process.pid)
+
+    # Only the input checks of the monitor are used (its thread is not
+    # started): drive's input callbacks report to it, the heartbeat asks it
+    drive.monitor = DeadlineMonitor(staleAfter, motor.bank.stop, inputTimeout=staleAfter)
+    scheduler = Scheduler()
+    scheduler.addTask('heartbeat', heartbeatRate,
+                      makeHeartbeat(process, motor.bank, drive.monitor))
+
+    try:
+        connectToController()
+        log.info('drive', 'Connected to Controller')
+
+        scheduler.start()
+
+        if measureLatency:
+            latency.enable()
+
+        if not batchFrames:
+            drive.subscribeControls()
+
+        log.start()
+        log.info('drive', 'Ready to drive!')
+
+        eventLoop(onFrame=drive.onFrame if batchFrames else None,
+                  onDisconnect=drive.onDisconnect, recordTo=recordTo)
+    finally:
+        if not batchFrames:
+            controller.clearSubscriptions()
+        scheduler.stop()
+        drive.monitor = None
+        if measureLatency:
+            latency.disable()
+        log.info('drive', '%s', formatStats(stopMotorProcess(process, channel, results)))
+        log.stop()
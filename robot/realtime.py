@@ -0,0 +1,272 @@
+"""
+Real-time Mode
+==============
+This module asks Linux to treat the robot's control threads as real-time
+work, so other programs on the Pi (a camera stream, a web server) cannot
+delay the motor updates.
+
+What it changes:
+----------------
+- SCHED_FIFO priority: a real-time thread runs as soon as it is ready,
+  before any normal program. (Normal threads have to share the CPU.)
+- CPU affinity: keep a thread on chosen CPU cores, e.g. a core that the
+  camera does not use
+- mlockall(): keep all of the program's memory in RAM, so it is never
+  swapped ("paged") out and has to be read back from disk mid-update
+- Pre-faulting: touch a block of memory once at startup, so the memory
+  the program will use later is already mapped and locked
+- gc.freeze(): move everything created during startup out of the garbage
+  collector's way, so collections while driving have less to scan
+
+All of these need privileges (root, or CAP_SYS_NICE / CAP_IPC_LOCK, or
+'rtprio' and 'memlock' limits in /etc/security/limits.conf). Without
+them, every step that fails is skipped and listed in the report, and the
+robot runs normally.
+
+Checking what was achieved:
+---------------------------
+The report reads the settings BACK from the kernel after setting them, so
+it shows what the threads really got, for example:
+
+    Real-time mode:
+      memory locked: yes (prefaulted 8.0 MB)
+      gc frozen: 41,532 objects
+      input       SCHED_FIFO priority 48  CPUs 3
+      control     SCHED_FIFO priority 49  CPUs 3
+
+Example usage:
+--------------
+    from robot import realtime
+    realtime.setupProcess()
+    realtime.setupThread('input', priority=48, cpus=[3])
+    realtime.freezeGC()
+    print(realtime.formatReport())
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import os
+
+# Default SCHED_FIFO priority (1-99). Kernel threads that handle
+# interrupts usually run at 50, so stay at or below that. drive.start()
+# gives the input thread this priority, the control thread one more and
+# the deadline monitor two more: 48, 49 and 50.
+DEFAULT_PRIORITY = 48
+
+# How much memory setupProcess() touches in advance (bytes)
+PREFAULT_BYTES = 8 * 1024 * 1024
+
+# mlockall() flags (from <sys/mman.h>)
+MCL_CURRENT = 1     # Lock everything that is in memory now
+MCL_FUTURE = 2      # ...and everything allocated later
+
+# mallopt() options (from <malloc.h>)
+M_TRIM_THRESHOLD = -1
+M_MMAP_MAX = -4
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# What was achieved (filled in by the functions below)
+status = {
+    'memoryLocked': False,
+    'prefaultedBytes': 0,
+    'gcFrozen': None,       # Number of frozen objects, None if not done
+    'threads': {},          # name -> {'policy': str, 'priority': int, 'cpus': list}
+    'problems': [],         # Everything that could not be done, and why
+}
+
+PRIVILEGE_HINT = 'run as root or give the program the needed capability/limit'
+
+
+def loadLibc():
+    """
+    Load the C library (for mlockall and mallopt), or None if unavailable.
+    """
+    name = ctypes.util.find_library('c')
+    if name is None:
+        return None
+    try:
+        return ctypes.CDLL(name, use_errno=True)
+    except OSError:
+        return None
+
+
+def policyName(policy):
+    """
+    Turn a scheduling policy number into its name, e.g. 'SCHED_FIFO'.
+    """
+    for name in ('SCHED_OTHER', 'SCHED_FIFO', 'SCHED_RR', 'SCHED_BATCH', 'SCHED_IDLE'):
+        if getattr(os, name, None) == policy:
+            return name
+    return f'policy {policy}'
+
+
+def setupProcess(lockMemory=True, prefaultBytes=PREFAULT_BYTES):
+    """
+    Lock the program's memory in RAM and pre-fault a working set.
+
+    Call this once, after initialization (motors, controller, lookup
+    tables), so everything created so far is locked too.
+
+    Parameters:
+    -----------
+    lockMemory : bool
+        Call mlockall(MCL_CURRENT | MCL_FUTURE)
+    prefaultBytes : int
+        Memory to touch in advance (0 = none)
+
+    Returns:
+    --------
+    bool : True if the memory is locked
+    """
+    if not lockMemory:
+        return False
+
+    libc = loadLibc()
+    if libc is None or not hasattr(libc, 'mlockall'):
+        status['problems'].append('mlockall: not available on this system')
+        return False
+
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        error = ctypes.get_errno()
+        status['problems'].append(f'mlockall: {os.strerror(error)} '
+                                  f"({PRIVILEGE_HINT}, e.g. a 'memlock' limit)")
+        return False
+    status['memoryLocked'] = True
+
+    if prefaultBytes > 0:
+        if hasattr(libc, 'mallopt'):
+            # Keep freed memory inside the program instead of handing it
+            # back to the system - otherwise the pre-faulted block would be
+            # returned right away and fresh (unlocked, unfaulted) memory
+            # would be mapped again later
+            libc.mallopt(M_TRIM_THRESHOLD, -1)
+            libc.mallopt(M_MMAP_MAX, 0)
+
+        # Writing one byte per page makes the kernel map (and, with
+        # mlockall, lock) every page now instead of during driving
+        block = bytearray(prefaultBytes)
+        for offset in range(0, prefaultBytes, PAGE_SIZE):
+            block[offset] = 1
+        del block
+        status['prefaultedBytes'] = prefaultBytes
+
+    return True
+
+
+def setupThread(name, threadId=0, priority=DEFAULT_PRIORITY, cpus=None):
+    """
+    Give one thread real-time priority and (optionally) fixed CPU cores.
+
+    Parameters:
+    -----------
+    name : str
+        Label for the report (e.g. 'input', 'control')
+    threadId : int
+        Linux thread id (threading.Thread.native_id), 0 = the calling thread
+    priority : int
+        SCHED_FIFO priority 1-99 (higher runs first)
+    cpus : list of int, optional
+        CPU cores the thread may run on (default: leave unchanged)
+
+    Returns:
+    --------
+    dict : What the thread actually has now: policy, priority and cpus
+    """
+    if not hasattr(os, 'sched_setscheduler'):
+        status['problems'].append(f'{name}: real-time scheduling is not available on this system')
+    else:
+        try:
+            os.sched_setscheduler(threadId, os.SCHED_FIFO, os.sched_param(priority))
+        except PermissionError as error:
+            status['problems'].append(f'{name}: SCHED_FIFO: {error.strerror} '
+                                      f"({PRIVILEGE_HINT}, e.g. CAP_SYS_NICE or an 'rtprio' limit)")
+        except OSError as error:
+            status['problems'].append(f'{name}: SCHED_FIFO priority {priority}: {error.strerror}')
+
+    if cpus is not None:
+        if not hasattr(os, 'sched_setaffinity'):
+            status['problems'].append(f'{name}: CPU affinity is not available on this system')
+        else:
+            try:
+                os.sched_setaffinity(threadId, cpus)
+            except OSError as error:
+                status['problems'].append(f'{name}: CPU affinity {list(cpus)}: {error.strerror}')
+
+    achieved = readThread(threadId)
+    status['threads'][name] = achieved
+    return achieved
+
+
+def readThread(threadId=0):
+    """
+    Ask the kernel which policy, priority and CPUs a thread really has.
+
+    Returns:
+    --------
+    dict : {'policy': name, 'priority': int, 'cpus': list of int}
+           (None values where the system cannot tell)
+    """
+    achieved = {'policy': None, 'priority': None, 'cpus': None}
+    try:
+        achieved['policy'] = policyName(os.sched_getscheduler(threadId))
+        achieved['priority'] = os.sched_getparam(threadId).sched_priority
+        achieved['cpus'] = sorted(os.sched_getaffinity(threadId))
+    except (AttributeError, OSError):
+        pass
+    return achieved
+
+
+def freezeGC():
+    """
+    Collect garbage once, then freeze every object that exists now.
+
+    Frozen objects are never scanned by later collections, which makes
+    the collections that happen while driving shorter.
+
+    Returns:
+    --------
+    int : Number of frozen objects
+    """
+    gc.collect()
+    gc.freeze()
+    status['gcFrozen'] = gc.get_freeze_count()
+    return status['gcFrozen']
+
+
+def formatReport():
+    """
+    Describe what real-time mode achieved.
+
+    Returns:
+    --------
+    str : Printable lines (see the module documentation for an example)
+    """
+    lines = ['Real-time mode:']
+    if status['memoryLocked']:
+        lines.append(f"  memory locked: yes (prefaulted {status['prefaultedBytes'] / 1e6:.1f} MB)")
+    else:
+        lines.append('  memory locked: no')
+    if status['gcFrozen'] is not None:
+        lines.append(f"  gc frozen: {status['gcFrozen']:,} objects")
+
+    for name, achieved in status['threads'].items():
+        cpus = ','.join(str(cpu) for cpu in achieved['cpus']) if achieved['cpus'] else '?'
+        lines.append(f"  {name:<11} {achieved['policy'] or '?'} priority "
+                     f"{achieved['priority']}  CPUs {cpus}")
+
+    for problem in status['problems']:
+        lines.append(f'  NOT APPLIED - {problem}')
+    return '\n'.join(lines)
+
+
+def reset():
+    """
+    Forget the recorded status (the settings themselves stay in effect).
+    """
+    status['memoryLocked'] = False
+    status['prefaultedBytes'] = 0
+    status['gcFrozen'] = None
+    status['threads'].clear()
+    status['problems'].clear()
@@ -0,0 +1,277 @@
+"""
+Input Recording and Replay
+==========================
+This module saves every raw controller event to a file while you drive,
+and plays such a file back through the same code that handles live input.
+
+Why is this useful?
+-------------------
+- Reproduce a problem from the field: record the session, then replay it
+  at your desk (with fake motors) as often as you like
+- Benchmark the program with real driving instead of made-up input
+- Test changes to the drive code against the exact same input
+
+File format:
+------------
+The file is binary and every event takes exactly 8 bytes, so a
+30-minute session with a few hundred events per second fits in a few MB.
+
+    Header (16 bytes):  b'RBEV', version (2 bytes), record size (2 bytes),
+                        time of the first event in microseconds (8 bytes)
+    Records (8 bytes):  microseconds since the previous event (2 bytes),
+                        event type and code packed together (2 bytes),
+                        event value (4 bytes)
+
+Storing the time DIFFERENCE ("delta") instead of the full timestamp is
+what keeps records small: the difference between two controller events is
+almost always below 65 ms, which fits in 2 bytes. For longer pauses an
+extra "time skip" record (type/code = 0xFFFF) holds the full gap.
+
+The event type (0-31) and code (0-1023) share one 2-byte number:
+type * 1024 + code.
+
+Example usage:
+--------------
+    # Record while driving
+    eventLoop(onButton, onStick, onFrame=onFrame, recordTo='session.rbev')
+
+    # Replay: real time, 10x faster, or as fast as possible
+    replay('session.rbev', onButton, onStick, onFrame=onFrame)
+    replay('session.rbev', onButton, onStick, onFrame=onFrame, speed=10)
+    replay('session.rbev', onButton, onStick, onFrame=onFrame, speed=None)
+"""
+
+import os
+import struct
+import time
+from collections import namedtuple
+
+MAGIC = b'RBEV'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHHq')   # magic, version, record size, first event time (us)
+RECORD = struct.Struct('<HHi')     # delta (us), type/code, value
+
+CODE_BITS = 10                     # Event codes 0-1023 (the kernel's KEY_MAX is 0x2ff)
+CODE_MASK = (1 << CODE_BITS) - 1
+TIME_SKIP = 0xFFFF                 # type/code marking a "time skip" record
+MAX_DELTA = 0xFFFF                 # Largest delta that fits in a normal record
+MAX_SKIP = 0x7FFFFFFF              # Largest gap one time skip record can hold (~35 min)
+
+
+class RecordedEvent(namedtuple('RecordedEvent', 'sec usec type code value')):
+    """
+    One event read back from a recording.
+
+    It has the same attributes as an evdev InputEvent (sec, usec, type,
+    code, value and timestamp()), so the controller loops cannot tell a
+    replayed event from a live one.
+    """
+    __slots__ = ()
+
+    def timestamp(self):
+        """Event time in seconds (same as evdev's InputEvent.timestamp())."""
+        return self.sec + self.usec / 1000000
+
+
+class Recorder:
+    """
+    Writes controller events to a recording file.
+
+    Parameters:
+    -----------
+    path : str
+        File to create (an existing file is overwritten)
+
+    Example:
+    --------
+    recorder = Recorder('session.rbev')
+    for event in recorder.wrap(controller.read_loop()):
+        ...                  # Use the events as normal
+    recorder.close()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.lastTime = None   # Time of the previous event, in microseconds
+        self.count = 0         # Events written so far
+
+    def write(self, event):
+        """
+        Append one event to the file.
+
+        Parameters:
+        -----------
+        event : evdev.InputEvent (or RecordedEvent)
+            Needs sec, usec, type, code and value attributes
+        """
+        now = event.sec * 1000000 + event.usec
+
+        if self.lastTime is None:
+            # First event: its full time goes into the header
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, now))
+            delta = 0
+        else:
+            delta = now - self.lastTime
+            if delta < 0:
+                delta = 0   # Clock went backwards (e.g. time was set) - keep order
+            elif delta > MAX_DELTA:
+                # Too long for 2 bytes: write the gap in time skip record(s)
+                while delta > 0:
+                    skip = min(delta, MAX_SKIP)
+                    self.file.write(RECORD.pack(0, TIME_SKIP, skip))
+                    delta -= skip
+
+        self.file.write(RECORD.pack(delta, (event.type << CODE_BITS) | event.code, event.value))
+        self.lastTime = now
+        self.count += 1
+
+    def wrap(self, events):
+        """
+        Record events while passing them through unchanged.
+
+        Parameters:
+        -----------
+        events : iterable of events
+            For example controller.read_loop()
+
+        Yields:
+        -------
+        Each event, after it has been written
+        """
+        for event in events:
+            self.write(event)
+            yield event
+
+    def close(self):
+        """
+        Finish the file. Always call this, or the last events may be lost.
+        """
+        if self.lastTime is None:
+            # No events at all - still write a valid (empty) file
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+        self.file.close()
+
+
+def readEvents(path):
+    """
+    Read all events from a recording file.
+
+    Parameters:
+    -----------
+    path : str
+        Recording file
+
+    Yields:
+    -------
+    RecordedEvent : Events in the order they were recorded, with their
+                    original timestamps
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, recordSize, now = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a controller recording')
+    if version != VERSION or recordSize != RECORD.size:
+        raise ValueError(f'{path} uses recording format version {version}, '
+                         f'this program reads version {VERSION}')
+
+    # iter_unpack() decodes the fixed-size records without a Python-level slice per record
+    for delta, typeCode, value in RECORD.iter_unpack(memoryview(data)[HEADER.size:]):
+        if typeCode == TIME_SKIP:
+            now += value
+            continue
+        now += delta
+        yield RecordedEvent(now // 1000000, now % 1000000,
+                            typeCode >> CODE_BITS, typeCode & CODE_MASK, value)
+
+
+def replayEvents(path, speed=1.0):
+    """
+    Read events from a recording with their original timing.
+
+    Parameters:
+    -----------
+    path : str
+        Recording file
+    speed : float or None
+        1.0 = real time, 2.0 = twice as fast, 0.5 = half speed,
+        None = as fast as possible (no waiting at all)
+
+    Yields:
+    -------
+    RecordedEvent : Each event, at (recorded time / speed) after the start
+    """
+    events = readEvents(path)
+    if not speed:
+        yield from events
+        return
+
+    first = None
+    started = time.monotonic()
+
+    for event in events:
+        if first is None:
+            first = event.timestamp()
+
+        # Wait until this event's moment on an absolute schedule, so small
+        # sleep errors do not add up over a long recording
+        due = started + (event.timestamp() - first) / speed
+        delay = due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        yield event
+
+
+def replay(path, onButton, onStick, onFrame=None, speed=1.0):
+    """
+    Play a recording through the controller's event loops.
+
+    Uses exactly the same dispatch code as live driving
+    (controller.dispatchEvents), so the callbacks see the same names,
+    values and frames as they did during the recording.
+
+    Parameters:
+    -----------
+    path : str
+        Recording file
+    onButton, onStick, onFrame : function or None
+        Same callbacks as controller.eventLoop() (all None: the handlers
+        registered with controller.subscribe())
+    speed : float or None
+        See replayEvents()
+    """
+    # Imported here because controller imports this module
+    from . import controller
+
+    controller.dispatchEvents(replayEvents(path, speed), onButton, onStick, onFrame)
+
+
+def fileInfo(path):
+    """
+    Describe a recording file.
+
+    Parameters:
+    -----------
+    path : str
+        Recording file
+
+    Returns:
+    --------
+    dict : {'events': number of events, 'seconds': length of the session,
+            'bytes': file size}
+    """
+    count = 0
+    first = last = None
+    for event in readEvents(path):
+        if first is None:
+            first = event.timestamp()
+        last = event.timestamp()
+        count += 1
+
+    return {'events': count,
+            'seconds': (last - first) if count else 0.0,
+            'bytes': os.path.getsize(path)}
@@ -0,0 +1,296 @@
+"""
+Control Loop Scheduler
+======================
+This module runs functions at fixed rates, no matter how often (or how
+rarely) the game controller sends events.
+
+Why do we need this?
+--------------------
+Without a scheduler the motors are only updated inside the controller
+callbacks. The "control rate" then depends on the controller: a busy stick
+can send hundreds of events per second, and a stick held still sends none.
+With a scheduler, controller input only updates the latest stick values and
+a separate loop applies them to the motors at a steady rate, for example:
+
+    Motor output:  200 times per second (200 Hz)
+    Watchdog:       50 times per second
+    Telemetry:      10 times per second
+
+Key Concepts:
+-------------
+- Period: Time between runs (1 / rate). 200 Hz -> 0.005 seconds
+- Deadline: The exact moment a task is supposed to run next
+- Jitter: How late a task actually started compared to its deadline
+- Overrun: A task fell so far behind that a whole period was skipped
+
+A task that raises an exception does not end the loop: the error is
+logged (the first time, with its traceback), counted, and handed to the
+scheduler's onError function - drive.start() uses that to stop the
+motors, so a failing motor write never leaves them running.
+
+Deadlines are absolute (start + N * period) and measured with
+time.monotonic(), so small delays do not add up over time the way
+repeated time.sleep(period) calls would.
+
+Example usage:
+--------------
+    from robot.scheduler import Scheduler
+
+    scheduler = Scheduler()
+    scheduler.addTask('control', 200, setMotors)
+    scheduler.addTask('telemetry', 10, printStatus)
+    scheduler.start()          # Runs in a background thread
+    ...
+    scheduler.stop()
+    print(scheduler.formatReport())
+"""
+
+import threading
+import time
+import traceback
+
+from . import log
+
+
+class PeriodicTask:
+    """
+    One function that the scheduler runs at a fixed rate.
+
+    Besides the function itself, this keeps the timing statistics for the
+    task so you can see how well the computer keeps up with it.
+
+    Attributes:
+    -----------
+    name : str
+        Label used in reports
+    rate : float
+        Runs per second (Hz)
+    period : float
+        Seconds between runs (1 / rate)
+    runs : int
+        How many times the task has run
+    overruns : int
+        How many times the task fell a whole period (or more) behind
+    skipped : int
+        How many runs were dropped to catch up after overruns
+    totalJitter : float
+        Sum of start delays in seconds (divide by runs for the average)
+    maxJitter : float
+        Largest start delay seen, in seconds
+    maxDuration : float
+        Longest time the function took to run, in seconds
+    errors : int
+        How many runs raised an exception
+    lastError : Exception or None
+        The most recent of those exceptions
+    """
+
+    def __init__(self, name, rate, callback):
+        if rate <= 0:
+            raise ValueError(f"Task '{name}' needs a positive rate, got {rate}")
+
+        self.name = name
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.callback = callback
+        self.deadline = 0.0  # Set by the scheduler when it starts
+
+        self.runs = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.totalJitter = 0.0
+        self.maxJitter = 0.0
+        self.maxDuration = 0.0
+        self.errors = 0
+        self.lastError = None
+
+    def stats(self):
+        """
+        Return the timing statistics as a dictionary.
+
+        Returns:
+        --------
+        dict : rate, runs, overruns, skipped, errors, and jitter/duration
+               values in milliseconds
+        """
+        averageJitter = self.totalJitter / self.runs if self.runs else 0.0
+        return {
+            'name': self.name,
+            'rate': self.rate,
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'avgJitterMs': averageJitter * 1000,
+            'maxJitterMs': self.maxJitter * 1000,
+            'maxDurationMs': self.maxDuration * 1000,
+        }
+
+
+class Scheduler:
+    """
+    Runs a set of PeriodicTasks, each at its own rate, from a single loop.
+
+    The loop sleeps until the earliest deadline, runs every task that is
+    due, and then schedules each of them one period later. If a task falls
+    more than a full period behind (for example because the computer was
+    busy), the missed runs are skipped instead of being run back-to-back,
+    and the task's overrun counter goes up.
+
+    Parameters:
+    -----------
+    onError : function, optional
+        Called as onError(task, error) on the scheduler thread whenever a
+        task raises an exception (for example: stop the motors)
+    """
+
+    def __init__(self, onError=None):
+        self.tasks = []
+        self.onError = onError
+        self.thread = None
+        self.stopEvent = threading.Event()
+
+    def addTask(self, name, rate, callback):
+        """
+        Add a function to run at a fixed rate.
+
+        Parameters:
+        -----------
+        name : str
+            Label for reports (e.g. 'control', 'watchdog')
+        rate : float
+            How many times per second to run (Hz)
+        callback : function
+            Function to call, with no arguments
+
+        Returns:
+        --------
+        PeriodicTask : The task object (holds its timing statistics)
+        """
+        task = PeriodicTask(name, rate, callback)
+        self.tasks.append(task)
+        return task
+
+    def run(self):
+        """
+        Run the tasks until stop() is called.
+
+        This blocks the calling thread. Use start() to run it in the
+        background instead.
+        """
+        if not self.tasks:
+            raise ValueError('Scheduler has no tasks - call addTask() first')
+
+        self.stopEvent.clear()
+
+        # Every task gets its first deadline right now
+        now = time.monotonic()
+        for task in self.tasks:
+            task.deadline = now
+
+        while not self.stopEvent.is_set():
+            # Sleep until the next task is due (wakes early if stop() is called)
+            nextDeadline = min(task.deadline for task in self.tasks)
+            delay = nextDeadline - time.monotonic()
+            if delay > 0 and self.stopEvent.wait(delay):
+                break
+
+            for task in self.tasks:
+                started = time.monotonic()
+                if started < task.deadline:
+                    continue  # Not due yet
+
+                try:
+                    task.callback()
+                except Exception as error:
+                    self.taskFailed(task, error)
+                finished = time.monotonic()
+
+                # Timing statistics
+                jitter = started - task.deadline
+                task.runs += 1
+                task.totalJitter += jitter
+                if jitter > task.maxJitter:
+                    task.maxJitter = jitter
+                if finished - started > task.maxDuration:
+                    task.maxDuration = finished - started
+
+                # Next deadline is one period after the previous one,
+                # NOT one period after "now" - this keeps the rate exact
+                task.deadline += task.period
+                if task.deadline <= finished:
+                    # We missed at least one whole period: skip ahead
+                    missed = int((finished - task.deadline) / task.period) + 1
+                    task.deadline += missed * task.period
+                    task.overruns += 1
+                    task.skipped += missed
+
+    def taskFailed(self, task, error):
+        """
+        Deal with an exception raised by a task, and keep the loop running.
+        """
+        task.errors += 1
+        task.lastError = error
+        if task.errors == 1:
+            log.error('scheduler', "Task '%s' failed:\n%s", task.name, traceback.format_exc().rstrip())
+        if self.onError is not None:
+            try:
+                self.onError(task, error)
+            except Exception:
+                log.error('scheduler', "onError failed for task '%s':\n%s", task.name,
+                          traceback.format_exc().rstrip())
+
+    def start(self):
+        """
+        Run the scheduler in a background thread.
+
+        The thread is a daemon thread, so it will not keep the program
+        alive after the main thread exits.
+
+        Returns:
+        --------
+        threading.Thread : The thread running the scheduler loop
+        """
+        self.thread = threading.Thread(target=self.run, name='scheduler', daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """
+        Stop the scheduler loop and wait for its thread to finish.
+        """
+        self.stopEvent.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def report(self):
+        """
+        Return the timing statistics for every task.
+
+        Returns:
+        --------
+        list of dict : One PeriodicTask.stats() dictionary per task
+        """
+        return [task.stats() for task in self.tasks]
+
+    def formatReport(self):
+        """
+        Return the timing statistics as a printable table.
+
+        Example output:
+        ---------------
+        task          rate    runs  overruns  skipped  errors  avg jitter  max jitter  max run
+        control      200.0   12000         3        5       0     0.081ms     2.310ms  0.402ms
+        """
+        lines = [f"{'task':<12}{'rate':>7}{'runs':>8}{'overruns':>10}{'skipped':>9}{'errors':>8}"
+                 f"{'avg jitter':>12}{'max jitter':>12}{'max run':>10}"]
+        for stats in self.report():
+            lines.append(f"{stats['name']:<12}{stats['rate']:>7.1f}{stats['runs']:>8}"
+                         f"{stats['overruns']:>10}{stats['skipped']:>9}{stats['errors']:>8}"
+                         f"{stats['avgJitterMs']:>10.3f}ms{stats['maxJitterMs']:>10.3f}ms"
+                         f"{stats['maxDurationMs']:>8.3f}ms")
+        for task in self.tasks:
+            if task.lastError is not None:
+                lines.append(f"{task.name}: last error: {task.lastError!r}")
+        return '\n'.join(lines)
@@ -0,0 +1,280 @@
+"""
+Simulated GPIO
+==============
+A stand-in for the RPi.GPIO library that runs on any computer.
+
+Nothing is switched on or off. Instead, every call is recorded with the
+time it happened, so you can:
+- Run the robot program, tests and benchmarks without a Raspberry Pi
+- Count exactly how many GPIO calls your driving produces
+- See what duty cycle each pin had at any moment, and on average
+
+It has the same functions and constants as RPi.GPIO, and raises the same
+kind of errors for common mistakes (using a pin before setup(), a duty
+cycle outside 0-100), so bugs show up here before they reach the robot.
+
+Select it with ROBOT_GPIO=sim (see robot.gpio).
+
+Example:
+--------
+    from robot import gpio, simgpio
+    from robot.motor import initMotors, moveMotor1
+
+    gpio.setBackend('sim')
+    initMotors()
+    moveMotor1(0.5)
+
+    simgpio.counts['ChangeDutyCycle']   # How many duty cycle writes
+    simgpio.dutyAt(21)                  # Duty of GPIO 21 right now: 50.0
+    print(simgpio.summary())
+"""
+
+import bisect
+import time
+from collections import Counter
+
+# Constants with the same names as in RPi.GPIO
+BCM = 11
+BOARD = 10
+OUT = 0
+IN = 1
+LOW = 0
+HIGH = 1
+
+# Clock used for all timestamps. Replace it (e.g. with a fake clock) to
+# simulate time running faster than real time.
+clock = time.monotonic
+
+# When False, only the counters are kept (saves memory on long runs)
+keepHistory = True
+
+calls = []          # Every call: (time, name, pin, value)
+counts = Counter()  # Number of calls per function name
+timelines = {}      # pin -> [(time, duty), ...] - every duty cycle change
+
+mode = None         # BCM or BOARD once setmode() was called
+pinModes = {}       # pin -> OUT or IN
+pwmPins = {}        # pin -> the PWM object using it
+
+
+def record(name, pin=None, value=None):
+    """
+    Count a call and, if keepHistory is on, log it with a timestamp.
+
+    Returns:
+    --------
+    float : The time of the call
+    """
+    now = clock()
+    counts[name] += 1
+    if keepHistory:
+        calls.append((now, name, pin, value))
+    return now
+
+
+def setDutyTimeline(pin, now, duty):
+    """
+    Remember that a pin's duty cycle changed at a given time.
+    """
+    if keepHistory:
+        timelines.setdefault(pin, []).append((now, duty))
+    else:
+        # Only the newest value is needed for dutyAt() "now"
+        timelines[pin] = [(now, duty)]
+
+
+def reset():
+    """
+    Forget everything: calls, counters, pin setup and duty timelines.
+
+    Like restarting the Raspberry Pi. Call initMotors() again afterwards.
+    """
+    global mode
+    calls.clear()
+    counts.clear()
+    timelines.clear()
+    pinModes.clear()
+    pwmPins.clear()
+    mode = None
+
+
+def setmode(newMode):
+    """Choose pin numbering: BCM (GPIO numbers) or BOARD (physical pins)."""
+    global mode
+    record('setmode', value=newMode)
+    if newMode not in (BCM, BOARD):
+        raise ValueError('An invalid mode was passed to setmode()')
+    mode = newMode
+
+
+def getmode():
+    """Return the pin numbering mode (None if not set yet)."""
+    return mode
+
+
+def setwarnings(flag):
+    """Accepted for compatibility - the simulator has no warnings to hide."""
+    record('setwarnings', value=flag)
+
+
+def setup(pin, direction, initial=LOW):
+    """Configure a pin as OUT or IN."""
+    record('setup', pin, direction)
+    if mode is None:
+        raise RuntimeError('Please set pin numbering mode using GPIO.setmode(GPIO.BOARD) '
+                           'or GPIO.setmode(GPIO.BCM)')
+    pinModes[pin] = direction
+    if direction == OUT:
+        setDutyTimeline(pin, clock(), 100.0 if initial == HIGH else 0.0)
+
+
+def output(pin, value):
+    """Switch an output pin fully on (HIGH) or off (LOW)."""
+    now = record('output', pin, value)
+    if pinModes.get(pin) != OUT:
+        raise RuntimeError('The GPIO channel has not been set up as an OUTPUT')
+    setDutyTimeline(pin, now, 100.0 if value else 0.0)
+
+
+def cleanup(pins=None):
+    """Release pins (all of them if no pins are given)."""
+    record('cleanup', pins)
+    for pin in ([pins] if isinstance(pins, int) else pins or list(pinModes)):
+        pinModes.pop(pin, None)
+        pwmPins.pop(pin, None)
+
+
+class PWM:
+    """
+    Simulated software PWM channel, used like GPIO.PWM(pin, frequency).
+    """
+
+    def __init__(self, pin, frequency):
+        record('PWM', pin, frequency)
+        if pinModes.get(pin) != OUT:
+            raise RuntimeError('You must setup() the GPIO channel as an output first')
+        if pin in pwmPins:
+            raise RuntimeError('A PWM object already exists for this GPIO channel')
+        if frequency <= 0:
+            raise ValueError('frequency must be greater than 0.0')
+
+        self.pin = pin
+        self.frequency = frequency
+        self.duty = 0.0
+        self.running = False
+        pwmPins[pin] = self
+
+    def start(self, duty):
+        """Start the PWM output with a duty cycle (0-100)."""
+        now = record('start', self.pin, duty)
+        checkDuty(duty)
+        self.duty = duty
+        self.running = True
+        setDutyTimeline(self.pin, now, duty)
+
+    def ChangeDutyCycle(self, duty):
+        """Change the duty cycle (0-100)."""
+        now = record('ChangeDutyCycle', self.pin, duty)
+        checkDuty(duty)
+        self.duty = duty
+        if self.running:
+            setDutyTimeline(self.pin, now, duty)
+
+    def ChangeFrequency(self, frequency):
+        """Change the PWM frequency in Hz."""
+        record('ChangeFrequency', self.pin, frequency)
+        if frequency <= 0:
+            raise ValueError('frequency must be greater than 0.0')
+        self.frequency = frequency
+
+    def stop(self):
+        """Stop the PWM output (the pin goes low)."""
+        now = record('stop', self.pin)
+        self.running = False
+        setDutyTimeline(self.pin, now, 0.0)
+
+
+def checkDuty(duty):
+    """Raise the same error as RPi.GPIO for a duty cycle out of range."""
+    if not 0.0 <= duty <= 100.0:
+        raise ValueError('dutycycle must have a value from 0.0 to 100.0')
+
+
+def dutyAt(pin, when=None):
+    """
+    Get the duty cycle a pin had at a given time.
+
+    Parameters:
+    -----------
+    pin : int
+        GPIO pin number
+    when : float, optional
+        Time (from the simulator's clock). Default: now
+
+    Returns:
+    --------
+    float : Duty cycle in percent (0.0 before the pin was set up)
+    """
+    timeline = timelines.get(pin)
+    if not timeline:
+        return 0.0
+    if when is None:
+        return timeline[-1][1]
+
+    # Last change at or before 'when'
+    index = bisect.bisect_right(timeline, (when, float('inf'))) - 1
+    return timeline[index][1] if index >= 0 else 0.0
+
+
+def averageDuty(pin, start, end):
+    """
+    Get a pin's average (time-weighted) duty cycle between two times.
+
+    This is what the motor actually "feels": a pin at 100% for half the
+    time and 0% for the other half averages 50%.
+
+    Parameters:
+    -----------
+    pin : int
+        GPIO pin number
+    start, end : float
+        Time range (from the simulator's clock)
+
+    Returns:
+    --------
+    float : Average duty cycle in percent
+    """
+    if end <= start:
+        return dutyAt(pin, start)
+
+    total = 0.0
+    current = dutyAt(pin, start)
+    previous = start
+    for changed, duty in timelines.get(pin, []):
+        if changed <= start:
+            continue
+        if changed >= end:
+            break
+        total += current * (changed - previous)
+        current = duty
+        previous = changed
+    total += current * (end - previous)
+
+    return total / (end - start)
+
+
+def summary():
+    """
+    Describe the recorded GPIO activity.
+
+    Returns:
+    --------
+    str : Call counts per function and the current duty of every PWM pin
+    """
+    lines = ['Simulated GPIO calls:']
+    for name, count in counts.most_common():
+        lines.append(f'  {name:<16}{count:>10,}')
+    lines.append('PWM pins (current duty):')
+    for pin in sorted(pwmPins):
+        lines.append(f'  GPIO {pin:<11}{dutyAt(pin):>9.2f}%')
+    return '\n'.join(lines)
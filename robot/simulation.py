@@ -0,0 +1,364 @@
+"""
+Robot Fleet Simulator
+=====================
+This module simulates how mecanum robots MOVE when their motors get
+power - for many robots at once, much faster than real time. It lets you
+try driver-assist ideas, kinematics changes and parameter sweeps without
+hardware.
+
+The model (per robot, per time step):
+-------------------------------------
+1. Motor power (-1 to 1, from makeMotorVector) -> target wheel speed:
+       target = power * maxWheelSpeed
+2. The motor does not reach that speed instantly. It follows with a
+   "time constant" (first-order lag): after one time constant it has
+   covered 63% of the difference, after three about 95%.
+3. Wheel speeds -> body twist (vx forward, vy left, wz turning), using
+   forward kinematics (robot.kinematics)
+4. Twist -> pose: the twist is in the ROBOT's frame, so it is rotated by
+   the robot's heading before it moves the robot on the floor. The
+   heading halfway through the step is used, which keeps circles round.
+
+Fast for many robots:
+---------------------
+All robots are stored as rows of NumPy arrays (pose is N x 3, wheel
+speeds N x 4...), and every step updates all of them with a handful of
+array operations - no Python loop over robots. Each robot may have its
+own maxWheelSpeed and timeConstant, so one simulation can compare many
+settings side by side ("parameter sweep").
+
+Driving the robots:
+-------------------
+- setCommands(): (forward, left, turn) per robot, the same commands
+  makeMotorVector() gets - converted with makeMotorMatrix()
+- setPowers(): motor powers directly
+- runCommands(): a whole timeline of commands, one row per step
+- commandsFromEvents(): turn a recorded controller session (see
+  robot.recording) into such a timeline, with drive.py's stick mapping
+
+Example usage:
+--------------
+    import numpy as np
+    from robot.simulation import Simulation
+
+    sim = Simulation(count=100, maxWheelSpeed=np.linspace(10, 30, 100))
+    sim.setCommands([1, 0, 0.5])        # All robots: forward while turning
+    sim.run(5.0)                        # 5 simulated seconds
+    print(sim.pose[:3])                 # x, y (meters), heading (radians)
+
+Requires: NumPy (pip install numpy)
+"""
+
+import numpy as np
+from . import kinematics
+from .mecanum import makeMotorMatrix
+
+# Default robot: 4 cm wheels, 20 cm track width, 18 cm wheel base
+DEFAULT_WHEEL_RADIUS = 0.04
+DEFAULT_TRACK_WIDTH = 0.20
+DEFAULT_WHEEL_BASE = 0.18
+
+# Wheel speed at full power (rad/s) - about 190 rpm
+DEFAULT_MAX_WHEEL_SPEED = 20.0
+
+# How quickly the motors follow a new power (seconds)
+DEFAULT_TIME_CONSTANT = 0.1
+
+# Simulation time step (seconds)
+DEFAULT_DT = 0.005
+
+# Smallest block of steps worth computing at once (see Simulation.step())
+BLOCK_MIN_STEPS = 64
+
+
+class Simulation:
+    """
+    N mecanum robots driving on a flat floor.
+
+    Parameters:
+    -----------
+    count : int
+        Number of robots
+    dt : float
+        Time step in seconds (fixed)
+    maxWheelSpeed : float or array of N floats
+        Wheel speed at full power, rad/s (one value, or one per robot)
+    timeConstant : float or array of N floats
+        Motor response time in seconds (one value, or one per robot)
+    robotKinematics : kinematics.Kinematics, optional
+        Wheel layout and size (default: kinematics.mecanum() with the
+        DEFAULT_ sizes above). Wheel order must match the motor order.
+
+    Attributes:
+    -----------
+    pose : numpy.ndarray, shape (N, 3)
+        x, y (meters, starting at 0) and heading (radians, counter-clockwise)
+    wheelSpeeds : numpy.ndarray, shape (N, wheels)
+        Current wheel speeds, rad/s
+    twist : numpy.ndarray, shape (N, 3)
+        Current body velocity vx, vy (m/s) and wz (rad/s), robot frame
+    powers : numpy.ndarray, shape (N, wheels)
+        Motor powers being applied
+    time : float
+        Simulated seconds so far
+    """
+
+    def __init__(self, count=1, dt=DEFAULT_DT, maxWheelSpeed=DEFAULT_MAX_WHEEL_SPEED,
+                 timeConstant=DEFAULT_TIME_CONSTANT, robotKinematics=None):
+        if count < 1:
+            raise ValueError(f'count must be at least 1, got {count}')
+        if dt <= 0:
+            raise ValueError(f'dt must be positive, got {dt}')
+
+        self.count = count
+        self.dt = dt
+        self.kinematics = robotKinematics or kinematics.mecanum(
+            DEFAULT_WHEEL_RADIUS, DEFAULT_TRACK_WIDTH, DEFAULT_WHEEL_BASE)
+        wheels = self.kinematics.wheelCount
+
+        # Per-robot settings as (N, 1) columns, so they apply to every wheel
+        self.maxWheelSpeed = self.perRobot(maxWheelSpeed, 'maxWheelSpeed')
+        timeConstant = self.perRobot(timeConstant, 'timeConstant')
+        if np.any(timeConstant < 0):
+            raise ValueError('timeConstant must not be negative')
+        # Share of the remaining difference covered in one step (exact for
+        # a first-order lag, so a big dt cannot overshoot)
+        with np.errstate(divide='ignore'):
+            self.response = np.where(timeConstant > 0, -np.expm1(-dt / timeConstant), 1.0)
+
+        # step() works on this many steps at a time (about 100,000 numbers
+        # per array). With many robots each step already has plenty of
+        # work, and the plain loop is faster: None = no blocks.
+        self.blockSteps = min(1000, 100000 // (count * wheels))
+        if self.blockSteps < BLOCK_MIN_STEPS:
+            self.blockSteps = None
+
+        self.pose = np.zeros((count, 3))
+        self.wheelSpeeds = np.zeros((count, wheels))
+        self.twist = np.zeros((count, 3))
+        self.powers = np.zeros((count, wheels))
+        self.time = 0.0
+
+    def perRobot(self, value, name):
+        """
+        Turn one value or one value per robot into an (N, 1) column.
+        """
+        column = np.broadcast_to(np.asarray(value, dtype=float), (self.count,))
+        if not np.all(np.isfinite(column)):
+            raise ValueError(f'{name} must be finite')
+        return column.reshape(self.count, 1).copy()
+
+    def reset(self):
+        """
+        Put every robot back at the origin, standing still.
+        """
+        self.pose[:] = 0.0
+        self.wheelSpeeds[:] = 0.0
+        self.twist[:] = 0.0
+        self.powers[:] = 0.0
+        self.time = 0.0
+
+    def setPowers(self, powers):
+        """
+        Set the motor powers (-1 to 1).
+
+        Parameters:
+        -----------
+        powers : array-like, shape (wheels,) or (N, wheels)
+            One vector for all robots, or one row per robot
+        """
+        self.powers[:] = np.clip(powers, -1.0, 1.0)
+
+    def setCommands(self, commands):
+        """
+        Set movement commands, like makeMotorVector(forward, left, turn).
+
+        Parameters:
+        -----------
+        commands : array-like, shape (3,) or (N, 3)
+            [forward, left, turn] for all robots, or one row per robot
+        """
+        commands = np.asarray(commands, dtype=float)
+        self.setPowers(makeMotorMatrix(commands.reshape(-1, 3)))
+
+    def step(self, steps=1):
+        """
+        Advance the simulation by one or more time steps.
+
+        The powers stay the same during these steps, which allows a
+        shortcut: the wheel speeds after step k have a formula
+        (target + difference * (1 - response) ** k), so a whole block of
+        steps is worked out with array operations over time as well as
+        over robots. The result is the same step-by-step integration as
+        stepOnce() (equal to about 1e-12), just without a Python loop per
+        step - much faster for a few robots.
+        """
+        if steps == 1 or self.blockSteps is None:
+            for _ in range(steps):
+                self.stepOnce()
+            return
+
+        targets = self.powers * self.maxWheelSpeed
+        done = 0
+        while done < steps:
+            block = min(steps - done, self.blockSteps)
+            self.stepBlock(targets, block)
+            done += block
+
+    def stepOnce(self):
+        """
+        Advance every robot by exactly one time step.
+        """
+        dt = self.dt
+        targets = self.powers * self.maxWheelSpeed
+
+        # 1-2. Motors follow their target speed
+        self.wheelSpeeds += (targets - self.wheelSpeeds) * self.response
+
+        # 3. Wheel speeds -> body twist (robot frame)
+        np.matmul(self.wheelSpeeds, self.kinematics.pseudoInverseT, out=self.twist)
+
+        # 4. Rotate into the floor's frame with the mid-step heading, and move
+        vx = self.twist[:, 0]
+        vy = self.twist[:, 1]
+        wz = self.twist[:, 2]
+        heading = self.pose[:, 2] + wz * (dt / 2)
+        cos = np.cos(heading)
+        sin = np.sin(heading)
+        self.pose[:, 0] += (vx * cos - vy * sin) * dt
+        self.pose[:, 1] += (vx * sin + vy * cos) * dt
+        self.pose[:, 2] += wz * dt
+        self.time += dt
+
+    def stepBlock(self, targets, count):
+        """
+        Advance every robot by 'count' steps with fixed targets (see step()).
+
+        Arrays here have one row per step: shape (count, N, ...).
+        """
+        dt = self.dt
+        # (1 - response) ** k for k = 1..count
+        decay = (1.0 - self.response)[np.newaxis] ** np.arange(1, count + 1).reshape(count, 1, 1)
+        wheelSpeeds = targets + (self.wheelSpeeds - targets) * decay
+        twist = wheelSpeeds @ self.kinematics.pseudoInverseT
+
+        turned = twist[:, :, 2] * dt
+        headingAfter = self.pose[:, 2] + np.cumsum(turned, axis=0)
+        heading = headingAfter - turned / 2
+        cos = np.cos(heading)
+        sin = np.sin(heading)
+        vx = twist[:, :, 0]
+        vy = twist[:, :, 1]
+        self.pose[:, 0] += np.sum((vx * cos - vy * sin) * dt, axis=0)
+        self.pose[:, 1] += np.sum((vx * sin + vy * cos) * dt, axis=0)
+        self.pose[:, 2] = headingAfter[-1]
+
+        self.wheelSpeeds[:] = wheelSpeeds[-1]
+        self.twist[:] = twist[-1]
+        self.time += count * dt
+
+    def run(self, seconds):
+        """
+        Simulate a number of seconds with the current powers.
+        """
+        self.step(max(0, round(seconds / self.dt)))
+
+    def runCommands(self, commands, record=False):
+        """
+        Play a timeline of movement commands, one row per time step.
+
+        Parameters:
+        -----------
+        commands : array-like, shape (steps, 3) or (steps, N, 3)
+            The same commands for every robot, or different ones per robot
+        record : bool
+            If True, return the pose after every step
+
+        Returns:
+        --------
+        numpy.ndarray, shape (steps, N, 3), or None : Poses, if recorded
+        """
+        commands = np.asarray(commands, dtype=float)
+        steps = commands.shape[0]
+        # Convert every command at once (not once per step)
+        powers = makeMotorMatrix(commands.reshape(-1, 3))
+        powers = powers.reshape(steps, -1, powers.shape[1])
+
+        if record:
+            poses = np.empty((steps, self.count, 3))
+            for index in range(steps):
+                self.powers[:] = powers[index]
+                self.stepOnce()
+                poses[index] = self.pose
+            return poses
+
+        # Replayed input holds the same command for many steps in a row:
+        # run each such stretch with one step() call
+        changes = np.flatnonzero(np.any(powers[1:] != powers[:-1], axis=(1, 2))) + 1
+        bounds = [0] + changes.tolist() + [steps]
+        for first, end in zip(bounds, bounds[1:]):
+            self.powers[:] = powers[first]
+            self.step(end - first)
+        return None
+
+    def speed(self):
+        """
+        Ground speed of every robot in m/s.
+
+        Returns:
+        --------
+        numpy.ndarray, shape (N,)
+        """
+        return np.hypot(self.twist[:, 0], self.twist[:, 1])
+
+
+def commandsFromEvents(events, dt=DEFAULT_DT):
+    """
+    Turn controller events into a command timeline for runCommands().
+
+    The events go through the same frame handling (controller.FrameBuilder)
+    and stick mapping (drive.updateAxis) as when driving, and the command
+    that was active at each time step is sampled.
+
+    Parameters:
+    -----------
+    events : iterable of events
+        For example robot.recording.readEvents('session.rbev')
+    dt : float
+        Time step of the timeline (use the Simulation's dt)
+
+    Returns:
+    --------
+    numpy.ndarray, shape (steps, 3) : [forward, left, turn] per step
+    """
+    # Imported here: only needed for replayed input
+    from . import controller, drive
+
+    saved = (drive.forward, drive.left, drive.turn)
+    drive.resetAxes()
+    builder = controller.FrameBuilder()
+    rows = []
+    start = None
+
+    try:
+        for event in events:
+            stamp = event.timestamp()
+            if start is None:
+                start = stamp
+            # Every step that began before this event used the old command
+            steps = int((stamp - start) / dt)
+            command = (drive.forward, drive.left, drive.turn)
+            while len(rows) < steps:
+                rows.append(command)
+
+            frame = builder.feed(event)
+            if frame is not None:
+                for name, value in frame.items():
+                    if name in controller.stickNames:
+                        drive.updateAxis(name, value)
+
+        rows.append((drive.forward, drive.left, drive.turn))
+    finally:
+        drive.forward, drive.left, drive.turn = saved
+
+    return np.array(rows, dtype=float)
@@ -0,0 +1,300 @@
+"""
+Hardware PWM through sysfs
+==========================
+A GPIO backend that drives the motors with HARDWARE PWM channels, using
+the Linux kernel's PWM interface in /sys/class/pwm.
+
+Why?
+----
+RPi.GPIO makes PWM in software: a busy thread per channel switches the pin
+on and off. With 8 motor channels that costs a noticeable part of the
+Pi's CPU, and the waveform jitters whenever the CPU is busy. A hardware
+PWM channel makes the waveform by itself - the program only writes a new
+duty cycle when the motor command changes.
+
+How the kernel interface works:
+-------------------------------
+Every PWM controller appears as a directory /sys/class/pwm/pwmchipN.
+Writing a channel number to its 'export' file creates a directory for
+that channel (pwmchipN/pwm0, pwm1, ...) with these files:
+
+    period       Length of one PWM cycle in nanoseconds
+    duty_cycle   How long the signal is ON in each cycle, in nanoseconds
+    enable       1 = output running, 0 = stopped
+
+This module keeps those files open (one file descriptor each) and writes
+the new number into them, so a duty cycle change costs a single system
+call instead of open + write + close.
+
+Which pins have hardware PWM?
+-----------------------------
+Only some pins, and it depends on the board and overlays:
+- Raspberry Pi 4: 2 channels (GPIO 12/18 and 13/19) with dtoverlay=pwm-2chan
+- Raspberry Pi 5: 4 channels (GPIO 12, 13, 18, 19) with dtoverlay=pwm-2chan
+  or pwm (the chip is usually pwmchip2 there)
+- A PCA9685 board on I2C (dtoverlay=i2c-pwm-pca9685a) adds 16 channels -
+  enough for all 8 motor channels
+
+Because of this, you tell the backend which PWM channel belongs to which
+pin. Set the ROBOT_PWM_CHANNELS environment variable to a list of
+pin=chip:channel entries, for example for a PCA9685 that is pwmchip0:
+
+    ROBOT_GPIO=sysfs ROBOT_PWM_CHANNELS=21=0:0,20=0:1,16=0:2,26=0:3,19=0:4,13=0:5,6=0:6,5=0:7 \\
+        python3 run_robot.py
+
+or call setChannels() from Python before initMotors().
+
+The GPIO pin numbers are only names here: the motor code keeps using
+them, and this module translates them to PWM channels.
+
+Testing without hardware:
+-------------------------
+Set ROBOT_PWM_SYSFS (or the sysfsRoot variable) to a directory that looks
+like /sys/class/pwm. Every value is written with a trailing newline, so in
+a plain file the first line always holds the newest value.
+"""
+
+import os
+import time
+
+# Constants with the same names as in RPi.GPIO
+BCM = 11
+BOARD = 10
+OUT = 0
+IN = 1
+LOW = 0
+HIGH = 1
+
+# Where the kernel's PWM controllers are (change it to test with a fake tree)
+sysfsRoot = os.environ.get('ROBOT_PWM_SYSFS', '/sys/class/pwm')
+
+# How long to wait for a newly exported channel to appear (seconds). udev
+# may need a moment to give the files the right permissions.
+exportTimeout = 1.0
+
+NANOSECONDS = 1000000000
+
+mode = None         # BCM or BOARD once setmode() was called
+pinModes = {}       # pin -> OUT or IN
+pwmPins = {}        # pin -> the PWM object using it
+
+
+def parseChannels(text):
+    """
+    Read a pin-to-channel list like '21=0:0,20=0:1'.
+
+    Parameters:
+    -----------
+    text : str
+        Comma separated pin=chip:channel entries
+
+    Returns:
+    --------
+    dict : {pin: (chip, channel)}
+    """
+    channels = {}
+    for entry in text.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            pin, target = entry.split('=')
+            chip, channel = target.split(':')
+            channels[int(pin)] = (int(chip), int(channel))
+        except ValueError:
+            raise ValueError(f"Bad PWM channel entry '{entry}' (use pin=chip:channel, e.g. 21=0:0)")
+    return channels
+
+
+# GPIO pin -> (pwmchip number, channel number)
+channels = parseChannels(os.environ.get('ROBOT_PWM_CHANNELS', ''))
+
+
+def setChannels(mapping):
+    """
+    Choose which hardware PWM channel drives which GPIO pin.
+
+    Call this before initMotors().
+
+    Parameters:
+    -----------
+    mapping : dict or str
+        {pin: (chip, channel)}, or a string like '21=0:0,20=0:1'
+    """
+    global channels
+    if isinstance(mapping, str):
+        mapping = parseChannels(mapping)
+    channels = {int(pin): (int(chip), int(channel)) for pin, (chip, channel) in mapping.items()}
+
+
+def writeValue(fd, value):
+    """
+    Write a number to an open sysfs file.
+
+    The kernel reads the whole write as one value, whatever the file
+    position, so writing at offset 0 is both correct for sysfs and keeps
+    the newest value on the first line of a plain (fake) file.
+    """
+    os.pwrite(fd, b'%d\n' % value, 0)
+
+
+def setmode(newMode):
+    """Choose pin numbering: BCM (GPIO numbers) or BOARD (physical pins)."""
+    global mode
+    if newMode not in (BCM, BOARD):
+        raise ValueError('An invalid mode was passed to setmode()')
+    mode = newMode
+
+
+def getmode():
+    """Return the pin numbering mode (None if not set yet)."""
+    return mode
+
+
+def setwarnings(flag):
+    """Accepted for compatibility - there are no warnings to hide."""
+
+
+def setup(pin, direction, initial=LOW):
+    """
+    Configure a pin as OUT.
+
+    Only pins listed in 'channels' can be outputs, because every output is
+    a hardware PWM channel.
+    """
+    if mode is None:
+        raise RuntimeError('Please set pin numbering mode using GPIO.setmode(GPIO.BOARD) '
+                           'or GPIO.setmode(GPIO.BCM)')
+    if direction == OUT and pin not in channels:
+        raise RuntimeError(f'GPIO {pin} has no hardware PWM channel - '
+                           f'add it to ROBOT_PWM_CHANNELS (e.g. {pin}=0:0)')
+    pinModes[pin] = direction
+
+
+def output(pin, value):
+    """Switch an output pin fully on (HIGH) or off (LOW)."""
+    if pinModes.get(pin) != OUT:
+        raise RuntimeError('The GPIO channel has not been set up as an OUTPUT')
+    pwm = pwmPins.get(pin)
+    if pwm is None:
+        # A plain output is a PWM channel at 0% or 100%
+        pwm = PWM(pin, 100)
+    pwm.start(100 if value else 0)
+
+
+def cleanup(pins=None):
+    """Stop and release pins (all of them if no pins are given)."""
+    for pin in ([pins] if isinstance(pins, int) else pins or list(pinModes)):
+        pwm = pwmPins.pop(pin, None)
+        if pwm is not None:
+            pwm.close()
+        pinModes.pop(pin, None)
+
+
+class PWM:
+    """
+    Hardware PWM channel, used like GPIO.PWM(pin, frequency).
+
+    Opening the channel exports it (if needed) and opens its period,
+    duty_cycle and enable files. They stay open until cleanup().
+    """
+
+    def __init__(self, pin, frequency):
+        if pinModes.get(pin) != OUT:
+            raise RuntimeError('You must setup() the GPIO channel as an output first')
+        if pin in pwmPins:
+            raise RuntimeError('A PWM object already exists for this GPIO channel')
+        if frequency <= 0:
+            raise ValueError('frequency must be greater than 0.0')
+
+        self.pin = pin
+        self.chip, self.channel = channels[pin]
+        self.chipPath = os.path.join(sysfsRoot, f'pwmchip{self.chip}')
+        self.path = os.path.join(self.chipPath, f'pwm{self.channel}')
+        self.exported = self.export()
+
+        self.periodFd = os.open(os.path.join(self.path, 'period'), os.O_WRONLY)
+        self.dutyFd = os.open(os.path.join(self.path, 'duty_cycle'), os.O_WRONLY)
+        self.enableFd = os.open(os.path.join(self.path, 'enable'), os.O_WRONLY)
+
+        self.duty = 0.0
+        self.running = False
+        self.period = 0
+        self.setPeriod(frequency)
+        pwmPins[pin] = self
+
+    def export(self):
+        """
+        Make the kernel create the channel's directory, if it is not there yet.
+
+        Returns:
+        --------
+        bool : True if this object exported it (and should unexport it)
+        """
+        if os.path.isdir(self.path):
+            return False
+
+        with open(os.path.join(self.chipPath, 'export'), 'w') as file:
+            file.write(f'{self.channel}\n')
+
+        deadline = time.monotonic() + exportTimeout
+        while not os.access(os.path.join(self.path, 'duty_cycle'), os.W_OK):
+            if time.monotonic() > deadline:
+                raise RuntimeError(f'{self.path} did not appear after exporting PWM channel '
+                                   f'{self.channel} of pwmchip{self.chip}')
+            time.sleep(0.01)
+        return True
+
+    def setPeriod(self, frequency):
+        """
+        Write the period for a frequency and keep the duty cycle percentage.
+        """
+        self.frequency = frequency
+        # duty_cycle may never be longer than period, so clear it first
+        writeValue(self.dutyFd, 0)
+        self.period = round(NANOSECONDS / frequency)
+        writeValue(self.periodFd, self.period)
+        if self.running:
+            writeValue(self.dutyFd, round(self.period * self.duty / 100))
+
+    def start(self, duty):
+        """Start the PWM output with a duty cycle (0-100)."""
+        checkDuty(duty)
+        self.duty = duty
+        writeValue(self.dutyFd, round(self.period * duty / 100))
+        if not self.running:
+            writeValue(self.enableFd, 1)
+            self.running = True
+
+    def ChangeDutyCycle(self, duty):
+        """Change the duty cycle (0-100). This is one write() to duty_cycle."""
+        checkDuty(duty)
+        self.duty = duty
+        writeValue(self.dutyFd, round(self.period * duty / 100))
+
+    def ChangeFrequency(self, frequency):
+        """Change the PWM frequency in Hz."""
+        if frequency <= 0:
+            raise ValueError('frequency must be greater than 0.0')
+        self.setPeriod(frequency)
+
+    def stop(self):
+        """Stop the PWM output (the pin goes low)."""
+        if self.running:
+            writeValue(self.enableFd, 0)
+            self.running = False
+
+    def close(self):
+        """Stop the output, close the files and unexport the channel."""
+        self.stop()
+        for fd in (self.periodFd, self.dutyFd, self.enableFd):
+            os.close(fd)
+        if self.exported:
+            with open(os.path.join(self.chipPath, 'unexport'), 'w') as file:
+                file.write(f'{self.channel}\n')
+
+
+def checkDuty(duty):
+    """Raise the same error as RPi.GPIO for a duty cycle out of range."""
+    if not 0.0 <= duty <= 100.0:
+        raise ValueError('dutycycle must have a value from 0.0 to 100.0')
@@ -0,0 +1,111 @@
+"""
+Test Stand-ins
+==============
+Small fakes shared by several test scripts, so each of them is written
+(and fixed) only once:
+
+- NullGPIO: a GPIO library that accepts every call and records nothing
+- CountingGPIO: the same, but it remembers every duty cycle write
+- FakeClock: a clock that only moves when the test says so
+- FakeDevice: a controller that sends some events, then fails, ends or
+  goes quiet
+
+Usage (from a test script in this directory):
+    from fakes import CountingGPIO, FakeClock
+
+This is not a test itself - pytest only collects the test_*.py files.
+"""
+
+import asyncio
+
+
+class NullGPIO:
+    """
+    GPIO stand-in that accepts every call and records nothing.
+
+    Use it where even the GPIO simulator (robot.simgpio) is too much, for
+    example when measuring memory: the simulator records every call on
+    purpose, which allocates memory.
+    """
+    BCM = 11
+    OUT = 0
+
+    @staticmethod
+    def setmode(mode):
+        pass
+
+    @staticmethod
+    def setup(pin, direction):
+        pass
+
+    class PWM:
+        def __init__(self, pin, frequency):
+            self.pin = pin
+            self.duty = 0.0
+
+        def start(self, duty):
+            self.duty = duty
+
+        def ChangeDutyCycle(self, duty):
+            self.duty = duty
+
+
+class CountingGPIO(NullGPIO):
+    """
+    GPIO stand-in that remembers every duty cycle write.
+
+    writes is a list of (pin, duty) for every ChangeDutyCycle() call, in
+    order (start() is not counted). Clear it before the part you check.
+    """
+    writes = []
+
+    class PWM(NullGPIO.PWM):
+        def ChangeDutyCycle(self, duty):
+            self.duty = duty
+            CountingGPIO.writes.append((self.pin, duty))
+
+
+class FakeClock:
+    """A clock that only moves when the test says so."""
+
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+class FakeDevice:
+    """
+    A controller that sends some events, then fails, ends, or goes quiet.
+
+    Parameters:
+    -----------
+    events : list
+        Events to send (for example robot.recording.RecordedEvent)
+    failure : Exception, optional
+        Raised after the events, like a controller that was unplugged
+    endless : bool
+        Wait forever after the events (async_read_loop() only), like a
+        controller that is still connected but nobody touches
+    """
+
+    def __init__(self, events, failure=None, endless=False):
+        self.events = events
+        self.failure = failure
+        self.endless = endless
+        self.closed = False
+
+    def read_loop(self):
+        yield from self.events
+        if self.failure is not None:
+            raise self.failure
+
+    async def async_read_loop(self):
+        for event in self.read_loop():
+            yield event
+        if self.endless:
+            await asyncio.Event().wait()     # Nothing more, ever
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Asyncio Drive Test
+==================
+This script runs the asyncio version of the drive program (drive.run())
+with the GPIO simulator and a fake controller:
+
+- stick frames reach the motors, and the motors are stopped at the end
+- a motor write that fails on the motor thread ends run() with that
+  error (and stopped motors) instead of being ignored
+- a failed final stop is reported too
+
+Run it directly, or with pytest:
+    python3 tests/test_async_drive.py
+    python3 -m pytest tests/test_async_drive.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from robot import controller, drive, gpio, motor, simgpio
+from robot.controller import EV_ABS, EV_SYN, SYN_REPORT
+from robot.recording import RecordedEvent
+from fakes import FakeDevice
+
+FULL_FORWARD = [RecordedEvent(0, 0, EV_ABS, 1, -32767), RecordedEvent(0, 0, EV_SYN, SYN_REPORT, 0)]
+
+
+def runWith(device, **patches):
+    """
+    Run drive.run() on the simulator with the given device and drive
+    functions replaced; return what it raised (or None).
+    """
+    gpio.setBackend('sim')
+    simgpio.reset()
+    saved = {name: getattr(drive, name) for name in patches}
+    saved['connectToController'] = drive.connectToController
+
+    def connect():
+        controller.controller = device
+
+    drive.connectToController = connect
+    for name, value in patches.items():
+        setattr(drive, name, value)
+    try:
+        asyncio.run(asyncio.wait_for(drive.run(), 5))
+        return None
+    except Exception as error:
+        return error
+    finally:
+        for name, value in saved.items():
+            setattr(drive, name, value)
+        controller.controller = None
+        drive.resetAxes()
+
+
+def motorPins():
+    return [pin for pair in motor.DEFAULT_PINS for pin in pair]
+
+
+def test_frames_drive_the_motors_and_run_stops_them():
+    assert runWith(FakeDevice(FULL_FORWARD)) is None
+    # Every motor went full forward, then everything was stopped
+    assert all(max(duty for _, duty in simgpio.timelines[forward]) == 100.0
+               for forward, backward in motor.DEFAULT_PINS)
+    assert [simgpio.dutyAt(pin) for pin in motorPins()] == [0.0] * 8
+
+
+def test_motor_error_ends_run():
+    def brokenWrite():
+        raise OSError(5, 'PWM write failed')
+
+    # The controller stays connected: the error must still end run()
+    error = runWith(FakeDevice(FULL_FORWARD, endless=True), setMotors=brokenWrite)
+    assert isinstance(error, OSError) and error.strerror == 'PWM write failed'
+    assert [simgpio.dutyAt(pin) for pin in motorPins()] == [0.0] * 8
+
+
+def test_failed_stop_is_reported():
+    def brokenStop(powers):
+        raise OSError(5, 'PWM write failed')
+
+    error = runWith(FakeDevice([]), driveMotors=brokenStop)
+    assert isinstance(error, OSError)
+
+
+if __name__ == '__main__':
+    for test in (test_frames_drive_the_motors_and_run_stops_them,
+                 test_motor_error_ends_run,
+                 test_failed_stop_is_reported):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Axis Profile Test
+=================
+This script checks the stick response curves (robot.controller
+setAxisProfile() and its lookup tables):
+
+- deadzone, expo, invert and scale shape the value as documented
+- every entry of a table is what shapeAxis() calculates
+- axes with the same profile share one table, and unused tables are freed
+- the event loops use the tables, and plain axes stay raw / 32767
+
+Run it directly, or with pytest:
+    python3 tests/test_axis_profiles.py
+    python3 -m pytest tests/test_axis_profiles.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot import controller
+from robot.controller import AXIS_RAW_MIN, EV_ABS, EV_SYN, SYN_REPORT, shapeAxis
+from robot.recording import RecordedEvent
+
+
+def test_curve_settings():
+    assert shapeAxis(1000, deadzone=0.05) == 0.0                 # 0.03: inside the deadzone
+    assert shapeAxis(32767, deadzone=0.05) == 1.0                # Full stick is still full
+    assert abs(shapeAxis(32767 // 2 + 1, expo=1.0) - 0.125) < 1e-4   # Half stick, cubic
+    assert shapeAxis(32767, invert=True, scale=0.7) == -0.7
+    assert shapeAxis(-32768) == -1.0                             # Clamped to the range
+
+    # Just outside the deadzone the output starts near 0, not at 'deadzone'
+    assert 0 < shapeAxis(int(0.06 * 32767), deadzone=0.05) < 0.02
+
+
+def test_tables_match_the_curve_and_are_shared():
+    try:
+        controller.setAxisProfile('stick1-Y', deadzone=0.1, expo=0.5, scale=0.8)
+        table = controller.axisTables[1]
+        assert len(table) == 65536
+        for raw in (-32768, -20000, -3276, 0, 3277, 16384, 32767):
+            assert table[raw - AXIS_RAW_MIN] == shapeAxis(raw, 0.1, 0.5, False, 0.8)
+
+        # Same settings again: nothing is rebuilt; another axis shares the table
+        controller.setAxisProfile('stick1-Y', deadzone=0.1, expo=0.5, scale=0.8)
+        controller.setAxisProfile('stick2-Y', deadzone=0.1, expo=0.5, scale=0.8)
+        assert controller.axisTables[1] is table and controller.axisTables[4] is table
+        assert len(controller.tableCache) == 1
+
+        controller.setAxisProfile('stick2-Y', invert=True)
+        assert len(controller.tableCache) == 2
+        controller.clearAxisProfile('stick1-Y')
+        assert 1 not in controller.axisTables and len(controller.tableCache) == 1
+
+        for settings in ({'deadzone': 1.0}, {'expo': 1.5}):
+            try:
+                controller.setAxisProfile('stick1-X', **settings)
+                assert False, f'{settings} must be rejected'
+            except ValueError:
+                pass
+        try:
+            controller.setAxisProfile('A', deadzone=0.1)
+            assert False, 'a button has no axis profile'
+        except ValueError as error:
+            assert "Unknown stick 'A'" in str(error)
+    finally:
+        controller.clearAxisProfile()
+    assert controller.axisTables == {} and controller.tableCache == {}
+
+
+def test_event_loops_use_the_profile():
+    events = [RecordedEvent(0, 0, EV_ABS, 1, 1000),      # stick1-Y, inside the deadzone
+              RecordedEvent(0, 0, EV_ABS, 0, 1000),      # stick1-X, no profile
+              RecordedEvent(0, 0, EV_ABS, 1, -32767),
+              RecordedEvent(0, 0, EV_SYN, SYN_REPORT, 0)]
+    sticks = []
+    frames = []
+    try:
+        controller.setAxisProfile('stick1-Y', deadzone=0.05, invert=True)
+        controller.callbackLoop(None, lambda name, value: sticks.append((name, value)), events)
+        controller.frameLoop(frames.append, events)
+        outside = controller.normalizeAxis(1, -40000)     # Outside the table: calculated
+    finally:
+        controller.clearAxisProfile()
+    assert sticks == [('stick1-Y', 0.0), ('stick1-X', 1000 / 32767), ('stick1-Y', 1.0)]
+    assert frames == [{'stick1-Y': 1.0, 'stick1-X': 1000 / 32767}]
+    assert outside == 1.0
+
+
+if __name__ == '__main__':
+    for test in (test_curve_settings,
+                 test_tables_match_the_curve_and_are_shared,
+                 test_event_loops_use_the_profile):
+        test()
+        print(f'OK  {test.__name__}')
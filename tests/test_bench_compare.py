@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark Comparison Test
+=========================
+This script checks how benchmarks/bench_pipeline.py compares a run with a
+saved baseline (compare()) and saves results (save()), with hand-made
+result sets - no benchmark is actually run:
+
+- only a slowdown over the threshold is a REGRESSION
+- a speedup over the threshold is marked 'faster'
+- new benchmarks and ones no longer measured are listed, not counted
+- the best (minimum) time is compared, not the median
+
+Run it directly, or with pytest:
+    python3 tests/test_bench_compare.py
+    python3 -m pytest tests/test_bench_compare.py
+"""
+
+import sys
+import os
+# Add the benchmarks directory to path so we can import bench_pipeline
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import json
+import tempfile
+from bench_pipeline import compare, save
+
+
+def results(**minimums):
+    """A result set like runSuite() returns, with the given minimum times (ns)."""
+    return {
+        'commit': 'abc1234',
+        'created': '2026-01-01T00:00:00',
+        # The median is deliberately far off: compare() must not use it
+        'benchmarks': {name.replace('_', '.'): {'minNs': ns, 'medianNs': ns * 10, 'repeats': 7}
+                       for name, ns in minimums.items()},
+    }
+
+
+def lineFor(lines, name):
+    return next(line for line in lines if line.startswith(name + ' '))
+
+
+def test_regressions_and_speedups_use_the_threshold():
+    baseline = results(kinematics_vector=100.0, motors_drive=200.0, pipeline_frame=400.0)
+    current = results(kinematics_vector=115.0,     # 15% slower
+                      motors_drive=208.0,          # 4% slower: noise
+                      pipeline_frame=300.0)        # 25% faster
+    lines, regressions = compare(baseline, current, 0.10)
+
+    assert regressions == ['kinematics.vector']
+    assert lines[0].split() == ['Benchmark', 'baseline', 'now', 'change']
+    assert lineFor(lines, 'kinematics.vector').endswith('+15.0%  REGRESSION')
+    assert lineFor(lines, 'motors.drive').endswith('+4.0%')
+    assert lineFor(lines, 'pipeline.frame').endswith('-25.0%  faster')
+
+    # A looser threshold lets the same slowdown pass
+    assert compare(baseline, current, 0.20)[1] == []
+
+
+def test_new_and_removed_benchmarks_are_listed_not_counted():
+    baseline = results(dispatch_callback=50.0, dispatch_old=80.0)
+    current = results(dispatch_callback=50.0, dispatch_new=1000.0)
+    lines, regressions = compare(baseline, current, 0.10)
+
+    assert regressions == []
+    assert lineFor(lines, 'dispatch.new').endswith('new')
+    assert lineFor(lines, 'dispatch.old').endswith('(no longer measured)')
+    assert lineFor(lines, 'dispatch.callback').endswith('+0.0%')
+    assert len(lines) == 4
+
+
+def test_save_writes_the_results_only_when_asked():
+    current = results(kinematics_vector=100.0)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'base.json')
+        save(current, None)
+        assert os.listdir(directory) == []
+
+        save(current, path)
+        with open(path) as file:
+            assert json.load(file) == current
+
+
+if __name__ == '__main__':
+    tests = [
+        test_regressions_and_speedups_use_the_threshold,
+        test_new_and_removed_benchmarks_are_listed_not_counted,
+        test_save_writes_the_results_only_when_asked,
+    ]
+    for test in tests:
+        test()
+        print(f"OK  {test.__name__}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Deadline Monitor Test
+=====================
+This script checks the control loop deadline monitor (robot.deadline)
+with a fake clock, so no test has to wait for a real stall:
+
+- a missed deadline stops the motors once, and the next update recovers
+- a stuck input thread makes drive.controlUpdate() stop feeding the
+  monitor while the robot moves
+- after an emergency stop the motors really get the next update, and
+  every channel is written only once
+
+Run it directly, or with pytest:
+    python3 tests/test_deadline.py
+    python3 -m pytest tests/test_deadline.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot import drive, motor
+from robot.deadline import DeadlineMonitor
+from fakes import CountingGPIO, FakeClock
+
+
+def test_missed_deadline_stops_once_and_recovers():
+    clock = FakeClock()
+    stops = []
+    monitor = DeadlineMonitor(0.05, lambda: stops.append(clock.time), clock=clock)
+
+    clock.time += 0.01
+    monitor.feed()
+    assert abs(monitor.check() - 0.05) < 1e-9 and stops == []    # Next check when due
+
+    clock.time += 0.08                                             # Nobody fed the monitor
+    monitor.check()
+    monitor.check()
+    assert stops == [clock.time] and monitor.tripped              # Stopped once
+
+    clock.time += 0.01
+    monitor.feed()
+    assert not monitor.tripped
+    assert monitor.stalls == 1 and monitor.nearMisses == 0
+    assert 'Stalls:' in monitor.report()
+
+
+def test_stuck_input_stops_feeding_while_moving():
+    clock = FakeClock()
+    monitor = DeadlineMonitor(0.05, lambda: None, inputTimeout=0.05, clock=clock)
+    assert monitor.inputFresh()
+
+    monitor.inputStarted()                 # A button callback that blocks...
+    clock.time += 0.2
+    assert not monitor.inputFresh()
+    assert not monitor.inputFresh()
+    assert monitor.inputStalls == 1        # Counted once per stall
+    monitor.inputDone()
+    assert monitor.inputFresh()            # A quiet controller is fine by default
+
+    quiet = DeadlineMonitor(0.05, lambda: None, quietTimeout=0.5, clock=clock)
+    clock.time += 1.0
+    assert not quiet.inputFresh()
+
+    # drive.controlUpdate() leaves the motors and the monitor alone
+    drive.monitor = monitor
+    updates = monitor.updates
+    try:
+        drive.forward = 1.0
+        monitor.inputStarted()
+        clock.time += 0.2
+        drive.controlUpdate()
+        assert monitor.updates == updates
+    finally:
+        drive.monitor = None
+        drive.resetAxes()
+
+
+def test_motors_catch_up_after_emergency_stop():
+    bank = motor.MotorBank(pins=[(1, 2), (3, 4)], GPIO=CountingGPIO)
+    stopNow = bank.makeStopper()
+
+    bank.apply([0.5, -0.5])
+    CountingGPIO.writes.clear()
+    stopNow()
+    assert CountingGPIO.writes == [(1, 0), (2, 0), (3, 0), (4, 0)]
+
+    # The same powers again: the cache must not skip them now
+    CountingGPIO.writes.clear()
+    bank.apply([0.5, -0.5])
+    assert sorted(CountingGPIO.writes) == [(1, 50.0), (2, 0), (3, 0), (4, 50.0)]
+
+    # ...and after that, unchanged channels are skipped again
+    CountingGPIO.writes.clear()
+    bank.apply([0.5, -0.5])
+    assert CountingGPIO.writes == []
+
+
+if __name__ == '__main__':
+    for test in (test_missed_deadline_stops_once_and_recovers,
+                 test_stuck_input_stops_feeding_while_moving,
+                 test_motors_catch_up_after_emergency_stop):
+        test()
+        print(f'OK  {test.__name__}')
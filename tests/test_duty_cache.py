@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Duty Cycle Cache Test
+=====================
+This script checks that robot.motor only calls ChangeDutyCycle() when a
+channel's output really changes:
+
+- sending the same motor powers again writes nothing
+- duties that round to the same driver step count as unchanged
+- resetDutyCache() makes the next write happen again
+- the issued/skipped counters add up
+
+A stand-in GPIO module records every write, so no hardware is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_duty_cache.py
+    python3 -m pytest tests/test_duty_cache.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot import motor
+from fakes import CountingGPIO
+
+
+def test_unchanged_powers_are_not_written():
+    bank = motor.MotorBank(pins=[(1, 2), (3, 4)], GPIO=CountingGPIO)
+    motor.resetDutyStats()
+    CountingGPIO.writes.clear()
+
+    bank.apply([0.0, 0.0])                       # Already stopped
+    assert CountingGPIO.writes == []
+
+    bank.apply([0.5, -0.25])
+    assert sorted(CountingGPIO.writes) == [(1, 50.0), (4, 25.0)]
+
+    CountingGPIO.writes.clear()
+    bank.apply([0.5, -0.25])
+    bank.apply([0.500001, -0.25])                # Same 0.01% step
+    assert CountingGPIO.writes == []
+
+    bank.apply([-0.5, -0.25])                    # Motor 1 reverses
+    assert sorted(CountingGPIO.writes) == [(1, 0.0), (2, 50.0)]
+
+    # 5 calls x 4 channels: 2 + 2 writes made, the rest skipped
+    assert motor.getDutyStats() == {'issued': 4, 'skipped': 16}
+
+
+def test_single_channel_writes_and_cache_reset():
+    bank = motor.MotorBank(pins=[(1, 2)], GPIO=CountingGPIO)
+    CountingGPIO.writes.clear()
+
+    bank.setChannel(0, 30.0)
+    bank.setChannel(0, 30.0)
+    bank.motors[0].move(0.3)                     # Same duty through Motor.move()
+    assert CountingGPIO.writes == [(1, 30.0)]
+
+    bank.resetDutyCache()                        # Something else changed the pins
+    bank.motors[0].move(0.3)
+    assert CountingGPIO.writes == [(1, 30.0), (1, 30.0), (2, 0.0)]
+
+
+if __name__ == '__main__':
+    for test in (test_unchanged_powers_are_not_written,
+                 test_single_channel_writes_and_cache_reset):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Controller Frame Test
+=====================
+This script checks how controller events are grouped into frames
+(robot.controller FrameBuilder and frameLoop()), with made-up events - no
+controller is needed:
+
+- everything up to SYN_REPORT arrives as ONE frame, so a diagonal push
+  gives one motor update instead of two
+- an axis that changes twice in a frame only keeps its newest value
+- after SYN_DROPPED the damaged part is thrown away and the sticks are
+  read again from the device
+
+Run it directly, or with pytest:
+    python3 tests/test_frames.py
+    python3 -m pytest tests/test_frames.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import types
+from robot import controller, drive
+from robot.controller import EV_ABS, EV_KEY, EV_SYN, SYN_DROPPED, SYN_REPORT
+from robot.recording import RecordedEvent
+
+
+def event(type, code, value):
+    return RecordedEvent(0, 0, type, code, value)
+
+
+def test_events_are_grouped_until_syn_report():
+    events = [
+        event(EV_ABS, 0, 16384),                 # stick1-X
+        event(EV_ABS, 1, -32767),                # stick1-Y
+        event(EV_ABS, 1, 32767),                 # stick1-Y again: newest wins
+        event(EV_SYN, SYN_REPORT, 0),
+        event(EV_SYN, SYN_REPORT, 0),            # Nothing changed: no frame
+        event(EV_KEY, 304, 1),                   # A
+        event(EV_KEY, 999, 1),                   # Unmapped: ignored
+        event(EV_SYN, SYN_REPORT, 0),
+    ]
+    frames = []
+    controller.frameLoop(frames.append, events)
+    assert frames == [{'stick1-X': 16384 / 32767, 'stick1-Y': 1.0},
+                      {'A': 1 / 32767}]
+    assert frames[0] is not frames[1]            # Each frame is a new dict
+
+
+def test_a_diagonal_push_updates_the_motors_once():
+    updates = []
+    saved = drive.setMotors
+    drive.setMotors = lambda: updates.append((drive.forward, drive.left))
+    drive.motorsFollowInput = True
+    try:
+        controller.frameLoop(drive.onFrame, [event(EV_ABS, 0, -32767),
+                                             event(EV_ABS, 1, -32767),
+                                             event(EV_SYN, SYN_REPORT, 0)])
+    finally:
+        drive.setMotors = saved
+        drive.resetAxes()
+    # Both axes were already updated when the motors were set
+    assert len(updates) == 1
+    assert updates[0][0] != 0 and updates[0][1] != 0
+
+
+def test_dropped_events_are_replaced_by_the_device_state():
+    positions = {0: 0, 1: -32767}                # stick1-X centred, stick1-Y up
+
+    def absinfo(code):
+        if code not in positions:
+            raise OSError('no such axis')
+        return types.SimpleNamespace(value=positions[code])
+
+    builder = controller.FrameBuilder()
+    controller.controller = types.SimpleNamespace(absinfo=absinfo)
+    try:
+        assert builder.feed(event(EV_ABS, 0, 500)) is None
+        assert builder.feed(event(EV_SYN, SYN_DROPPED, 0)) is None
+        assert builder.feed(event(EV_ABS, 0, 32767)) is None    # Unreliable: ignored
+        frame = builder.feed(event(EV_SYN, SYN_REPORT, 0))
+    finally:
+        controller.controller = None
+    assert frame == {'stick1-X': controller.normalizeAxis(0, 0),
+                     'stick1-Y': controller.normalizeAxis(1, -32767)}
+    assert not builder.dropping
+
+
+if __name__ == '__main__':
+    for test in (test_events_are_grouped_until_syn_report,
+                 test_a_diagonal_push_updates_the_motors_once,
+                 test_dropped_events_are_replaced_by_the_device_state):
+        test()
+        print(f'OK  {test.__name__}')
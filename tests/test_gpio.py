@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+GPIO Backend Selection Test
+===========================
+This script checks how robot.gpio picks its backend: by name with
+setBackend(), or from the ROBOT_GPIO environment variable. A wrong name
+must stop the program instead of quietly using the simulator.
+
+Run it directly, or with pytest:
+    python3 tests/test_gpio.py
+    python3 -m pytest tests/test_gpio.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import subprocess
+from robot import gpio, simgpio
+
+PROJECT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_set_backend_loads_the_simulator():
+    gpio.setBackend('sim')
+    assert gpio.getGPIO() is simgpio
+    try:
+        gpio.setBackend('rpi5')
+        assert False, 'an unknown backend name must be rejected'
+    except ValueError as error:
+        assert "Unknown GPIO backend 'rpi5'" in str(error)
+    assert gpio.getGPIO() is simgpio                 # Still the old choice
+
+
+def test_unknown_environment_value_is_an_error():
+    # A fresh interpreter, so ROBOT_GPIO is read at import like on the robot
+    script = ('from robot import gpio\n'
+              'try:\n'
+              '    gpio.getGPIO()\n'
+              'except ValueError as error:\n'
+              '    print(error)\n')
+    result = subprocess.run([sys.executable, '-c', script], cwd=PROJECT, capture_output=True,
+                            text=True, env=dict(os.environ, ROBOT_GPIO='rpi5'), check=True)
+    assert "Unknown GPIO backend 'rpi5' in ROBOT_GPIO" in result.stdout
+
+
+if __name__ == '__main__':
+    for test in (test_set_backend_loads_the_simulator,
+                 test_unknown_environment_value_is_an_error):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Hot Path Allocation Test
+========================
+This script checks that handling a stick event - from the controller loop
+through the mecanum math to the motor duty cycle writes - does not keep
+allocating memory.
+
+It uses tracemalloc (Python's memory tracer):
+1. Drive a few thousand events through the loop first, so every cache,
+   lookup table and buffer already exists ("steady state")
+2. Record how much memory is in use, then drive 20,000 more events
+3. Check that no memory was kept (no growth) and that the peak never rose
+   by more than a few bytes above the start. A new list, dictionary or
+   tuple per event would show up in the peak; so would anything kept.
+
+The motors are driven through a tiny do-nothing GPIO stand-in (NullGPIO
+from tests/fakes.py), because the GPIO simulator (robot.simgpio) records
+every call on purpose - which allocates memory.
+
+Run it directly, or with pytest:
+    python3 tests/test_hot_path.py
+    python3 -m pytest tests/test_hot_path.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+import tracemalloc
+from array import array
+from robot import controller, drive, motor
+from robot.mecanum import makeMotorVector, makeMotorVectorInto
+from robot.recording import RecordedEvent
+from fakes import NullGPIO
+
+# Events measured after the warm-up
+MEASURED_EVENTS = 20000
+
+# Largest rise of the peak allowed, in bytes. Python creates some small
+# objects that are freed again right away (an int for a counter, a bound
+# method); a list of 4 floats alone would already take more than this.
+PEAK_ALLOWANCE = 64
+
+
+def makeEvents():
+    """
+    Build an endless stream of stick events, like sweeping both sticks.
+
+    All events are created up front, so the stream itself allocates nothing.
+    """
+    events = []
+    for step in range(64):
+        raw = (step * 1031) % 65535 - 32767
+        events.append(RecordedEvent(0, step, controller.EV_ABS, 1, raw))        # stick1-Y
+        events.append(RecordedEvent(0, step, controller.EV_ABS, 0, -raw // 2))  # stick1-X
+        events.append(RecordedEvent(0, step, controller.EV_ABS, 3, raw // 3))   # stick2-X
+        events.append(RecordedEvent(0, step, controller.EV_SYN, controller.SYN_REPORT, 0))
+    return itertools.cycle(events)
+
+
+def ignoreButton(button, value):
+    pass
+
+
+def test_into_matches_makeMotorVector():
+    powers = array('d', [0.0] * 4)
+    for forward, left, turn in [(1, 0, 0), (0.5, -0.25, 0.75), (-1, 1, -1), (0, 0, 0)]:
+        assert list(makeMotorVectorInto(powers, forward, left, turn)) == \
+            makeMotorVector(forward, left, turn)
+
+
+def checkNoAllocations(loop):
+    """
+    Drive stick events through loop(events) and check the memory it kept and peaked at.
+    """
+    motor.bank = motor.MotorBank(GPIO=NullGPIO)
+    drive.motorsFollowInput = True
+    events = makeEvents()
+
+    # Warm up: fill caches, create the interned names and float free lists
+    loop(itertools.islice(events, 5000))
+
+    tracemalloc.start()
+    try:
+        loop(itertools.islice(events, 1000))
+        batch = itertools.islice(events, MEASURED_EVENTS)
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        loop(batch)
+
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        drive.resetAxes()
+
+    # (The batch's islice object was created before 'before', so it does not count)
+    print(after - before, peak - before)
+    assert after - before <= 0, f'{after - before} bytes kept after {MEASURED_EVENTS} events'
+    assert peak - before <= PEAK_ALLOWANCE, \
+        f'peak rose {peak - before} bytes while handling {MEASURED_EVENTS} events'
+    assert motor.dutyWritesIssued > 0, 'the events did not reach the motors'
+
+
+def test_event_to_motor_write_allocates_nothing():
+    checkNoAllocations(lambda events: controller.callbackLoop(ignoreButton, drive.onStick, events))
+
+
+def test_subscribed_event_to_motor_write_allocates_nothing():
+    drive.subscribeControls()
+    try:
+        checkNoAllocations(controller.subscriptionLoop)
+    finally:
+        controller.clearSubscriptions()
+
+
+if __name__ == '__main__':
+    for test in (test_into_matches_makeMotorVector,
+                 test_event_to_motor_write_allocates_nothing,
+                 test_subscribed_event_to_motor_write_allocates_nothing):
+        test()
+        print(f'OK  {test.__name__}')
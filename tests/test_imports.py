@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Lazy Import Test
+================
+This script checks that 'import robot' stays cheap: the package loads its
+submodules only when they are first used, so importing it (or just the
+math in robot.mecanum) must not pull in NumPy or evdev.
+
+Every check runs in a NEW Python process, because a module that another
+test already imported stays in sys.modules for the rest of the run (the
+same reason benchmarks/bench_import.py measures in child processes).
+
+Run it directly, or with pytest:
+    python3 tests/test_imports.py
+    python3 -m pytest tests/test_imports.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import json
+import subprocess
+
+import robot
+
+# Libraries the plain package and the math must never load
+HEAVY_LIBRARIES = ['numpy', 'evdev']
+
+# Code run in each child process: import, report what got loaded as JSON
+CHILD = """
+import sys, json
+sys.path.insert(0, {root!r})
+{code}
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def loadedBy(code):
+    """
+    Run code in a fresh Python and return the heavy libraries it loaded.
+
+    Parameters:
+    -----------
+    code : str
+        Python statements to run, e.g. 'import robot'
+
+    Returns:
+    --------
+    list
+        Names from HEAVY_LIBRARIES found in the child's sys.modules
+    """
+    child = CHILD.format(root=ROOT, code=code, heavy=HEAVY_LIBRARIES)
+    result = subprocess.run([sys.executable, '-c', child],
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_robot_loads_no_heavy_library():
+    assert loadedBy('import robot') == []
+
+
+def test_import_mecanum_loads_no_heavy_library():
+    assert loadedBy('import robot.mecanum') == []
+    assert loadedBy('from robot.mecanum import makeMotorVector\n'
+                    'makeMotorVector(0.5, 0.0, 0.0)') == []
+
+
+def test_submodule_loads_on_first_use():
+    # Attribute access alone imports the submodule, without 'import robot.scheduler'
+    assert loadedBy('import robot\n'
+                    'assert "robot.scheduler" not in sys.modules\n'
+                    'robot.scheduler.Scheduler\n'
+                    'assert "robot.scheduler" in sys.modules') == []
+
+
+def test_unknown_attribute_raises_attribute_error():
+    try:
+        robot.nosuchmodule
+        assert False, 'an unknown name must raise AttributeError'
+    except AttributeError as error:
+        assert 'nosuchmodule' in str(error)
+    # hasattr() relies on AttributeError, so it must answer False, not crash
+    assert not hasattr(robot, 'nosuchmodule')
+
+
+def test_docstring_lists_every_submodule():
+    for name in robot.submodules:
+        assert f'- {name}:' in robot.__doc__, f'{name} is missing from the docstring'
+        assert name in dir(robot)
+
+
+if __name__ == '__main__':
+    tests = [
+        test_import_robot_loads_no_heavy_library,
+        test_import_mecanum_loads_no_heavy_library,
+        test_submodule_loads_on_first_use,
+        test_unknown_attribute_raises_attribute_error,
+        test_docstring_lists_every_submodule,
+    ]
+    for test in tests:
+        test()
+        print(f"OK  {test.__name__}")
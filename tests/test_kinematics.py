@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Kinematics Test
+===============
+This script checks the matrix kinematics (robot.kinematics) against the
+hand-written mecanum math it generalizes:
+
+- the mecanum() preset with default sizes is the mecanum module's
+  forwardVec / leftVec / turnVec, and inverse() + desaturate() gives
+  exactly what makeMotorVector() gives
+- forward() undoes inverse() for real robot sizes
+- the omni and differential presets move the way they should
+- the batch functions agree with the one-at-a-time ones
+
+Requires NumPy (pip install numpy). No hardware is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_kinematics.py
+    python3 -m pytest tests/test_kinematics.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+import numpy as np
+from robot import kinematics
+from robot.mecanum import forwardVec, leftVec, turnVec, makeMotorVector
+
+COMMANDS = [-1.0, -0.6, -0.25, 0.0, 0.3, 0.75, 1.0]
+
+
+def test_mecanum_preset_matches_makeMotorVector():
+    robot = kinematics.mecanum()
+    assert robot.matrix.tolist() == [list(row) for row in zip(forwardVec, leftVec, turnVec)]
+
+    for command in itertools.product(COMMANDS, repeat=3):
+        powers = robot.desaturate(robot.inverse(*command))
+        assert np.allclose(powers, makeMotorVector(*command), atol=1e-12), command
+
+
+def test_forward_undoes_inverse():
+    robots = [kinematics.mecanum(wheelRadius=0.04, trackWidth=0.20, wheelBase=0.18),
+              kinematics.mecanum(wheelRadius=0.04, rollerAngle=30),
+              kinematics.omni(wheelRadius=0.03, robotRadius=0.12),
+              kinematics.omni(wheelAngles=(0, 120, 240))]
+    for robot in robots:
+        for twist in [(0.5, 0.0, 0.0), (0.0, -0.3, 0.0), (0.2, 0.1, 1.5)]:
+            assert np.allclose(robot.forward(robot.inverse(*twist)), twist), robot.wheelNames
+
+
+def test_differential_and_omni_presets():
+    tank = kinematics.differential(wheelRadius=0.5, trackWidth=0.2)
+    assert tank.inverse(1.0, 0.0, 0.0).tolist() == [2.0, 2.0]     # Straight: both the same
+    left, right = tank.inverse(0.0, 0.0, 1.0)
+    assert left == -right < 0                                     # Turning left on the spot
+    assert tank.forward(tank.inverse(0.4, 0.7, 0.0))[1] == 0.0    # It cannot strafe
+
+    kiwi = kinematics.omni(wheelAngles=(0, 120, 240))
+    spin = kiwi.inverse(0.0, 0.0, 1.0)
+    assert np.allclose(spin, spin[0])                             # All wheels alike
+
+    try:
+        kinematics.Kinematics([[1, 0], [0, 1]])
+        assert False, 'a mixing matrix needs three columns'
+    except ValueError as error:
+        assert 'shape (wheels, 3)' in str(error)
+
+
+def test_batches_match_single_calls():
+    robot = kinematics.mecanum(wheelRadius=0.04, trackWidth=0.20, wheelBase=0.18)
+    twists = np.array(list(itertools.product(COMMANDS, repeat=3)))
+    wheels = robot.inverseBatch(twists)
+    assert wheels.shape == (len(twists), 4)
+    for twist, row in zip(twists, wheels):
+        assert np.allclose(row, robot.inverse(*twist))
+    assert np.allclose(robot.forwardBatch(wheels), twists)
+
+    limited = robot.desaturate(wheels, limit=10.0)
+    assert np.max(np.abs(limited)) <= 10.0 + 1e-9
+    slow = np.abs(wheels).max(axis=1) <= 10.0
+    assert np.array_equal(limited[slow], wheels[slow])           # Slow ones are untouched
+
+
+if __name__ == '__main__':
+    for test in (test_mecanum_preset_matches_makeMotorVector,
+                 test_forward_undoes_inverse,
+                 test_differential_and_omni_presets,
+                 test_batches_match_single_calls):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Latency Histogram Test
+======================
+This script checks the input-to-motor latency measurement
+(robot.latency):
+
+- the log buckets: one per microsecond below 32 us, then 16 per doubling,
+  with no gaps or overlaps between neighbours
+- percentiles come from the bucket edges but never exceed the largest
+  measurement
+- the oldest waiting input is the one that gets measured
+
+Run it directly, or with pytest:
+    python3 tests/test_latency.py
+    python3 -m pytest tests/test_latency.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from robot import latency
+from robot.latency import MAX_MICROSECONDS, LatencyHistogram
+
+
+def test_bucket_boundaries():
+    histogram = LatencyHistogram()
+    index = LatencyHistogram.bucketIndex
+    upper = LatencyHistogram.bucketUpperBound
+    assert histogram.bucketCount == 384 and index(MAX_MICROSECONDS) == 383
+
+    # Exact below 32 us, then two microseconds per bucket up to 64 us
+    assert [index(value) for value in (0, 1, 31, 32, 33, 34, 63, 64)] == \
+        [0, 1, 31, 32, 32, 33, 47, 48]
+
+    # Each bucket starts right after the one before it ends
+    for bucket in range(histogram.bucketCount - 1):
+        top = upper(bucket)
+        assert index(top) == bucket and index(top + 1) == bucket + 1, bucket
+        if bucket >= 32:
+            bottom = upper(bucket - 1) + 1
+            assert (top - bottom + 1) / bottom <= 1 / 16      # At most ~6% wide
+    assert upper(383) == MAX_MICROSECONDS
+
+
+def test_percentiles():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(99) == 0.0                     # Nothing recorded yet
+
+    for _ in range(990):
+        histogram.record(0.000100)                             # 100 us
+    for _ in range(10):
+        histogram.record(0.005)                                # 5 ms
+    histogram.record(-0.001)                                   # Clock change: ignored
+
+    summary = histogram.summary()
+    assert summary['count'] == 1000
+    assert 0.100 <= summary['p50Ms'] <= 0.100 * 1.07          # Upper edge of its bucket
+    assert summary['p99Ms'] == summary['p50Ms']
+    assert summary['p999Ms'] == summary['maxMs'] == 5.0         # Capped at the maximum
+
+    histogram.record(500.0)                                    # Beyond the last bucket
+    assert histogram.buckets[-1] == 1 and histogram.maxSeconds == 500.0
+    assert histogram.percentile(100) == MAX_MICROSECONDS / 1000000
+    histogram.reset()
+    assert histogram.count == 0 and sum(histogram.buckets) == 0
+
+
+def test_oldest_waiting_input_is_measured():
+    latency.histogram.reset()
+    latency.enable()
+    try:
+        latency.eventTime = time.time() - 0.050              # An event 50 ms ago...
+        latency.commandChanged()
+        latency.eventTime = time.time()                      # ...and a newer one
+        latency.commandChanged()
+        latency.motorsWritten()
+        latency.motorsWritten()                              # Nothing new: not recorded
+    finally:
+        latency.disable()
+    assert latency.histogram.count == 1
+    assert latency.histogram.maxSeconds >= 0.050
+    assert 'Input->motor latency: 1 updates' in latency.report()
+    latency.histogram.reset()
+
+
+if __name__ == '__main__':
+    for test in (test_bucket_boundaries,
+                 test_percentiles,
+                 test_oldest_waiting_input_is_measured):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Logging Test
+============
+This script checks that robot.log never makes the caller wait for a slow
+console, and that the messages it leaves out are counted. It also checks
+that drive.start() starts the writer thread before it gives the input
+thread real-time priority.
+
+A "slow console" is simulated with a sink that sleeps on every write.
+
+Run it directly, or with pytest:
+    python3 tests/test_log.py
+    python3 -m pytest tests/test_log.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from robot import drive, gpio, log, realtime, simgpio
+
+
+class SlowSink:
+    """
+    Collects lines, taking 20 ms per write like a slow serial console.
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text):
+        time.sleep(0.02)
+        self.lines.extend(text.splitlines())
+
+    def flush(self):
+        pass
+
+
+def useSink(sink, maxQueued=1000):
+    log.stop()
+    log.reset()
+    log.sink = sink
+    log.maxQueued = maxQueued
+
+
+def restore():
+    log.stop()
+    log.reset()
+    log.sink = None
+    log.maxQueued = 1000
+
+
+def test_slow_sink_does_not_block_and_drops_are_counted():
+    sink = SlowSink()
+    useSink(sink, maxQueued=100)
+    try:
+        log.start()
+        slowest = 0.0
+        for number in range(2000):
+            started = time.perf_counter()
+            log.info('button', 'button %s %s', 'A', number)
+            slowest = max(slowest, time.perf_counter() - started)
+        log.stop()
+    finally:
+        stats = log.getDropStats()
+        restore()
+
+    # One write to the sink takes 20 ms; a logging call must not wait for it
+    assert slowest < 0.01, f'a log call took {slowest * 1000:.1f} ms'
+    written = [line for line in sink.lines if line.startswith('button')]
+    assert stats[('button', 'full')] == 2000 - len(written) > 0
+    assert sink.lines[0] == 'button A 0'
+    assert any("dropped" in line and "'button'" in line for line in sink.lines)
+
+
+def test_rate_limit_and_sampling():
+    sink = SlowSink()
+    useSink(sink)
+    try:
+        log.setRateLimit('stick', perSecond=1, burst=5)
+        log.setSampling('frame', 10)
+        for number in range(50):
+            log.info('stick', 'stick %d', number)
+            log.info('frame', 'frame %d', number)
+    finally:
+        stats = log.getDropStats()
+        restore()
+
+    assert [line for line in sink.lines if line.startswith('stick')] == \
+        [f'stick {number}' for number in range(5)]
+    assert [line for line in sink.lines if line.startswith('frame')] == \
+        [f'frame {number}' for number in range(9, 50, 10)]
+    assert stats == {('stick', 'rate'): 45, ('frame', 'sample'): 45}
+
+
+def test_writer_starts_before_the_input_thread_turns_realtime():
+    # A thread inherits the priority of the thread that starts it: the
+    # writer must exist before drive.start() makes its own thread SCHED_FIFO
+    sink = SlowSink()
+    useSink(sink)
+    gpio.setBackend('sim')
+    simgpio.reset()
+    steps = []
+
+    class Stop(Exception):
+        pass
+
+    def stopHere(**callbacks):
+        raise Stop()
+
+    saved = (drive.connectToController, drive.eventLoop, realtime.setupProcess,
+             realtime.setupThread, realtime.freezeGC)
+    drive.connectToController = lambda: None
+    drive.eventLoop = stopHere
+    realtime.setupProcess = lambda *args: None
+    realtime.setupThread = lambda name, *args: steps.append((name, log.running))
+    realtime.freezeGC = lambda: None
+    try:
+        drive.start(realtime=True)
+        assert False, 'the fake event loop ends start()'
+    except Stop:
+        pass
+    finally:
+        (drive.connectToController, drive.eventLoop, realtime.setupProcess,
+         realtime.setupThread, realtime.freezeGC) = saved
+        simgpio.reset()
+        restore()
+    assert steps == [('input', True)]
+
+
+if __name__ == '__main__':
+    for test in (test_slow_sink_does_not_block_and_drops_are_counted,
+                 test_rate_limit_and_sampling,
+                 test_writer_starts_before_the_input_thread_turns_realtime):
+        test()
+        print(f'OK  {test.__name__}')
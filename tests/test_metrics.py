@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Metrics Endpoint Test
+=====================
+This script drives a few recorded controller frames through the normal
+drive code with metrics switched on, then reads the numbers back over
+HTTP from the metrics server on localhost - the way Prometheus would.
+
+The motors use the GPIO simulator (robot.simgpio), so no hardware is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_metrics.py
+    python3 -m pytest tests/test_metrics.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socket
+import threading
+import urllib.error
+import urllib.request
+from robot import controller, drive, gpio, metrics, motor, simgpio
+from robot.recording import RecordedEvent
+
+
+def makeFrames():
+    """
+    Two frames: a diagonal push (two axes), then a button press.
+    """
+    return [
+        RecordedEvent(0, 0, controller.EV_ABS, 0, 16384),     # stick1-X
+        RecordedEvent(0, 0, controller.EV_ABS, 1, -32767),    # stick1-Y
+        RecordedEvent(0, 0, controller.EV_SYN, controller.SYN_REPORT, 0),
+        RecordedEvent(0, 1, controller.EV_KEY, 304, 1),       # A
+        RecordedEvent(0, 1, controller.EV_SYN, controller.SYN_REPORT, 0),
+    ]
+
+
+def parse(text):
+    """
+    Turn the Prometheus text format into {'name{labels}': value}.
+    """
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_render_format():
+    histogram = metrics.Histogram('test_sizes', 'Sizes.', (1, 2))
+    for value in (1, 2, 2, 5):
+        histogram.observe(value)
+    lines = []
+    histogram.render(lines)
+    assert lines == [
+        '# HELP test_sizes Sizes.',
+        '# TYPE test_sizes histogram',
+        'test_sizes_bucket{le="1"} 1',
+        'test_sizes_bucket{le="2"} 3',
+        'test_sizes_bucket{le="+Inf"} 4',
+        'test_sizes_sum 10',
+        'test_sizes_count 4',
+    ]
+
+
+def test_scrape_over_http():
+    gpio.setBackend('sim')
+    motor.initMotors()
+    motor.resetDutyStats()
+    metrics.reset()
+    metrics.enable()
+    server = metrics.serve(port=0, host='127.0.0.1')
+    try:
+        controller.frameLoop(drive.onFrame, makeFrames())
+        port = server.server_address[1]
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            samples = parse(response.read().decode())
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/other', timeout=5)
+            assert False, 'only /metrics should be served'
+        except urllib.error.HTTPError as error:
+            assert error.code == 404
+    finally:
+        metrics.stopServing()
+        metrics.disable()
+        drive.resetAxes()
+
+    assert samples['robot_controller_events_total{type="abs"}'] == 2
+    assert samples['robot_controller_events_total{type="key"}'] == 1
+    assert samples['robot_controller_events_total{type="syn"}'] == 2
+    assert samples['robot_frames_dispatched_total'] == 2
+    assert samples['robot_frame_changes_bucket{le="2"}'] == 2
+    assert samples['robot_set_motors_total'] == 1
+    assert samples['robot_duty_writes_total{result="issued"}'] == motor.dutyWritesIssued > 0
+    assert samples['robot_duty_writes_total{result="elided"}'] == motor.dutyWritesSkipped
+    assert list(drive.motorPowers) == [samples[f'robot_motor_power{{motor="{index}"}}']
+                                       for index in range(1, 5)]
+
+
+def test_failed_server_stops_the_control_threads():
+    gpio.setBackend('sim')
+    simgpio.reset()
+    threads = threading.active_count()
+    busy = socket.socket()
+    busy.bind(('127.0.0.1', 0))                  # The metrics port is taken
+    busy.listen()
+    connect = drive.connectToController
+    drive.connectToController = lambda: None     # No controller needed
+    try:
+        drive.start(controlRate=100, deadline=0.05, metricsPort=busy.getsockname()[1])
+        assert False, 'the server cannot start on a port in use'
+    except OSError:
+        pass
+    finally:
+        drive.connectToController = connect
+        busy.close()
+    # The control loop and the deadline monitor were started - and stopped again
+    assert drive.scheduler is None and drive.monitor is None
+    assert threading.active_count() == threads
+    assert drive.motorsFollowInput
+
+
+if __name__ == '__main__':
+    for test in (test_render_format, test_scrape_over_http,
+                 test_failed_server_stops_the_control_threads):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Motion Script Test
+==================
+This script checks the motion script engine (robot.motion) without any
+motors: compiling, validating, previewing with the virtual clock, a
+short real-time playback, and stopping the motors when a step fails.
+
+Run it directly, or with pytest:
+    python3 tests/test_motion.py
+    python3 -m pytest tests/test_motion.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from robot.mecanum import makeMotorVector
+from robot.motion import Hold, Ramp, Trapezoid, VirtualClock, compileScript, validate
+
+
+def test_compile_steps_and_vectors():
+    script = compileScript([Hold(1, 0, 0, duration=0.5), Hold(0, 0, 1, duration=0.25)], rate=100)
+    assert script.steps == 75
+    assert script.segments[1][1:3] == (50, 25)
+    assert list(script.vectors[:4]) == makeMotorVector(1, 0, 0)
+    assert list(script.vectors[-4:]) == makeMotorVector(0, 0, 1)
+
+
+def test_trapezoid_and_ramp_profiles():
+    script = compileScript([Trapezoid(forward=1, duration=1, rampTime=0.25)], rate=100)
+    speeds = [script.vectors[step * 4] for step in range(script.steps)]
+    assert speeds[0] < speeds[10] < speeds[24] <= 1.0
+    assert speeds[30:70] == [1.0] * 40
+    # Slows down the way it sped up
+    assert all(abs(a - b) < 1e-9 for a, b in zip(speeds, reversed(speeds)))
+
+    ramp = compileScript([Ramp(start=(0, 0, 0), end=(1, 0, 0), duration=1)], rate=10)
+    speeds = [ramp.vectors[step * 4] for step in range(ramp.steps)]
+    assert speeds == sorted(speeds) and abs(speeds[0] - 0.05) < 1e-9
+
+
+def test_validate_lists_every_problem():
+    problems = validate([Hold(2, 0, 0), Trapezoid(forward=1, duration=1, rampTime=0.6),
+                         Hold(duration=0.001)], rate=100)
+    assert len(problems) == 3
+    try:
+        compileScript([Hold(0, 0, -1.5)])
+        assert False, 'an invalid script must not compile'
+    except ValueError as error:
+        assert 'turn -1.5 is outside -1..1' in str(error)
+
+
+def test_preview_is_much_faster_than_real_time():
+    script = compileScript([Trapezoid(forward=1, duration=30), Hold(duration=30)], rate=200)
+    played = []
+    started = time.perf_counter()
+    report = script.preview(output=lambda powers: played.append(powers[0]))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 6.0, f'a 60 s script took {elapsed:.1f} s to preview'
+    assert len(played) == script.steps + 1 and played[-1] == 0.0   # Stopped at the end
+    assert report.elapsed == script.duration
+    assert [segment['durationErrorMs'] for segment in report.segments] == [0.0, 0.0]
+
+
+def test_real_time_playback_does_not_drift():
+    script = compileScript([Hold(1, 0, 0, duration=0.1)] * 3, rate=200)
+    report = script.play(output=lambda powers: None)
+    # Loose limits: this may run on a busy machine. Drift would add up
+    # over the 60 steps; absolute deadlines keep the total close.
+    assert abs(report.elapsed - script.duration) < 0.05
+    assert len(report.segments) == 3
+
+
+def test_stopped_playback_reports_lateness_of_played_steps():
+    class LateClock(VirtualClock):
+        def sleep(self, seconds):
+            super().sleep(seconds + 0.001)          # Every sleep oversleeps 1 ms
+
+    clock = LateClock()
+    stopEvent = threading.Event()
+    written = []
+
+    def output(powers):
+        written.append(powers[0])
+        if len(written) == 5:
+            stopEvent.set()                         # Stop after 5 of 100 steps
+
+    script = compileScript([Hold(1, 0, 0, duration=1)], rate=100)
+    report = script.play(output, now=clock.now, sleep=clock.sleep, stopEvent=stopEvent)
+    assert report.stopped and len(written) == 6     # 5 steps, then the stop
+    # The first step is on time, the next 4 are 1 ms late: 0.8 ms on average
+    assert abs(report.segments[0]['meanLateMs'] - 0.8) < 1e-6
+
+
+def test_failing_step_still_stops_the_motors():
+    script = compileScript([Hold(1, 0, 0, duration=1)], rate=100)
+    clock = VirtualClock()
+    written = []
+
+    def output(powers):
+        written.append(list(powers))
+        if len(written) == 3:
+            raise OSError(5, 'PWM write failed')
+
+    try:
+        script.play(output, now=clock.now, sleep=clock.sleep)
+        assert False, 'the error must reach the caller'
+    except OSError:
+        pass
+    assert written[-1] == [0.0, 0.0, 0.0, 0.0] and len(written) == 4
+
+    # In the background: the error is kept on the thread
+    written.clear()
+
+    def brokenSegment(name):
+        raise ValueError(f'no such segment handler: {name}')
+
+    thread, stopEvent = script.start(output=lambda powers: written.append(list(powers)),
+                                     onSegment=brokenSegment)
+    thread.join(5)
+    assert isinstance(thread.error, ValueError) and thread.report is None
+    assert written == [[0.0, 0.0, 0.0, 0.0]]
+
+
+if __name__ == '__main__':
+    for test in (test_compile_steps_and_vectors,
+                 test_trapezoid_and_ramp_profiles,
+                 test_validate_lists_every_problem,
+                 test_preview_is_much_faster_than_real_time,
+                 test_real_time_playback_does_not_drift,
+                 test_stopped_playback_reports_lateness_of_played_steps,
+                 test_failing_step_still_stops_the_motors):
+        test()
+        print(f'OK  {test.__name__}')
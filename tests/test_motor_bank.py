@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Motor Bank Test
+===============
+This script checks robot.motor's MotorBank and the module functions built
+on it:
+
+- a bank works with any number of motors, not just 4
+- moveMotor1-4(), setDuty() and the motor1_forward... names act on the
+  same PWM channels as bank.motors[i] and bank.pwms
+- the motor process's stand-in bank (robot.motorprocess.SharedMotorBank)
+  has every method the rest of the code calls on motor.bank, so for
+  example motor.resetDutyCache() also works while the motor process runs
+
+Uses the simulated GPIO, so it runs on any computer.
+
+Run it directly, or with pytest:
+    python3 tests/test_motor_bank.py
+    python3 -m pytest tests/test_motor_bank.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot import gpio, motor, simgpio
+from robot.motor import MotorBank
+from robot.motorprocess import CommandChannel, SharedMotorBank
+
+# Three motors, on pins the default wiring does not use
+THREE_MOTORS = [(2, 3), (4, 17), (27, 22)]
+
+
+def closeTo(a, b):
+    return abs(a - b) < 1e-9
+
+
+def test_bank_with_three_motors():
+    simgpio.reset()
+    bank = MotorBank(THREE_MOTORS, frequency=100, GPIO=simgpio)
+    assert len(bank.motors) == 3
+    assert len(bank.pwms) == len(bank.lastDuty) == 6
+    assert [pwm.pin for pwm in bank.pwms] == [2, 3, 4, 17, 27, 22]
+
+    bank.apply([0.5, -0.25, 1.0])
+    assert closeTo(simgpio.dutyAt(2), 50.0) and simgpio.dutyAt(3) == 0.0
+    assert simgpio.dutyAt(4) == 0.0 and closeTo(simgpio.dutyAt(17), 25.0)
+    assert closeTo(simgpio.dutyAt(27), 100.0) and simgpio.dutyAt(22) == 0.0
+
+    # One motor on its own, through its channels
+    bank.motors[2].move(-0.5)
+    assert simgpio.dutyAt(27) == 0.0 and closeTo(simgpio.dutyAt(22), 50.0)
+
+    bank.stop()
+    assert all(simgpio.dutyAt(pin) == 0.0 for pair in THREE_MOTORS for pin in pair)
+    simgpio.reset()
+
+
+def test_module_functions_share_the_bank_channels():
+    gpio.setBackend('sim')
+    simgpio.reset()
+    bank = motor.initMotors()
+    try:
+        # The old names are the bank's PWM objects, in channel order
+        assert [motor.motor1_forward, motor.motor1_backward,
+                motor.motor2_forward, motor.motor2_backward,
+                motor.motor3_forward, motor.motor3_backward,
+                motor.motor4_forward, motor.motor4_backward] == bank.pwms
+
+        moves = [motor.moveMotor1, motor.moveMotor2, motor.moveMotor3, motor.moveMotor4]
+        for index, move in enumerate(moves):
+            forward, backward = bank.pwms[2 * index], bank.pwms[2 * index + 1]
+            assert bank.motors[index].forwardPin == forward.pin
+
+            move(0.5)
+            assert closeTo(forward.duty, 50.0) and backward.duty == 0.0
+            assert closeTo(bank.lastDuty[2 * index], 50.0)
+
+            # bank.motors[i] sees what moveMotorN() wrote: the cache skips it
+            stats = motor.getDutyStats()
+            bank.motors[index].move(0.5)
+            assert motor.getDutyStats()['issued'] == stats['issued']
+
+            move(-1.0)
+            assert forward.duty == 0.0 and closeTo(backward.duty, 100.0)
+            move(0)
+
+        # setDuty() finds the channel of a PWM object
+        motor.setDuty(motor.motor3_backward, 40)
+        assert closeTo(bank.pwms[5].duty, 40.0)
+        assert closeTo(bank.lastDuty[5], 40.0)
+    finally:
+        bank.stop()
+        motor.bank = None
+        simgpio.reset()
+
+
+def test_shared_bank_has_the_bank_methods():
+    # Methods other modules call on motor.bank. setChannel() is left out
+    # on purpose: the input process has no PWM channels to address.
+    used = ['apply', 'stop', 'makeStopper', 'checkStops', 'resetDutyCache']
+    public = [name for name in dir(MotorBank)
+              if not name.startswith('_') and callable(getattr(MotorBank, name))]
+    assert sorted(set(public) - {'setChannel'}) == sorted(used)
+
+    channel = CommandChannel(motors=4)
+    try:
+        shared = SharedMotorBank(channel)
+        for name in used:
+            assert callable(getattr(shared, name)), f'SharedMotorBank has no {name}()'
+
+        motor.bank = shared
+        motor.resetDutyCache()           # Used to raise AttributeError
+        shared.checkStops()
+        shared.apply([0.5, 0.0, 0.0, -0.5])
+        assert list(channel.read()[3:]) == [0.5, 0.0, 0.0, -0.5]
+    finally:
+        motor.bank = None
+        channel.close()
+        channel.unlink()
+
+
+if __name__ == '__main__':
+    tests = [
+        test_bank_with_three_motors,
+        test_module_functions_share_the_bank_channels,
+        test_shared_bank_has_the_bank_methods,
+    ]
+    for test in tests:
+        test()
+        print(f"OK  {test.__name__}")
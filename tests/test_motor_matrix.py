@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Motor Matrix Test
+=================
+This script checks the batch version of the mecanum math
+(robot.mecanum makeMotorMatrix()): every row must be exactly what
+makeMotorVector() gives for that command - including the zero command
+and commands that need scaling down (|forward| + |left| + |turn| > 1).
+
+Requires NumPy (pip install numpy). No hardware is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_motor_matrix.py
+    python3 -m pytest tests/test_motor_matrix.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import itertools
+from robot.mecanum import makeMotorMatrix, makeMotorVector
+
+LEVELS = [-1.0, -0.7, -0.35, -0.1, 0.0, 0.05, 0.3, 0.5, 0.9, 1.0]
+
+
+def test_rows_match_makeMotorVector():
+    commands = list(itertools.product(LEVELS, repeat=3))
+    assert (0.0, 0.0, 0.0) in commands
+    assert sum(1 for command in commands if sum(map(abs, command)) > 1) > len(commands) // 2
+
+    matrix = makeMotorMatrix(commands)
+    assert matrix.shape == (len(commands), 4)
+    for command, row in zip(commands, matrix):
+        assert row.tolist() == makeMotorVector(*command), command
+
+    assert makeMotorMatrix([[0, 0, 0]]).tolist() == [[0.0, 0.0, 0.0, 0.0]]
+
+
+def test_bad_shapes_are_rejected():
+    for commands in ([1, 0, 0], [[1, 0]], [[[1, 0, 0]]]):
+        try:
+            makeMotorMatrix(commands)
+            assert False, f'{commands} is not a list of commands'
+        except ValueError as error:
+            assert 'shape (N, 3)' in str(error)
+
+
+if __name__ == '__main__':
+    for test in (test_rows_match_makeMotorVector,
+                 test_bad_shapes_are_rejected):
+        test()
+        print(f'OK  {test.__name__}')
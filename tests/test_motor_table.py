@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Motor Vector Table Test
+=======================
+This script checks the precomputed lookup table for the mecanum math
+(robot.mecanum MotorVectorTable):
+
+- on its levels the table gives exactly what makeMotorVector() calculates
+- inputs between levels round to the nearest one, inputs beyond ±1.0 are
+  clamped, and a centered stick gives exactly zero power
+- verify() finds the largest error, and it shrinks with more levels
+- enableMotorTable() switches motorVector() over to the table and back
+
+Small tables are used, so this runs in a moment.
+
+Run it directly, or with pytest:
+    python3 tests/test_motor_table.py
+    python3 -m pytest tests/test_motor_table.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from array import array
+from robot import mecanum
+from robot.mecanum import MotorVectorTable, makeMotorVector
+
+
+def test_levels_match_the_calculation():
+    table = MotorVectorTable(11, 11, 11)                # Levels 0.2 apart
+    assert len(table.vectors) == 11 ** 3
+    for command in [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.6, -0.4, 0.2), (-1.0, 1.0, -1.0)]:
+        expected = makeMotorVector(*command)
+        assert all(abs(a - b) < 1e-12 for a, b in zip(table.lookup(*command), expected)), command
+    assert table.lookup(0.0, 0.0, 0.0) == (0.0, 0.0, 0.0, 0.0)   # Exactly zero
+
+
+def test_inputs_round_to_the_nearest_level_and_are_clamped():
+    table = MotorVectorTable(11, 11, 11)
+    assert table.lookup(0.58, 0.0, 0.0) == table.lookup(0.6, 0.0, 0.0)
+    assert table.lookup(0.52, 0.0, 0.0) == table.lookup(0.6, 0.0, 0.0)
+    assert table.lookup(0.48, 0.0, 0.0) == table.lookup(0.4, 0.0, 0.0)
+    assert table.lookup(0.04, -0.09, 0.09) == (0.0, 0.0, 0.0, 0.0)
+    assert table.lookup(1.7, -3.0, 0.0) == table.lookup(1.0, -1.0, 0.0)
+    try:
+        MotorVectorTable(1, 11, 11)
+        assert False, 'an axis needs two levels at least'
+    except ValueError:
+        pass
+
+
+def test_verify_reports_the_worst_error():
+    coarse = MotorVectorTable(5, 5, 5).verify(samplesPerAxis=13)
+    fine = MotorVectorTable(21, 21, 21).verify(samplesPerAxis=13)
+    assert coarse['samples'] == 13 ** 3
+    assert 0 < fine['maxError'] < coarse['maxError'] <= 2.0
+
+    # The reported input really is that far off
+    table = MotorVectorTable(5, 5, 5)
+    worst = table.verify(samplesPerAxis=13)
+    exact = makeMotorVector(*worst['worstInput'])
+    looked = table.lookup(*worst['worstInput'])
+    assert abs(max(abs(a - b) for a, b in zip(exact, looked)) - worst['maxError']) < 1e-12
+
+    # Sampling exactly on the levels finds (almost) no error
+    assert MotorVectorTable(5, 5, 5).verify(samplesPerAxis=5)['maxError'] < 1e-12
+
+
+def test_enable_and_disable_the_table():
+    buffer = array('d', [0.0] * 4)
+    try:
+        table = mecanum.enableMotorTable(5, 5, 5)
+        assert mecanum.motorTable is table
+        assert mecanum.motorVector(0.4, 0.1, 0.0) is table.lookup(0.5, 0.0, 0.0)
+        mecanum.motorVectorInto(buffer, 0.4, 0.1, 0.0)
+        assert tuple(buffer) == table.lookup(0.5, 0.0, 0.0)
+    finally:
+        mecanum.disableMotorTable()
+    assert mecanum.motorVector(0.4, 0.1, 0.0) == makeMotorVector(0.4, 0.1, 0.0)
+
+
+if __name__ == '__main__':
+    for test in (test_levels_match_the_calculation,
+                 test_inputs_round_to_the_nearest_level_and_are_clamped,
+                 test_verify_reports_the_worst_error,
+                 test_enable_and_disable_the_table):
+        test()
+        print(f'OK  {test.__name__}')
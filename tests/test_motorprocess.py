@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Motor Process Test
+==================
+This script checks the pieces of the separate motor process
+(robot.motorprocess) that keep the robot safe:
+
+- the shared command block (a "seqlock"): the reader only ever gets a
+  complete command, never half of an old and half of a new one - and a
+  write that never finishes stops the motors instead of hanging the reader
+- stale commands stop the motors once, checked with a fake clock
+- the heartbeat pauses while the input thread is stuck
+- a motor process that cannot start, or dies, is noticed
+
+Uses the simulated GPIO, so it runs on any Linux computer.
+
+Run it directly, or with pytest:
+    python3 tests/test_motorprocess.py
+    python3 -m pytest tests/test_motorprocess.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from robot import gpio, motor, motorprocess, simgpio
+from robot.deadline import DeadlineMonitor
+from robot.motorprocess import SEQUENCE, CommandChannel, CommandFollower
+from fakes import FakeClock
+
+
+def test_seqlock_returns_whole_commands():
+    channel = CommandChannel(motors=4)
+    try:
+        channel.publish([0.5, -0.5, 0.25, 0.0], inputTime=12.5)
+        sequence, writeTime, inputTime, *powers = channel.read()
+        assert sequence == 2                      # Even: complete
+        assert inputTime == 12.5
+        assert powers == [0.5, -0.5, 0.25, 0.0]
+
+        # A writer caught halfway: odd sequence, new powers only partly there.
+        # read() must wait for the write to finish instead of returning it.
+        SEQUENCE.pack_into(channel.buffer, 0, 3)
+        channel.body.pack_into(channel.buffer, SEQUENCE.size, writeTime, inputTime,
+                               1.0, 1.0, 0.25, 0.0)
+
+        def finishWrite():
+            time.sleep(0.02)
+            channel.body.pack_into(channel.buffer, SEQUENCE.size, writeTime, inputTime,
+                                   1.0, 1.0, 1.0, 1.0)
+            SEQUENCE.pack_into(channel.buffer, 0, 4)
+
+        writer = threading.Thread(target=finishWrite)
+        writer.start()
+        command = channel.read()
+        writer.join()
+        assert command[0] == 4 and list(command[3:]) == [1.0, 1.0, 1.0, 1.0]
+    finally:
+        channel.close()
+        channel.unlink()
+
+
+def test_unfinished_write_stops_the_motors():
+    channel = CommandChannel(motors=4)
+    try:
+        # The writer died halfway through a write: the sequence stays odd
+        SEQUENCE.pack_into(channel.buffer, 0, 5)
+        started = time.monotonic()
+        assert channel.read(timeout=0.02) is None
+        assert time.monotonic() - started < 1.0
+    finally:
+        channel.close()
+        channel.unlink()
+
+    stops = []
+    follower = CommandFollower(0.1, apply=print, stop=lambda: stops.append(True))
+    follower.stopped = False                       # The motors are running
+    follower.handle(None)
+    follower.handle(None)
+    assert stops == [True] and follower.staleStops == 1
+
+
+def test_motor_process_survives_a_writer_dying_mid_write():
+    gpio.setBackend('sim')
+    simgpio.reset()
+    saved = motor.bank
+    process, channel, results = motorprocess.startMotorProcess(staleAfter=0.05)
+    try:
+        motor.bank.apply([0.5, 0.5, 0.5, 0.5])
+        time.sleep(0.05)
+        SEQUENCE.pack_into(channel.buffer, 0, channel.sequence + 1)   # Left odd
+        os.write(channel.writeEnd, b'\x01')
+        time.sleep(0.2)
+        assert process.is_alive()
+    finally:
+        stats = motorprocess.stopMotorProcess(process, channel, results)
+        motor.bank = saved
+    # It was not stuck in read(): it stopped the motors and ended normally
+    assert stats is not None and stats['staleStops'] == 1
+    assert stats['updates'] >= 1
+
+
+def test_stale_commands_stop_the_motors_once():
+    clock = FakeClock()
+    applied = []
+    stops = []
+    follower = CommandFollower(0.1, apply=applied.append, stop=lambda: stops.append(clock.time),
+                               clock=clock)
+
+    follower.handle((2, clock.time, float('nan'), 0.5, 0.5, 0.5, 0.5))
+    follower.handle((2, clock.time, float('nan'), 0.5, 0.5, 0.5, 0.5))   # Nothing new
+    assert applied == [(0.5, 0.5, 0.5, 0.5)] and stops == []
+
+    # The input process goes quiet: the same command gets older and older
+    writeTime = clock.time
+    clock.time += 0.05
+    follower.handle((2, writeTime, float('nan'), 0.5, 0.5, 0.5, 0.5))
+    assert stops == []                                                  # Not stale yet
+    clock.time += 0.1
+    follower.handle((2, writeTime, float('nan'), 0.5, 0.5, 0.5, 0.5))
+    follower.handle((2, writeTime, float('nan'), 0.5, 0.5, 0.5, 0.5))
+    assert stops == [clock.time] and follower.staleStops == 1           # Stopped once
+
+    # A fresh command drives again
+    follower.handle((4, clock.time, float('nan'), 0.25, 0.25, 0.25, 0.25))
+    assert applied[-1] == (0.25, 0.25, 0.25, 0.25) and follower.updates == 2
+
+
+def test_heartbeat_pauses_while_input_is_stuck():
+    clock = FakeClock()
+    beats = []
+    deaths = []
+
+    class Process:
+        exitcode = None
+
+    class Bank:
+        def heartbeat(self):
+            beats.append(clock.time)
+
+    watch = DeadlineMonitor(0.1, lambda: None, inputTimeout=0.1, clock=clock)
+    beat = motorprocess.makeHeartbeat(Process, Bank(), watch, onDeath=lambda: deaths.append(True))
+
+    beat()
+    watch.inputStarted()               # A callback that never returns...
+    clock.time += 0.2
+    beat()
+    assert len(beats) == 1             # ...so no heartbeat: the motor process will stop
+    watch.inputDone()
+    beat()
+    assert len(beats) == 2
+
+    Process.exitcode = -9              # The motor process was killed
+    beat()
+    beat()
+    assert deaths == [True] and len(beats) == 2
+
+
+def test_motor_process_that_cannot_start_is_an_error():
+    saved = gpio.backendName
+    gpio.backendName = 'rpi5'          # The motor process cannot load this
+    try:
+        motorprocess.startMotorProcess()
+        assert False, 'a motor process without motors must not be used'
+    except RuntimeError as error:
+        assert "Motor process did not start: ValueError: Unknown GPIO backend 'rpi5'" in str(error)
+    finally:
+        gpio.backendName = saved
+    assert not isinstance(motor.bank, motorprocess.SharedMotorBank)
+
+
+def test_dead_motor_process_is_noticed():
+    gpio.setBackend('sim')
+    simgpio.reset()                    # The motor process sets up the pins again
+    saved = motor.bank
+    process, channel, results = motorprocess.startMotorProcess()
+    try:
+        deaths = []
+        beat = motorprocess.makeHeartbeat(process, motor.bank, onDeath=lambda: deaths.append(True))
+        beat()
+        assert deaths == []
+        process.kill()
+        process.join()
+        beat()
+        assert deaths == [True]
+    finally:
+        assert motorprocess.stopMotorProcess(process, channel, results) is None
+        motor.bank = saved
+
+
+if __name__ == '__main__':
+    for test in (test_seqlock_returns_whole_commands,
+                 test_unfinished_write_stops_the_motors,
+                 test_motor_process_survives_a_writer_dying_mid_write,
+                 test_stale_commands_stop_the_motors_once,
+                 test_heartbeat_pauses_while_input_is_stuck,
+                 test_motor_process_that_cannot_start_is_an_error,
+                 test_dead_motor_process_is_noticed):
+        test()
+        print(f'OK  {test.__name__}')
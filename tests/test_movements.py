@@ -27,9 +27,9 @@ import os
 # Add parent directory to path so we can import robot package
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from robot.mecanum import makeMotorVector, driveMotors, stopMotors
+from robot.mecanum import makeMotorVector, stopMotors
 from robot.motor import initMotors
-import time
+from robot.motion import Hold, compileScript
 
 if __name__ == '__main__':
     print("=" * 60)
@@ -42,9 +42,6 @@ if __name__ == '__main__':
     print("-" * 60)
     print()
     
-    # Initialize motor hardware
-    initMotors()
-    
     # List of test movements: (forward, left, turn, description)
     movements = [
         (1, 0, 0, "Moving FORWARD"),
@@ -55,36 +52,42 @@ if __name__ == '__main__':
         (0, 0, -1, "Rotating RIGHT (clockwise)")
     ]
     
-    # Execute each movement
+    # Build the whole sequence as a motion script (see robot.motion):
+    # each movement for 2 seconds, then half a second standing still.
+    # The script is played against absolute deadlines, so the timing
+    # does not drift the way repeated time.sleep() calls would.
+    segments = []
     for forward, left, turn, description in movements:
-        print(f"{description}...")
-        
-        # Calculate motor powers for this movement
-        motor_vector = makeMotorVector(forward, left, turn)
-        print(f"  Motor powers: {[f'{v:+.2f}' for v in motor_vector]}")
-        
-        # Apply the motor powers
-        driveMotors(motor_vector)
-        
-        # Hold this movement for 2 seconds
-        time.sleep(2)
-        
-        # Stop between movements
-        stopMotors()
-        print(f"  Stopped")
+        segments.append(Hold(forward, left, turn, duration=2, name=description))
+        segments.append(Hold(duration=0.5, name="Stopped"))
+    script = compileScript(segments)
+    
+    def announce(name):
+        # Called by the script as each segment begins
+        for forward, left, turn, description in movements:
+            if description == name:
+                print(f"{description}...")
+                print(f"  Motor powers: {[f'{v:+.2f}' for v in makeMotorVector(forward, left, turn)]}")
+                return
+        print(f"  {name}")
         print()
-        time.sleep(0.5)
     
-    # Final stop
-    stopMotors()
+    # Initialize motor hardware
+    initMotors()
+    
+    try:
+        report = script.play(onSegment=announce)
+    finally:
+        # Final stop (also after Ctrl+C)
+        stopMotors()
     
     print("-" * 60)
     print("Movement test complete!")
     print()
+    print(report.formatReport())
+    print()
     print("Next steps:")
     print("  - Try combining movements: makeMotorVector(0.5, 0.5, 0)")
+    print("  - Try smooth starts: robot.motion.Trapezoid(forward=1, duration=2)")
     print("  - Test with controller: python3 run_robot.py")
     print("=" * 60)
-
-
-
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Real-time Mode Test
+===================
+This script checks that robot.realtime falls back cleanly when the
+program is not allowed to use real-time features: every step that fails
+is recorded in realtime.status and shown in the report, and nothing
+raises.
+
+The privileged system calls are replaced by stand-ins that fail (or
+succeed) on purpose, so the test behaves the same as root or as a normal
+user, and never really changes this process's scheduling or memory.
+
+Run it directly, or with pytest:
+    python3 tests/test_realtime.py
+    python3 -m pytest tests/test_realtime.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ctypes
+import errno
+from robot import realtime
+
+
+class FakeLibc:
+    """The two C library functions realtime uses, with a chosen result."""
+
+    def __init__(self, lockError=None):
+        self.lockError = lockError
+        self.mallopts = []
+
+    def mlockall(self, flags):
+        if self.lockError is not None:
+            ctypes.set_errno(self.lockError)
+            return -1
+        return 0
+
+    def mallopt(self, option, value):
+        self.mallopts.append((option, value))
+        return 1
+
+
+def withLibc(libc, test):
+    saved = realtime.loadLibc
+    realtime.loadLibc = lambda: libc
+    realtime.reset()
+    try:
+        test()
+    finally:
+        realtime.loadLibc = saved
+        realtime.reset()
+
+
+def test_memory_lock_without_privileges():
+    def check():
+        assert realtime.setupProcess() is False
+        assert realtime.status['memoryLocked'] is False
+        assert realtime.status['prefaultedBytes'] == 0
+        assert realtime.status['problems'] == [
+            f"mlockall: {os.strerror(errno.EPERM)} ({realtime.PRIVILEGE_HINT}, e.g. a 'memlock' limit)"]
+        report = realtime.formatReport().splitlines()
+        assert '  memory locked: no' in report
+        assert report[-1].startswith('  NOT APPLIED - mlockall: ')
+
+    def checkMissing():
+        assert realtime.setupProcess() is False
+        assert realtime.status['problems'] == ['mlockall: not available on this system']
+
+    withLibc(FakeLibc(lockError=errno.EPERM), check)
+    withLibc(None, checkMissing)                  # No C library at all
+
+
+def test_memory_lock_and_prefault():
+    libc = FakeLibc()
+
+    def check():
+        assert realtime.setupProcess(prefaultBytes=1024 * 1024) is True
+        assert realtime.status['prefaultedBytes'] == 1024 * 1024
+        assert libc.mallopts == [(realtime.M_TRIM_THRESHOLD, -1), (realtime.M_MMAP_MAX, 0)]
+        assert 'memory locked: yes (prefaulted 1.0 MB)' in realtime.formatReport()
+        assert realtime.setupProcess(lockMemory=False) is False      # Switched off: no call
+
+    withLibc(libc, check)
+
+
+def test_thread_priority_without_privileges():
+    def refuse(threadId, policy, param):
+        raise PermissionError(errno.EPERM, os.strerror(errno.EPERM))
+
+    saved = os.sched_setscheduler
+    os.sched_setscheduler = refuse
+    realtime.reset()
+    try:
+        before = realtime.readThread()
+        achieved = realtime.setupThread('input', 0, realtime.DEFAULT_PRIORITY, cpus=[100000])
+        problems = list(realtime.status['problems'])
+        report = realtime.formatReport()
+    finally:
+        os.sched_setscheduler = saved
+        realtime.reset()
+
+    # Nothing raised, nothing changed, and the report says why
+    assert achieved == before and achieved['policy'] == 'SCHED_OTHER'
+    assert problems[0].startswith(f'input: SCHED_FIFO: {os.strerror(errno.EPERM)} (')
+    assert problems[1].startswith('input: CPU affinity [100000]: ')   # No such CPU
+    assert 'input       SCHED_OTHER priority 0' in report
+    assert report.count('NOT APPLIED') == 2
+
+
+if __name__ == '__main__':
+    for test in (test_memory_lock_without_privileges,
+                 test_memory_lock_and_prefault,
+                 test_thread_priority_without_privileges):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Controller Reconnect Test
+=========================
+This script checks what the controller event loops do when the
+controller drops out: a read error means "disconnected" (stop the motors,
+reconnect, carry on), but an error raised by a callback - like a failed
+motor write - must NOT be mistaken for one.
+
+The controller is a fake device that stops with an OSError partway
+through, like a Bluetooth controller going out of range. No controller
+or evdev is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_reconnect.py
+    python3 -m pytest tests/test_reconnect.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import errno
+import types
+from robot import controller
+from robot.controller import EV_ABS, EV_SYN, SYN_REPORT
+from robot.recording import RecordedEvent
+from fakes import FakeDevice
+
+
+def stickEvents(*raws):
+    """stick1-Y events, each in its own frame."""
+    events = []
+    for raw in raws:
+        events.append(RecordedEvent(0, 0, EV_ABS, 1, raw))
+        events.append(RecordedEvent(0, 0, EV_SYN, SYN_REPORT, 0))
+    return events
+
+
+def withDevices(test, *devices):
+    """
+    Run test() with the first device connected; each reconnect gets the next one.
+    """
+    waiting = list(devices[1:])
+    original = controller.connectToController
+
+    def reconnect(retryInterval=1):
+        controller.controller = waiting.pop(0)
+
+    controller.controller = devices[0]
+    controller.connectToController = reconnect
+    try:
+        test()
+    finally:
+        controller.connectToController = original
+        controller.controller = None
+
+
+def test_read_error_reconnects_and_continues():
+    first = FakeDevice(stickEvents(100, 200), OSError(errno.ENODEV, 'No such device'))
+    second = FakeDevice(stickEvents(300))
+    values = []
+    stops = []
+    disconnects = controller.disconnectCount
+
+    withDevices(lambda: controller.eventLoop(onStick=lambda name, value: values.append(value),
+                                             onDisconnect=lambda: stops.append(True)),
+                first, second)
+
+    assert values == [100 / 32767, 200 / 32767, 300 / 32767]
+    assert stops == [True] and first.closed
+    assert controller.disconnectCount == disconnects + 1
+
+
+def test_callback_error_is_not_a_disconnect():
+    device = FakeDevice(stickEvents(100, 200))
+    stops = []
+
+    def failingWrite(name, value):
+        raise OSError(errno.EIO, 'PWM write failed')
+
+    try:
+        withDevices(lambda: controller.eventLoop(onStick=failingWrite,
+                                                 onDisconnect=lambda: stops.append(True)),
+                    device)
+        assert False, 'the callback error must reach the caller'
+    except OSError as error:
+        assert error.strerror == 'PWM write failed'
+    assert stops == [] and not device.closed
+
+
+def test_frames_reconnect_after_read_error():
+    first = FakeDevice(stickEvents(100), OSError(errno.EIO, 'Input/output error'))
+    second = FakeDevice(stickEvents(300))
+    stops = []
+
+    async def collect():
+        return [frame async for frame in controller.frames(onDisconnect=lambda: stops.append(True))]
+
+    result = []
+    withDevices(lambda: result.extend(asyncio.run(collect())), first, second)
+    assert result == [{'stick1-Y': 100 / 32767}, {'stick1-Y': 300 / 32767}]
+    assert stops == [True]
+
+
+def test_connect_retries_on_any_os_error():
+    attempts = []
+
+    class InputDevice:
+        name = 'Fake controller'
+
+        def __init__(self, path):
+            attempts.append(path)
+            if len(attempts) < 3:
+                # A Bluetooth device node that is still being set up
+                raise OSError(errno.ENODEV if len(attempts) == 1 else errno.EIO, 'not ready')
+
+    saved = sys.modules.get('evdev')
+    sys.modules['evdev'] = types.SimpleNamespace(InputDevice=InputDevice)
+    try:
+        controller.connectToController(retryInterval=0)
+        assert isinstance(controller.controller, InputDevice)
+        assert len(attempts) == 3
+    finally:
+        controller.controller = None
+        if saved is None:
+            del sys.modules['evdev']
+        else:
+            sys.modules['evdev'] = saved
+
+
+if __name__ == '__main__':
+    for test in (test_read_error_reconnects_and_continues,
+                 test_callback_error_is_not_a_disconnect,
+                 test_frames_reconnect_after_read_error,
+                 test_connect_retries_on_any_os_error):
+        test()
+        print(f'OK  {test.__name__}')
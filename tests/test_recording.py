@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Recording Test
+==============
+This script writes controller recordings (robot.recording) to a temporary
+folder and reads them back:
+
+- every event comes back with its type, code, value and exact time
+- pauses too long for a normal record use "time skip" records, and the
+  file is exactly as big as the format says
+- a recording with no events, or a file that is not a recording
+- replay() plays a file through the normal controller callbacks, and
+  keeps the recorded pace
+
+Run it directly, or with pytest:
+    python3 tests/test_recording.py
+    python3 -m pytest tests/test_recording.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+import time
+from robot import recording
+from robot.controller import EV_ABS, EV_KEY, EV_SYN, SYN_REPORT
+from robot.recording import HEADER, RECORD, MAX_SKIP, RecordedEvent, Recorder
+
+
+def at(seconds, type, code, value):
+    """An event at a time given in (whole) microseconds."""
+    micros = round(seconds * 1000000)
+    return RecordedEvent(micros // 1000000, micros % 1000000, type, code, value)
+
+
+def record(path, events):
+    recorder = Recorder(path)
+    passed = list(recorder.wrap(events))
+    recorder.close()
+    assert passed == list(events)
+    return recorder
+
+
+def test_round_trip_with_time_skips():
+    start = 1700000000.25
+    events = [
+        at(start, EV_ABS, 1, -32767),
+        at(start + 0.004, EV_SYN, SYN_REPORT, 0),
+        at(start + 0.2, EV_KEY, 304, 1),                     # 200 ms: one skip record
+        at(start + 0.2, EV_SYN, SYN_REPORT, 0),              # Same moment: delta 0
+        at(start + 0.2 + MAX_SKIP / 1e6 + 5, EV_KEY, 304, 0),  # Needs two skip records
+        at(start + 0.2 + MAX_SKIP / 1e6 + 5.065535, EV_ABS, 0, 12345),  # Largest delta
+    ]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'session.rbev')
+        recorder = record(path, events)
+        assert recorder.count == len(events)
+        assert os.path.getsize(path) == HEADER.size + RECORD.size * (len(events) + 3)
+        assert list(recording.readEvents(path)) == events
+
+        info = recording.fileInfo(path)
+        assert info['events'] == len(events)
+        assert abs(info['seconds'] - (events[-1].timestamp() - events[0].timestamp())) < 1e-6
+
+
+def test_clock_going_backwards_keeps_the_order():
+    events = [at(100.5, EV_KEY, 304, 1), at(100.4, EV_KEY, 304, 0)]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'session.rbev')
+        record(path, events)
+        back = list(recording.readEvents(path))
+    assert [event.value for event in back] == [1, 0]
+    assert back[1].timestamp() == back[0].timestamp()
+
+
+def test_empty_and_foreign_files():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'empty.rbev')
+        record(path, [])
+        assert list(recording.readEvents(path)) == []
+        assert recording.fileInfo(path) == {'events': 0, 'seconds': 0.0, 'bytes': HEADER.size}
+
+        other = os.path.join(folder, 'notes.txt')
+        with open(other, 'wb') as file:
+            file.write(b'Shopping list: milk, eggs\n')
+        try:
+            list(recording.readEvents(other))
+            assert False, 'a text file is not a recording'
+        except ValueError as error:
+            assert 'is not a controller recording' in str(error)
+
+        newer = os.path.join(folder, 'newer.rbev')
+        with open(newer, 'wb') as file:
+            file.write(HEADER.pack(recording.MAGIC, recording.VERSION + 1, RECORD.size, 0))
+        try:
+            list(recording.readEvents(newer))
+            assert False, 'a newer format must not be misread'
+        except ValueError as error:
+            assert 'format version' in str(error)
+
+
+def test_replay_uses_the_callbacks_and_the_pace():
+    events = [at(50.0, EV_ABS, 1, -32767), at(50.0, EV_SYN, SYN_REPORT, 0),
+              at(50.1, EV_KEY, 304, 1), at(50.1, EV_SYN, SYN_REPORT, 0),
+              at(50.2, EV_ABS, 1, 0), at(50.2, EV_SYN, SYN_REPORT, 0)]
+    calls = []
+    frames = []
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'session.rbev')
+        record(path, events)
+
+        recording.replay(path, lambda name, value: calls.append(('button', name, value)),
+                         lambda name, value: calls.append(('stick', name, value)), speed=None)
+
+        started = time.monotonic()
+        recording.replay(path, None, None, onFrame=frames.append, speed=2.0)
+        elapsed = time.monotonic() - started
+
+    assert calls == [('stick', 'stick1-Y', -1.0), ('button', 'A', 1 / 32767),
+                     ('stick', 'stick1-Y', 0.0)]
+    assert frames == [{'stick1-Y': -1.0}, {'A': 1 / 32767}, {'stick1-Y': 0.0}]
+    assert 0.1 <= elapsed < 0.5                  # 0.2 s recorded, played twice as fast
+
+
+if __name__ == '__main__':
+    for test in (test_round_trip_with_time_skips,
+                 test_clock_going_backwards_keeps_the_order,
+                 test_empty_and_foreign_files,
+                 test_replay_uses_the_callbacks_and_the_pace):
+        test()
+        print(f'OK  {test.__name__}')
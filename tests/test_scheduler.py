@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Scheduler Test
+==============
+This script checks the fixed-rate control loop (robot.scheduler) with a
+fake clock, so the timing is exact and no test has to wait:
+
+- deadlines are absolute (start + N * period), so lateness does not add up
+- a task that falls a whole period behind skips the missed runs and
+  counts an overrun, then stays on its original time grid
+- a task that raises is counted and reported, the onError function is
+  called, and the loop (and the other tasks) keep running
+- the report shows the numbers
+
+Run it directly, or with pytest:
+    python3 tests/test_scheduler.py
+    python3 -m pytest tests/test_scheduler.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import types
+from robot import log
+from robot import scheduler as schedulerModule
+from robot.scheduler import PeriodicTask, Scheduler
+
+
+class FakeClock:
+    """A clock that only moves when the test (or a fake sleep) moves it."""
+
+    def __init__(self):
+        self.time = 0.0
+
+    def monotonic(self):
+        return self.time
+
+
+def runWithFakeClock(scheduler, clock, oversleep=0.0):
+    """
+    Run the scheduler loop with waits that only move the fake clock.
+
+    Each wait takes exactly its timeout, plus oversleep (like a busy
+    computer waking the thread late). A task ends the run by calling
+    scheduler.stopEvent.set().
+    """
+    class FakeEvent(threading.Event):
+        def wait(self, timeout=None):
+            clock.time += timeout + oversleep
+            return self.is_set()
+
+    scheduler.stopEvent = FakeEvent()
+    saved = schedulerModule.time
+    schedulerModule.time = types.SimpleNamespace(monotonic=clock.monotonic)
+    try:
+        scheduler.run()
+    finally:
+        schedulerModule.time = saved
+
+
+def test_deadlines_stay_on_the_time_grid():
+    clock = FakeClock()
+    scheduler = Scheduler()
+    starts = []
+
+    def control():
+        starts.append(clock.time)
+        if len(starts) == 5:
+            scheduler.stopEvent.set()
+
+    task = scheduler.addTask('control', 8, control)     # 0.125 s: exact in binary
+    runWithFakeClock(scheduler, clock, oversleep=0.01)
+
+    # Every run is 10 ms late, but the lateness never adds up
+    assert starts == [0.0, 0.135, 0.26, 0.385, 0.51]
+    assert task.runs == 5 and task.overruns == 0
+    assert abs(task.maxJitter - 0.01) < 1e-9
+    assert abs(task.totalJitter - 0.04) < 1e-9           # The first run was on time
+
+
+def test_overrun_skips_missed_runs():
+    clock = FakeClock()
+    scheduler = Scheduler()
+    starts = []
+
+    def control():
+        starts.append(clock.time)
+        if len(starts) == 3:
+            clock.time += 0.3                           # One slow run (2.4 periods)
+        if len(starts) == 5:
+            scheduler.stopEvent.set()
+
+    task = scheduler.addTask('control', 8, control)
+    runWithFakeClock(scheduler, clock)
+
+    # The runs due at 0.375 and 0.5 are skipped, not run back-to-back
+    assert starts == [0.0, 0.125, 0.25, 0.625, 0.75]
+    assert task.overruns == 1 and task.skipped == 2
+    assert abs(task.maxDuration - 0.3) < 1e-9
+
+    report = scheduler.formatReport().splitlines()
+    assert report[0].split() == ['task', 'rate', 'runs', 'overruns', 'skipped', 'errors',
+                                 'avg', 'jitter', 'max', 'jitter', 'max', 'run']
+    assert report[1].split()[:6] == ['control', '8.0', '5', '1', '2', '0']
+    assert report[1].split()[-1] == '300.000ms'
+
+
+def test_failing_task_is_reported_and_does_not_stop_the_loop():
+    clock = FakeClock()
+    failures = []
+    scheduler = Scheduler(onError=lambda task, error: failures.append((task.name, str(error))))
+    telemetry = []
+
+    def control():
+        raise OSError(5, 'PWM write failed')
+
+    def count():
+        telemetry.append(clock.time)
+        if len(telemetry) == 4:
+            scheduler.stopEvent.set()
+
+    failing = scheduler.addTask('control', 8, control)
+    scheduler.addTask('telemetry', 8, count)
+
+    class Sink:
+        lines = []
+
+        def write(self, text):
+            self.lines.append(text)
+
+        def flush(self):
+            pass
+
+    log.sink = Sink()
+    try:
+        runWithFakeClock(scheduler, clock)
+    finally:
+        log.sink = None
+
+    assert len(telemetry) == 4                          # The other task kept running
+    assert failing.runs == 4 and failing.errors == 4
+    assert failures == [('control', '[Errno 5] PWM write failed')] * 4
+    logged = ''.join(Sink.lines)
+    assert logged.count("Task 'control' failed") == 1  # Logged once, with the traceback
+    assert 'OSError: [Errno 5] PWM write failed' in logged
+
+    report = scheduler.formatReport().splitlines()
+    assert report[1].split()[5] == '4'
+    assert report[-1] == "control: last error: OSError(5, 'PWM write failed')"
+
+
+def test_rates_are_checked():
+    try:
+        PeriodicTask('broken', 0, print)
+        assert False, 'a task needs a positive rate'
+    except ValueError as error:
+        assert "Task 'broken' needs a positive rate" in str(error)
+    try:
+        Scheduler().run()
+        assert False, 'a scheduler without tasks must not run'
+    except ValueError:
+        pass
+
+
+if __name__ == '__main__':
+    for test in (test_deadlines_stay_on_the_time_grid,
+                 test_overrun_skips_missed_runs,
+                 test_failing_task_is_reported_and_does_not_stop_the_loop,
+                 test_rates_are_checked):
+        test()
+        print(f'OK  {test.__name__}')
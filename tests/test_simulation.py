@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Fleet Simulator Test
+====================
+This script checks the robot fleet simulator (robot.simulation) against
+answers that can be worked out by hand, and checks that the fast block
+stepping gives the same result as stepping one step at a time.
+
+Requires NumPy (pip install numpy). No hardware is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_simulation.py
+    python3 -m pytest tests/test_simulation.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import numpy as np
+from robot import controller
+from robot.recording import RecordedEvent
+from robot.simulation import Simulation, commandsFromEvents, DEFAULT_WHEEL_RADIUS
+
+
+def test_straight_line_reaches_top_speed():
+    sim = Simulation(count=3, maxWheelSpeed=[10.0, 20.0, 30.0])
+    sim.setCommands([1, 0, 0])
+    sim.run(2.0)
+    # After 20 time constants the wheels are at full speed: v = omega * r
+    assert np.allclose(sim.speed(), np.array([10, 20, 30]) * DEFAULT_WHEEL_RADIUS)
+    assert np.allclose(sim.pose[:, 1:], 0.0)          # No sideways drift, no turning
+    assert sim.pose[0, 0] < sim.pose[1, 0] < sim.pose[2, 0]
+
+
+def test_turning_on_the_spot_stays_in_place():
+    sim = Simulation(timeConstant=0.0)                 # Motors respond instantly
+    sim.setCommands([0, 0, 1])
+    sim.run(1.0)
+    assert np.allclose(sim.pose[0, :2], 0.0)
+    assert sim.pose[0, 2] > 0                          # Counter-clockwise
+
+
+def test_circle_closes():
+    probe = Simulation(timeConstant=0.0)               # Motors respond instantly
+    probe.setCommands([0.5, 0, 0.5])
+    probe.step()
+    lap = 2 * math.pi / probe.twist[0, 2]
+
+    # A time step that fits exactly 1000 times into one lap
+    sim = Simulation(dt=lap / 1000, timeConstant=0.0)
+    sim.setCommands([0.5, 0, 0.5])
+    sim.step(1000)
+    assert abs(sim.pose[0, 2] - 2 * math.pi) < 1e-9
+    assert np.hypot(*sim.pose[0, :2]) < 1e-9            # Back where it started
+
+
+def test_block_steps_match_single_steps():
+    settings = dict(count=5, maxWheelSpeed=np.linspace(10, 30, 5),
+                    timeConstant=np.linspace(0.05, 0.2, 5))
+    fast = Simulation(**settings)
+    slow = Simulation(**settings)
+    assert fast.blockSteps is not None
+    for sim in (fast, slow):
+        sim.setCommands([0.5, 0.3, 0.4])
+    fast.run(3.0)
+    for _ in range(round(3.0 / slow.dt)):
+        slow.stepOnce()
+    assert np.allclose(fast.pose, slow.pose, rtol=0, atol=1e-9)
+    assert np.allclose(fast.wheelSpeeds, slow.wheelSpeeds, rtol=0, atol=1e-9)
+
+
+def test_commands_from_recorded_events():
+    events = [
+        RecordedEvent(100, 0, controller.EV_ABS, 1, -32767),        # stick1-Y up
+        RecordedEvent(100, 0, controller.EV_SYN, controller.SYN_REPORT, 0),
+        RecordedEvent(100, 500000, controller.EV_ABS, 1, 0),        # released at 0.5 s
+        RecordedEvent(100, 500000, controller.EV_SYN, controller.SYN_REPORT, 0),
+    ]
+    commands = commandsFromEvents(events, dt=0.01)
+    assert commands.shape == (51, 3)
+    assert np.allclose(commands[:50], [1, 0, 0]) and np.allclose(commands[50], 0)
+
+    replayed = Simulation()
+    replayed.runCommands(commands)
+    recorded = Simulation()
+    poses = recorded.runCommands(commands, record=True)
+    assert np.allclose(replayed.pose, poses[-1], rtol=0, atol=1e-9)
+    assert replayed.pose[0, 0] > 0
+
+
+if __name__ == '__main__':
+    for test in (test_straight_line_reaches_top_speed,
+                 test_turning_on_the_spot_stays_in_place,
+                 test_circle_closes,
+                 test_block_steps_match_single_steps,
+                 test_commands_from_recorded_events):
+        test()
+        print(f'OK  {test.__name__}')
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Controller Subscription Test
+============================
+This script checks the controller's subscription table (robot.controller
+subscribe() and subscriptionLoop()) and the onButton/onStick adapter built
+on it, with made-up events - no controller is needed.
+
+Run it directly, or with pytest:
+    python3 tests/test_subscriptions.py
+    python3 -m pytest tests/test_subscriptions.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from robot import controller, drive, motor, simgpio
+from robot.controller import EV_ABS, EV_KEY, EV_SYN, SYN_REPORT
+from robot.mecanum import makeMotorVector
+from robot.recording import RecordedEvent
+
+EVENTS = [
+    RecordedEvent(0, 0, EV_ABS, 1, -32767),         # stick1-Y up
+    RecordedEvent(0, 0, EV_ABS, 4, 16384),          # stick2-Y (not used for driving)
+    RecordedEvent(0, 0, EV_KEY, 304, 1),            # A pressed
+    RecordedEvent(0, 0, EV_KEY, 999, 1),            # unmapped button
+    RecordedEvent(0, 0, EV_SYN, SYN_REPORT, 0),
+]
+
+
+def test_names_resolve_to_type_and_code():
+    assert controller.inputKey('A') == (EV_KEY, 304)
+    assert controller.inputKey('stick1-Y') == (EV_ABS, 1)
+    assert controller.inputKey('pad-X') == (EV_ABS, 16)      # The D-pad is an axis
+    assert controller.inputKey((EV_KEY, 304)) == (EV_KEY, 304)
+    try:
+        controller.subscribe('stick9-Z', print)
+        assert False, 'an unknown name must not subscribe'
+    except ValueError as error:
+        assert "Unknown input 'stick9-Z'" in str(error)
+
+
+def test_only_subscribed_events_reach_a_handler():
+    seen = []
+    try:
+        controller.subscribe('stick1-Y', lambda value: seen.append(('Y', value)))
+        controller.subscribe((EV_KEY, 304), lambda value: seen.append(('A', value)))
+        controller.subscriptionLoop(EVENTS)
+        assert seen == [('Y', -1.0), ('A', 1 / 32767)]
+
+        controller.unsubscribe('A')
+        seen.clear()
+        controller.subscriptionLoop(EVENTS)
+        assert seen == [('Y', -1.0)]
+    finally:
+        controller.clearSubscriptions()
+
+
+def test_legacy_callbacks_get_names():
+    calls = []
+    controller.callbackLoop(lambda name, value: calls.append(('button', name, value)),
+                            lambda name, value: calls.append(('stick', name, value)), EVENTS)
+    assert calls == [('stick', 'stick1-Y', -1.0), ('stick', 'stick2-Y', 16384 / 32767),
+                     ('button', 'A', 1 / 32767)]
+
+
+def test_drive_subscriptions_move_the_motors():
+    simgpio.reset()
+    motor.bank = motor.MotorBank(GPIO=simgpio)
+    drive.motorsFollowInput = True
+    try:
+        drive.subscribeControls()
+        assert controller.inputKey('stick2-Y') not in controller.subscriptions
+        controller.subscriptionLoop(EVENTS)
+        assert drive.forward == 1.0
+        assert list(drive.motorPowers) == makeMotorVector(1.0, 0, 0)
+    finally:
+        controller.clearSubscriptions()
+        drive.resetAxes()
+
+
+if __name__ == '__main__':
+    for test in (test_names_resolve_to_type_and_code,
+                 test_only_subscribed_events_reach_a_handler,
+                 test_legacy_callbacks_get_names,
+                 test_drive_subscriptions_move_the_motors):
+        test()
+        print(f'OK  {test.__name__}')
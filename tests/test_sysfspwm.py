@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Hardware PWM Backend Test
+=========================
+This script checks the sysfs hardware PWM backend (robot/sysfspwm.py)
+against a FAKE /sys/class/pwm directory, so it runs on any computer.
+
+It checks that:
+1. The motor bank writes period, duty_cycle and enable in nanoseconds
+2. Forward/backward commands end up on the right PWM channels
+3. A channel that does not exist yet is exported through the chip's export file
+4. Pins without a hardware PWM channel are rejected with a clear error
+
+Run it directly, or with pytest:
+    python3 tests/test_sysfspwm.py
+    python3 -m pytest tests/test_sysfspwm.py
+"""
+
+import sys
+import os
+# Add parent directory to path so we can import robot package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+from robot import sysfspwm
+from robot.motor import MotorBank
+
+
+def makeFakeSysfs(root, chip=0, channels=2):
+    """
+    Create a directory that looks like /sys/class/pwm with one exported chip.
+    """
+    chipPath = os.path.join(root, f'pwmchip{chip}')
+    os.makedirs(chipPath)
+    for name in ('export', 'unexport'):
+        open(os.path.join(chipPath, name), 'w').close()
+    for channel in range(channels):
+        channelPath = os.path.join(chipPath, f'pwm{channel}')
+        os.makedirs(channelPath)
+        for name in ('period', 'duty_cycle', 'enable'):
+            open(os.path.join(channelPath, name), 'w').close()
+    return chipPath
+
+
+def readValue(path):
+    """
+    Read the newest value from a fake sysfs file (always on the first line).
+    """
+    with open(path) as file:
+        return int(file.readline())
+
+
+def useFakeSysfs(root, mapping):
+    """
+    Point the backend at a fake tree and forget pins from earlier tests.
+    """
+    sysfspwm.cleanup()
+    sysfspwm.sysfsRoot = root
+    sysfspwm.setChannels(mapping)
+
+
+def test_motor_bank_writes_hardware_channels():
+    with tempfile.TemporaryDirectory() as root:
+        chipPath = makeFakeSysfs(root)
+        useFakeSysfs(root, '21=0:0,20=0:1')
+
+        bank = MotorBank([(21, 20)], frequency=100, GPIO=sysfspwm)
+        forward = os.path.join(chipPath, 'pwm0')
+        backward = os.path.join(chipPath, 'pwm1')
+
+        # 100 Hz = 10 ms = 10,000,000 ns per cycle, both channels running at 0%
+        assert readValue(os.path.join(forward, 'period')) == 10000000
+        assert readValue(os.path.join(forward, 'enable')) == 1
+        assert readValue(os.path.join(backward, 'enable')) == 1
+        assert readValue(os.path.join(forward, 'duty_cycle')) == 0
+
+        bank.apply([0.5])
+        assert readValue(os.path.join(forward, 'duty_cycle')) == 5000000
+        assert readValue(os.path.join(backward, 'duty_cycle')) == 0
+
+        bank.apply([-0.25])
+        assert readValue(os.path.join(forward, 'duty_cycle')) == 0
+        assert readValue(os.path.join(backward, 'duty_cycle')) == 2500000
+
+        # Changing the frequency keeps the duty cycle percentage
+        bank.pwms[1].ChangeFrequency(1000)
+        assert readValue(os.path.join(backward, 'period')) == 1000000
+        assert readValue(os.path.join(backward, 'duty_cycle')) == 250000
+
+        sysfspwm.cleanup()
+        assert readValue(os.path.join(forward, 'enable')) == 0
+        assert readValue(os.path.join(backward, 'enable')) == 0
+
+
+def test_missing_channel_is_exported():
+    with tempfile.TemporaryDirectory() as root:
+        chipPath = makeFakeSysfs(root, channels=0)
+        useFakeSysfs(root, {21: (0, 3)})
+        sysfspwm.exportTimeout = 0.05
+
+        sysfspwm.setmode(sysfspwm.BCM)
+        sysfspwm.setup(21, sysfspwm.OUT)
+        try:
+            # The fake tree has no kernel to create pwm3, so this times out...
+            sysfspwm.PWM(21, 100)
+            assert False, 'PWM() should have timed out'
+        except RuntimeError as error:
+            assert 'pwm3' in str(error)
+        finally:
+            sysfspwm.exportTimeout = 1.0
+
+        # ...but the channel number was written to the export file
+        assert readValue(os.path.join(chipPath, 'export')) == 3
+        sysfspwm.cleanup()
+
+
+def test_pin_without_channel_is_rejected():
+    with tempfile.TemporaryDirectory() as root:
+        makeFakeSysfs(root)
+        useFakeSysfs(root, {21: (0, 0)})
+
+        sysfspwm.setmode(sysfspwm.BCM)
+        try:
+            sysfspwm.setup(20, sysfspwm.OUT)
+            assert False, 'setup() should have rejected GPIO 20'
+        except RuntimeError as error:
+            assert 'ROBOT_PWM_CHANNELS' in str(error)
+        sysfspwm.cleanup()
+
+
+if __name__ == '__main__':
+    for test in (test_motor_bank_writes_hardware_channels,
+                 test_missing_channel_is_exported,
+                 test_pin_without_channel_is_rejected):
+        test()
+        print(f'OK  {test.__name__}')